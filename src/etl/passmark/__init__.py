@@ -0,0 +1,15 @@
+# standard library imports
+
+# third party imports
+
+# local imports
+
+
+def __getattr__(name):
+    # passmark.load without importing pandas along with the package, so
+    # `python -m passmark.<module>` and light imports stay cheap
+    if name == "load":
+        from .dataset import load
+
+        return load
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,342 @@
+# standard library imports
+import argparse
+import os
+import time
+
+# third party imports
+import numpy as np
+import pandas as pd
+
+# local imports
+from .compatibility import (
+    GENERATIONS,
+    INDEX_PATH,
+    CompatibilityIndex,
+    build_compatibility,
+)
+from .constants import FAMILIES, raw_table_path
+from .parsing import parse_numbers, parse_prices
+
+# Share of the objective per family; each mark counts relative to the best
+# priced device of its family
+WEIGHTS = {"cpu": 0.4, "gpu": 0.4, "ram": 0.1, "hdd_ssd": 0.1}
+CLASS_COLUMNS = {"cpu": "cpu_class", "gpu": "category", "ram": "generation"}
+
+
+def pareto_frontier(prices, scores):
+    # Positions of the devices no cheaper (or equally priced) device matches
+    # on score, by ascending price and so ascending score
+    if not len(prices):
+        return np.array([], dtype=np.int64)
+    order = np.lexsort((-scores, prices))
+    ordered = scores[order]
+    keep = np.ones(len(order), dtype=bool)
+    keep[1:] = ordered[1:] > np.maximum.accumulate(ordered)[:-1]
+    return order[keep]
+
+
+def load_devices(family, device_class=None):
+    # Priced devices with a mark: id, name, price, mark (and class), with
+    # device_class matched against the class column, e.g. "Desktop" keeps
+    # "Desktop, Laptop"
+    spec = FAMILIES[family]
+    class_column = CLASS_COLUMNS.get(family)
+    columns = ["id", "name", "last_price_change", spec["mark_column"]]
+    if class_column:
+        columns.append(class_column)
+    df = pd.read_csv(raw_table_path(spec["devices"]), usecols=columns, dtype=str)
+    devices = pd.DataFrame(
+        {
+            "id": df["id"].astype(np.int64),
+            "name": df["name"],
+            "price": parse_prices(df["last_price_change"]),
+            "mark": parse_numbers(df[spec["mark_column"]]),
+        }
+    )
+    if class_column:
+        devices["class"] = df[class_column].fillna("")
+    keep = (devices["price"] > 0) & (devices["mark"] > 0)
+    if device_class is not None and class_column:
+        keep &= devices["class"].str.contains(device_class, regex=False)
+    return devices[keep].reset_index(drop=True)
+
+
+class BuildOptimizer:
+    """Best CPU + GPU + RAM module + drive builds under a budget.
+
+    The objective is a weighted sum of the parts' marks, so a part that costs
+    more than another of its kind and scores no better is never in an optimal
+    build: each family is pruned to its price/score Pareto frontier, RAM per
+    generation and CPUs per set of generations they support, so that only
+    compatible RAM is ever paired. RAM and drive frontiers are merged into one
+    memory frontier per CPU group; then for every frontier CPU x GPU pair and
+    every budget at once, the best memory that fits the rest of the budget is
+    a binary search on that frontier.
+    """
+
+    def __init__(self, cpus, gpus, ram, drives, compatibility, weights=None):
+        self.weights = {**WEIGHTS, **(weights or {})}
+        self.devices = {"cpu": cpus, "gpu": gpus, "ram": ram, "hdd_ssd": drives}
+        self.scales = {
+            family: float(df["mark"].max()) if len(df) else 1.0
+            for family, df in self.devices.items()
+        }
+
+        # Generations each CPU takes, as a bit mask; CPUs whose memory support
+        # is unknown or that only take soldered memory are left out
+        masks = np.zeros(len(cpus), dtype=np.int64)
+        for position, cpu_id in enumerate(cpus["id"].tolist()):
+            row = compatibility.cpu_row_of.get(cpu_id)
+            if row is not None:
+                speeds = compatibility.profile_speeds[compatibility.cpu_profiles[row]]
+                masks[position] = int(np.sum((speeds >= 0) << np.arange(len(speeds))))
+        ram_generations = np.array(
+            [
+                GENERATIONS.index(generation) if generation in GENERATIONS else -1
+                for generation in ram["class"]
+            ]
+        )
+
+        # Frontiers do not depend on the weights, which scale a family as a
+        # whole
+        self.cpu_frontiers = {}
+        for mask in np.unique(masks[masks > 0]).tolist():
+            positions = np.flatnonzero(masks == mask)
+            frontier = pareto_frontier(
+                cpus["price"].to_numpy()[positions], cpus["mark"].to_numpy()[positions]
+            )
+            self.cpu_frontiers[mask] = positions[frontier]
+        self.gpu_frontier = pareto_frontier(
+            gpus["price"].to_numpy(), gpus["mark"].to_numpy()
+        )
+        self.ram_frontiers = {}
+        for code in range(len(GENERATIONS)):
+            positions = np.flatnonzero(ram_generations == code)
+            frontier = pareto_frontier(
+                ram["price"].to_numpy()[positions], ram["mark"].to_numpy()[positions]
+            )
+            self.ram_frontiers[code] = positions[frontier]
+        self.drive_frontier = pareto_frontier(
+            drives["price"].to_numpy(), drives["mark"].to_numpy()
+        )
+
+    @classmethod
+    def load(cls, cpu_class=None, gpu_category=None, weights=None):
+        if os.path.exists(INDEX_PATH):
+            compatibility = CompatibilityIndex.load()
+        else:
+            compatibility = build_compatibility()
+        return cls(
+            load_devices("cpu", cpu_class),
+            load_devices("gpu", gpu_category),
+            load_devices("ram"),
+            load_devices("hdd_ssd"),
+            compatibility,
+            weights,
+        )
+
+    def frontier_sizes(self):
+        return {
+            "cpu": sum(len(frontier) for frontier in self.cpu_frontiers.values()),
+            "gpu": len(self.gpu_frontier),
+            "ram": sum(len(frontier) for frontier in self.ram_frontiers.values()),
+            "hdd_ssd": len(self.drive_frontier),
+        }
+
+    def _scores(self, family, positions, weights):
+        df = self.devices[family]
+        return weights[family] * df["mark"].to_numpy()[positions] / self.scales[family]
+
+    def _prices(self, family, positions):
+        return self.devices[family]["price"].to_numpy()[positions]
+
+    def memory_frontiers(self, weights):
+        # Per generation: (prices, scores, ram positions, drive positions) of
+        # the Pareto frontier of RAM module + drive pairs
+        drive_prices = self._prices("hdd_ssd", self.drive_frontier)
+        drive_scores = self._scores("hdd_ssd", self.drive_frontier, weights)
+        frontiers = {}
+        for code, ram_positions in self.ram_frontiers.items():
+            prices = (
+                self._prices("ram", ram_positions)[:, None] + drive_prices[None, :]
+            ).ravel()
+            scores = (
+                self._scores("ram", ram_positions, weights)[:, None]
+                + drive_scores[None, :]
+            ).ravel()
+            frontier = pareto_frontier(prices, scores)
+            ram_index, drive_index = np.divmod(frontier, len(self.drive_frontier))
+            frontiers[code] = (
+                prices[frontier],
+                scores[frontier],
+                ram_positions[ram_index],
+                self.drive_frontier[drive_index],
+            )
+        return frontiers
+
+    def search(self, budgets, k=5, weights=None):
+        # The k best builds under each budget, as a frame with one row per
+        # (budget, rank), among builds whose CPU, GPU and RAM and drive pair
+        # lie on their price/mark frontiers. Every frontier CPU and GPU pair
+        # offers the k best memory pairs it leaves room for, so the runners-up
+        # include the optimum's CPU and GPU with cheaper memory
+        weights = {**self.weights, **(weights or {})}
+        budgets = np.asarray(budgets, dtype=np.float64)
+        memory = self.memory_frontiers(weights)
+        gpu_prices = self._prices("gpu", self.gpu_frontier)
+        gpu_scores = self._scores("gpu", self.gpu_frontier, weights)
+
+        totals, parts = [], []
+        for mask, cpu_positions in self.cpu_frontiers.items():
+            codes = [code for code in memory if mask >> code & 1]
+            prices, scores, ram_positions, drive_positions = (
+                np.concatenate([memory[code][field] for code in codes])
+                for field in range(4)
+            )
+            frontier = pareto_frontier(prices, scores)
+            prices, scores = prices[frontier], scores[frontier]
+            if not len(prices):
+                continue
+            ram_positions = ram_positions[frontier]
+            drive_positions = drive_positions[frontier]
+
+            pair_prices = (
+                self._prices("cpu", cpu_positions)[:, None] + gpu_prices[None, :]
+            ).ravel()
+            pair_scores = (
+                self._scores("cpu", cpu_positions, weights)[:, None]
+                + gpu_scores[None, :]
+            ).ravel()
+            # Pairs that leave no room for memory under any budget
+            fits = pair_prices + prices[0] <= budgets.max(initial=0)
+            cpu_index, gpu_index = np.divmod(
+                np.flatnonzero(fits), len(self.gpu_frontier)
+            )
+            pair_prices, pair_scores = pair_prices[fits], pair_scores[fits]
+
+            # (budgets, pairs): the most expensive memory still in budget is
+            # the best one on a frontier, the cheaper ones below it the next
+            best = (
+                np.searchsorted(
+                    prices, budgets[:, None] - pair_prices[None, :], side="right"
+                )
+                - 1
+            )
+            for offset in range(min(k, len(prices))):
+                choice = best - offset
+                found = choice >= 0
+                choice = np.maximum(choice, 0)
+                totals.append(
+                    np.where(found, pair_scores[None, :] + scores[choice], -np.inf)
+                )
+                parts.append(
+                    np.stack(
+                        [
+                            np.broadcast_to(cpu_positions[cpu_index], choice.shape),
+                            np.broadcast_to(self.gpu_frontier[gpu_index], choice.shape),
+                            ram_positions[choice],
+                            drive_positions[choice],
+                        ]
+                    )
+                )
+
+        if not totals:
+            return self._builds(budgets, np.empty((4, len(budgets), 0), dtype=np.int64))
+        totals = np.concatenate(totals, axis=1)
+        parts = np.concatenate(parts, axis=2)
+        k = min(k, totals.shape[1])
+        top = np.argpartition(-totals, k - 1, axis=1)[:, :k]
+        order = np.argsort(-np.take_along_axis(totals, top, axis=1), axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        found = np.isfinite(np.take_along_axis(totals, top, axis=1))
+        chosen = np.stack([np.take_along_axis(p, top, axis=1) for p in parts])
+        return self._builds(budgets, chosen, found, weights)
+
+    def _builds(self, budgets, chosen, found=None, weights=None):
+        # chosen: (4 parts, budgets, ranks) device positions
+        if found is None:
+            found = np.zeros(chosen.shape[1:], dtype=bool)
+        budget_index, ranks = np.nonzero(found)
+        builds = pd.DataFrame({"budget": budgets[budget_index], "rank": ranks + 1})
+        price = np.zeros(len(builds))
+        score = np.zeros(len(builds))
+        for family, positions in zip(self.devices, chosen):
+            positions = positions[budget_index, ranks]
+            df = self.devices[family]
+            builds[f"{family}_id"] = df["id"].to_numpy()[positions]
+            builds[f"{family}_name"] = df["name"].to_numpy()[positions]
+            builds[f"{family}_price"] = df["price"].to_numpy()[positions]
+            price += builds[f"{family}_price"].to_numpy()
+            if weights is not None:
+                score += self._scores(family, positions, weights)
+        builds.insert(2, "price", np.round(price, 2))
+        builds.insert(2, "score", np.round(score, 4))
+        return builds
+
+
+def _parse_weights(pairs):
+    weights = {}
+    for pair in pairs:
+        name, _, value = pair.partition("=")
+        weights[name] = float(value)
+    return weights
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Best builds under a budget")
+    parser.add_argument(
+        "--budget", type=float, action="append", default=[], help="in USD"
+    )
+    parser.add_argument(
+        "--budget-range",
+        type=float,
+        nargs=3,
+        metavar=("START", "STOP", "STEP"),
+        help="every budget from START to STOP",
+    )
+    parser.add_argument(
+        "-k", type=int, default=3, help="best builds of frontier parts per budget"
+    )
+    parser.add_argument(
+        "--weight",
+        action="append",
+        default=[],
+        metavar="FAMILY=WEIGHT",
+        help=f"objective weights (default: {WEIGHTS})",
+    )
+    parser.add_argument("--cpu-class", default="Desktop", help="'any' for all")
+    parser.add_argument("--gpu-category", default="Desktop", help="'any' for all")
+    parser.add_argument("--output", help="also write the builds to this CSV")
+    args = parser.parse_args()
+
+    budgets = list(args.budget)
+    if args.budget_range:
+        start, stop, step = args.budget_range
+        budgets += np.arange(start, stop + step / 2, step).tolist()
+    budgets = budgets or [1000.0]
+    optimizer = BuildOptimizer.load(
+        None if args.cpu_class == "any" else args.cpu_class,
+        None if args.gpu_category == "any" else args.gpu_category,
+        _parse_weights(args.weight),
+    )
+    start = time.perf_counter()
+    builds = optimizer.search(budgets, args.k)
+    seconds = time.perf_counter() - start
+
+    columns = ["budget", "rank", "score", "price"] + [
+        f"{family}_name" for family in FAMILIES
+    ]
+    if len(builds):
+        print(builds[columns].to_string(index=False))
+    for budget in sorted(set(budgets) - set(builds["budget"])):
+        print(f"No build fits budget ${budget:,.2f}")
+    print(
+        f"\n{len(budgets)} budgets in {seconds * 1000:.1f} ms, "
+        f"frontiers {optimizer.frontier_sizes()}"
+    )
+    if args.output:
+        builds.to_csv(args.output, index=False)
+
+
+if __name__ == "__main__":
+    main()
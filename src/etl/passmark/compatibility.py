@@ -0,0 +1,361 @@
+# standard library imports
+import argparse
+import os
+import re
+
+# third party imports
+import numpy as np
+import pandas as pd
+
+# local imports
+from .constants import FAMILIES, PROCESSED_DATA_DIR, raw_table_path
+from .parsing import parse_numbers, parse_prices
+
+INDEX_PATH = os.path.join(PROCESSED_DATA_DIR, "compatibility.npz")
+# Generations of the RAM modules table, coded by position
+GENERATIONS = ["DDR2", "DDR3", "DDR4", "DDR5"]
+# JEDEC transfer rates (MT/s); PC ratings are 8 times a rounded rate, e.g.
+# PC3-10600 is DDR3-1333
+STANDARD_SPEEDS = np.array(
+    [400, 533, 667, 800, 1066, 1333, 1600, 1866, 2133, 2400, 2666, 2933, 3200]
+    + [3466, 3600, 4000, 4266, 4400, 4800, 5200, 5600, 6000, 6400, 7200, 8000]
+)
+# Where a CPU's memory support came from
+SOURCES = ["memory_support", "socket", "unknown"]
+
+# Speeds may carry their unit without a space, as in "DDR4 3200MT/s"
+TOKEN_PATTERN = re.compile(
+    r"(?P<generation>(?:LP)?DDR\d(?:L|X)?(?:/X)?)"
+    r"|(?P<speed>\b\d{3,5}(?:\b|(?=MT/S|MHZ)))(?!\s*(?:GB|TB|MB))",
+    re.IGNORECASE,
+)
+
+
+def parse_memory_support(text):
+    # "Max. Memory Size: 32 GB (DDR3-1333/1600, DDR3L-1333/1600 @ 1.5V)" ->
+    # {"DDR3": 1600}: the highest speed listed per generation, 0 if none is.
+    # DDR3L is DDR3 at a lower voltage and counts as DDR3; LPDDR is soldered
+    # down and kept under its own name, so it never matches a module
+    if not isinstance(text, str):
+        return {}
+    start = text.find("(")
+    speeds = {}
+    generation = None
+    for match in TOKEN_PATTERN.finditer(text[start + 1 :] if start >= 0 else text):
+        if match.group("generation"):
+            token = match.group("generation").upper()
+            generation = token[: token.index("DDR") + 4]
+            speeds.setdefault(generation, 0)
+        elif generation is not None:
+            speeds[generation] = max(speeds[generation], int(match.group("speed")))
+    return speeds
+
+
+def module_speeds(descriptions):
+    # "PC4-19200, 1.2V, ..." -> 2400 MT/s, snapped to the nearest standard
+    # rate within 2%; 0 where the rating is missing or implausible
+    ratings = descriptions.astype("string").str.extract(r"PC\d?L?-(\d+)", expand=False)
+    speeds = pd.to_numeric(ratings).to_numpy(dtype=np.float64, na_value=np.nan) / 8
+    nearest = STANDARD_SPEEDS[
+        np.abs(np.nan_to_num(speeds)[:, None] - STANDARD_SPEEDS[None, :]).argmin(1)
+    ]
+    speeds = np.where(np.abs(nearest - speeds) <= 0.02 * nearest, nearest, speeds)
+    valid = (speeds >= 100) & (speeds <= 20000)
+    return np.where(valid, np.round(np.nan_to_num(speeds)), 0).astype(np.int32)
+
+
+def _csr(lists):
+    offsets = np.zeros(len(lists) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(rows) for rows in lists])
+    values = np.concatenate(lists) if lists else np.array([])
+    return offsets, values.astype(np.int32)
+
+
+class CompatibilityIndex:
+    """CPUs and the RAM modules they take, as integer-coded adjacency arrays.
+
+    Each CPU's memory support is parsed into the highest speed it runs per DDR
+    generation (0 if unstated); CPUs without one borrow the generations of the
+    other CPUs on their socket. CPUs with the same support share a profile,
+    and per profile the compatible modules are stored as one CSR row ordered
+    by mark, best first: all modules of a supported generation, and those
+    rated at most the supported speed. A second CSR lists per generation the
+    CPUs that support it, also best first. Lookups slice a row, so they cost
+    the size of the answer, and the top k are its first k entries.
+    """
+
+    def __init__(self, arrays):
+        self.cpu_ids = arrays["cpu_ids"]
+        self.cpu_marks = arrays["cpu_marks"]
+        self.cpu_profiles = arrays["cpu_profiles"]
+        self.cpu_sources = arrays["cpu_sources"]
+        self.profile_speeds = arrays["profile_speeds"]
+        self.ram_ids = arrays["ram_ids"]
+        self.ram_generations = arrays["ram_generations"]
+        self.ram_speeds = arrays["ram_speeds"]
+        self.ram_marks = arrays["ram_marks"]
+        self.ram_prices = arrays["ram_prices"]
+        self.ram_offsets = arrays["ram_offsets"]
+        self.ram_rows = arrays["ram_rows"]
+        self.rated_offsets = arrays["rated_offsets"]
+        self.rated_rows = arrays["rated_rows"]
+        self.cpu_offsets = arrays["cpu_offsets"]
+        self.cpu_rows = arrays["cpu_rows"]
+        self.cpu_row_of = {
+            cpu_id: row for row, cpu_id in enumerate(self.cpu_ids.tolist())
+        }
+        self.ram_row_of = {
+            ram_id: row for row, ram_id in enumerate(self.ram_ids.tolist())
+        }
+
+    @classmethod
+    def from_frames(cls, cpus, ram):
+        # Both frames as read from the raw CSVs, all columns as text
+        supports = [parse_memory_support(text) for text in cpus["memory_support"]]
+        speeds = np.full((len(cpus), len(GENERATIONS)), -1, dtype=np.int32)
+        for row, support in enumerate(supports):
+            for code, generation in enumerate(GENERATIONS):
+                if generation in support:
+                    speeds[row, code] = support[generation]
+        parsed = np.array([bool(support) for support in supports], dtype=bool)
+
+        # Sockets take the union of what their parsed CPUs support
+        sockets = cpus["socket"].fillna("").str.strip().to_numpy()
+        socket_speeds = (
+            pd.DataFrame(speeds[parsed], index=sockets[parsed]).groupby(level=0).max()
+        )
+        socket_speeds = socket_speeds.drop(index="", errors="ignore")
+        borrowed = ~parsed & np.isin(sockets, socket_speeds.index)
+        speeds[borrowed] = socket_speeds.loc[sockets[borrowed]].to_numpy()
+        sources = np.where(parsed, 0, np.where(borrowed, 1, 2)).astype(np.uint8)
+
+        profile_speeds, cpu_profiles = np.unique(speeds, axis=0, return_inverse=True)
+        cpu_profiles = cpu_profiles.reshape(-1)
+        cpu_marks = parse_numbers(cpus[FAMILIES["cpu"]["mark_column"]]).to_numpy()
+
+        ram_generations = (
+            ram["generation"]
+            .map({generation: code for code, generation in enumerate(GENERATIONS)})
+            .fillna(-1)
+            .to_numpy(dtype=np.int8)
+        )
+        ram_speeds = module_speeds(ram["description"])
+        ram_marks = parse_numbers(ram[FAMILIES["ram"]["mark_column"]]).to_numpy()
+        # Best first; modules without a mark go last
+        by_mark = np.argsort(-np.nan_to_num(ram_marks, nan=-np.inf), kind="stable")
+
+        all_rows, rated_rows = [], []
+        for profile in profile_speeds:
+            caps = np.append(profile, -1)[ram_generations[by_mark]]
+            supported = caps >= 0
+            speeds_ok = (ram_speeds[by_mark] > 0) & (
+                (caps == 0) | (ram_speeds[by_mark] <= caps)
+            )
+            all_rows.append(by_mark[supported])
+            rated_rows.append(by_mark[supported & speeds_ok])
+
+        cpus_by_mark = np.argsort(-np.nan_to_num(cpu_marks, nan=-np.inf), kind="stable")
+        generation_rows = [
+            cpus_by_mark[speeds[cpus_by_mark, code] >= 0]
+            for code in range(len(GENERATIONS))
+        ]
+
+        ram_offsets, ram_rows = _csr(all_rows)
+        rated_offsets, rated_rows = _csr(rated_rows)
+        cpu_offsets, cpu_rows = _csr(generation_rows)
+        return cls(
+            {
+                "cpu_ids": cpus["id"].astype(np.int64).to_numpy(),
+                "cpu_marks": cpu_marks,
+                "cpu_profiles": cpu_profiles.astype(np.int32),
+                "cpu_sources": sources,
+                "profile_speeds": profile_speeds,
+                "ram_ids": ram["id"].astype(np.int64).to_numpy(),
+                "ram_generations": ram_generations,
+                "ram_speeds": ram_speeds,
+                "ram_marks": ram_marks,
+                "ram_prices": parse_prices(ram["last_price_change"]).to_numpy(),
+                "ram_offsets": ram_offsets,
+                "ram_rows": ram_rows,
+                "rated_offsets": rated_offsets,
+                "rated_rows": rated_rows,
+                "cpu_offsets": cpu_offsets,
+                "cpu_rows": cpu_rows,
+            }
+        )
+
+    @classmethod
+    def load(cls, path=INDEX_PATH):
+        with np.load(path) as npz:
+            arrays = {name: npz[name] for name in npz.files}
+        return cls(arrays)
+
+    def save(self, path):
+        np.savez_compressed(
+            path,
+            cpu_ids=self.cpu_ids,
+            cpu_marks=self.cpu_marks,
+            cpu_profiles=self.cpu_profiles,
+            cpu_sources=self.cpu_sources,
+            profile_speeds=self.profile_speeds,
+            ram_ids=self.ram_ids,
+            ram_generations=self.ram_generations,
+            ram_speeds=self.ram_speeds,
+            ram_marks=self.ram_marks,
+            ram_prices=self.ram_prices,
+            ram_offsets=self.ram_offsets,
+            ram_rows=self.ram_rows,
+            rated_offsets=self.rated_offsets,
+            rated_rows=self.rated_rows,
+            cpu_offsets=self.cpu_offsets,
+            cpu_rows=self.cpu_rows,
+        )
+
+    def support(self, cpu_id):
+        # {generation: highest speed, 0 if unstated} and where it came from
+        row = self.cpu_row_of[cpu_id]
+        speeds = self.profile_speeds[self.cpu_profiles[row]]
+        return (
+            {
+                generation: int(speed)
+                for generation, speed in zip(GENERATIONS, speeds)
+                if speed >= 0
+            },
+            SOURCES[self.cpu_sources[row]],
+        )
+
+    def ram_rows_for(self, cpu_id, rated=True):
+        # Rows of the compatible modules, best mark first: a view, no copy
+        profile = self.cpu_profiles[self.cpu_row_of[cpu_id]]
+        offsets, rows = (
+            (self.rated_offsets, self.rated_rows)
+            if rated
+            else (self.ram_offsets, self.ram_rows)
+        )
+        return rows[offsets[profile] : offsets[profile + 1]]
+
+    def compatible_ram(
+        self,
+        cpu_id,
+        rated=True,
+        generation=None,
+        min_speed=None,
+        max_price=None,
+        k=None,
+    ):
+        # Modules the CPU takes, best mark first. With rated=False, also those
+        # rated faster than the CPU runs them. Filters only look at the CPU's
+        # row, never at the whole modules table
+        rows = self.ram_rows_for(cpu_id, rated)
+        if generation is not None or min_speed is not None or max_price is not None:
+            keep = np.ones(len(rows), dtype=bool)
+            if generation is not None:
+                keep &= self.ram_generations[rows] == GENERATIONS.index(generation)
+            if min_speed is not None:
+                keep &= self.ram_speeds[rows] >= min_speed
+            if max_price is not None:
+                keep &= self.ram_prices[rows] <= max_price
+            rows = rows[keep]
+        return self._ram_frame(rows[:k])
+
+    def fastest_ram(self, cpu_id, k=10, rated=True):
+        return self._ram_frame(self.ram_rows_for(cpu_id, rated)[:k])
+
+    def compatible_cpus(self, ram_id, k=None):
+        # CPUs supporting the module's generation, best mark first, whatever
+        # speed they run it at
+        code = self.ram_generations[self.ram_row_of[ram_id]]
+        if code < 0:
+            rows = self.cpu_rows[:0]
+        else:
+            rows = self.cpu_rows[self.cpu_offsets[code] : self.cpu_offsets[code + 1]]
+        rows = rows[:k]
+        return pd.DataFrame(
+            {
+                "id": self.cpu_ids[rows],
+                "mark": self.cpu_marks[rows],
+                "source": np.array(SOURCES)[self.cpu_sources[rows]],
+            }
+        )
+
+    def _ram_frame(self, rows):
+        generations = np.array(GENERATIONS + [""])
+        return pd.DataFrame(
+            {
+                "id": self.ram_ids[rows],
+                "generation": generations[self.ram_generations[rows]],
+                "speed": self.ram_speeds[rows],
+                "mark": self.ram_marks[rows],
+                "price": self.ram_prices[rows],
+            }
+        )
+
+
+def build_compatibility(path=INDEX_PATH):
+    cpus = pd.read_csv(
+        raw_table_path(FAMILIES["cpu"]["devices"]),
+        usecols=["id", "socket", "memory_support", FAMILIES["cpu"]["mark_column"]],
+        dtype=str,
+    )
+    ram = pd.read_csv(
+        raw_table_path(FAMILIES["ram"]["devices"]),
+        usecols=[
+            "id",
+            "generation",
+            "description",
+            "last_price_change",
+            FAMILIES["ram"]["mark_column"],
+        ],
+        dtype=str,
+    )
+    index = CompatibilityIndex.from_frames(cpus, ram)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    index.save(path)
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RAM modules compatible with a CPU")
+    parser.add_argument("id", type=int, help="CPU id, or RAM id with --ram")
+    parser.add_argument("--ram", action="store_true", help="CPUs taking a module")
+    parser.add_argument("-k", type=int, default=10, help="number of results")
+    parser.add_argument("--generation", choices=GENERATIONS)
+    parser.add_argument("--min-speed", type=int, help="MT/s")
+    parser.add_argument("--max-price", type=float)
+    parser.add_argument(
+        "--any-speed",
+        action="store_true",
+        help="include modules rated faster than the CPU supports",
+    )
+    parser.add_argument("--rebuild", action="store_true", help="rebuild the index")
+    args = parser.parse_args()
+
+    if args.rebuild or not os.path.exists(INDEX_PATH):
+        index = build_compatibility()
+    else:
+        index = CompatibilityIndex.load()
+
+    if args.id not in (index.ram_row_of if args.ram else index.cpu_row_of):
+        parser.error(f"unknown {'RAM' if args.ram else 'CPU'} id {args.id}")
+    if args.ram:
+        print(index.compatible_cpus(args.id, args.k).to_string(index=False))
+        return
+    support, source = index.support(args.id)
+    if source == "unknown":
+        print(f"Memory support of CPU {args.id} is unknown")
+        return
+    print(f"Supports {support or 'no DDR modules'} (from {source})")
+    print(
+        index.compatible_ram(
+            args.id,
+            not args.any_speed,
+            args.generation,
+            args.min_speed,
+            args.max_price,
+            args.k,
+        ).to_string(index=False)
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+# standard library imports
+import os
+
+# third party imports
+
+# local imports
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "..", "data")
+RAW_DATA_DIR = os.path.join(DATA_DIR, "raw")
+PROCESSED_DATA_DIR = os.path.join(DATA_DIR, "processed")
+SNAPSHOTS_DIR = os.path.join(DATA_DIR, "snapshots")
+
+# Scraped tables, keyed by table name. "key" identifies a row within a table
+# and is unique except for the g3d mark distributions, which contain a handful
+# of repeated (gpu_id, g3d_mark) pairs. Columns not listed in "types" hold text.
+TABLES = {
+    "cpus": {
+        "family": "cpu",
+        "filename": "cpus.csv",
+        "key": ["id"],
+        "types": {"id": "INTEGER"},
+    },
+    "cpu_mark_distributions": {
+        "family": "cpu",
+        "filename": "cpu_mark_distributions.csv",
+        "key": ["cpu_id", "cpu_mark"],
+        "types": {"cpu_id": "INTEGER", "cpu_mark": "INTEGER", "num_records": "INTEGER"},
+    },
+    "cpu_pricing_histories": {
+        "family": "cpu",
+        "filename": "cpu_pricing_histories.csv",
+        "key": ["cpu_id", "timestamp"],
+        "types": {"cpu_id": "INTEGER", "timestamp": "INTEGER", "price": "REAL"},
+    },
+    "gpus": {
+        "family": "gpu",
+        "filename": "gpus.csv",
+        "key": ["id"],
+        "types": {"id": "INTEGER"},
+    },
+    "g3d_mark_distributions": {
+        "family": "gpu",
+        "filename": "g3d_mark_distributions.csv",
+        "key": ["gpu_id", "g3d_mark"],
+        "types": {"gpu_id": "INTEGER", "g3d_mark": "INTEGER", "num_records": "INTEGER"},
+        "unique": False,
+    },
+    "gpu_pricing_histories": {
+        "family": "gpu",
+        "filename": "gpu_pricing_histories.csv",
+        "key": ["gpu_id", "timestamp"],
+        "types": {"gpu_id": "INTEGER", "timestamp": "INTEGER", "price": "REAL"},
+    },
+    "ram_modules": {
+        "family": "ram",
+        "filename": "ram_modules.csv",
+        "key": ["id"],
+        "types": {"id": "INTEGER"},
+    },
+    "ram_pricing_histories": {
+        "family": "ram",
+        "filename": "ram_pricing_histories.csv",
+        "key": ["ram_id", "timestamp"],
+        "types": {"ram_id": "INTEGER", "timestamp": "INTEGER", "price": "REAL"},
+    },
+    "drives": {
+        "family": "hdd_ssd",
+        "filename": "drives.csv",
+        "key": ["id"],
+        "types": {"id": "INTEGER"},
+    },
+    "drive_pricing_histories": {
+        "family": "hdd_ssd",
+        "filename": "drive_pricing_histories.csv",
+        "key": ["hdd_ssd_id", "timestamp"],
+        "types": {"hdd_ssd_id": "INTEGER", "timestamp": "INTEGER", "price": "REAL"},
+    },
+}
+
+# Device families and the tables that describe them
+FAMILIES = {
+    "cpu": {
+        "devices": "cpus",
+        "distributions": "cpu_mark_distributions",
+        "pricing_histories": "cpu_pricing_histories",
+        "id_column": "cpu_id",
+        "mark_column": "multi_thread_rating",
+        "distribution_mark_column": "cpu_mark",
+    },
+    "gpu": {
+        "devices": "gpus",
+        "distributions": "g3d_mark_distributions",
+        "pricing_histories": "gpu_pricing_histories",
+        "id_column": "gpu_id",
+        "mark_column": "g3d_mark",
+        "distribution_mark_column": "g3d_mark",
+    },
+    "ram": {
+        "devices": "ram_modules",
+        "distributions": None,
+        "pricing_histories": "ram_pricing_histories",
+        "id_column": "ram_id",
+        "mark_column": "mark",
+        "distribution_mark_column": None,
+    },
+    "hdd_ssd": {
+        "devices": "drives",
+        "distributions": None,
+        "pricing_histories": "drive_pricing_histories",
+        "id_column": "hdd_ssd_id",
+        "mark_column": "drive_rating",
+        "distribution_mark_column": None,
+    },
+}
+
+
+def raw_table_path(table):
+    spec = TABLES[table]
+    return os.path.join(RAW_DATA_DIR, spec["family"], spec["filename"])
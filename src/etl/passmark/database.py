@@ -0,0 +1,251 @@
+# standard library imports
+import argparse
+import csv
+import os
+import sqlite3
+
+# third party imports
+import pandas as pd
+
+# local imports
+from .constants import FAMILIES, PROCESSED_DATA_DIR, TABLES, raw_table_path
+
+DATABASE_PATH = os.path.join(PROCESSED_DATA_DIR, "passmark.sqlite")
+INSERT_BATCH_SIZE = 10_000
+
+
+def _create_table_sql(table, columns):
+    spec = TABLES[table]
+    column_defs = [
+        f"{column} {spec['types'].get(column, 'TEXT')}" for column in columns
+    ]
+    if spec["key"] == ["id"]:
+        column_defs[columns.index("id")] = "id INTEGER PRIMARY KEY"
+        return f"CREATE TABLE {table} ({', '.join(column_defs)})"
+    if spec.get("unique", True):
+        # Clustered on the key, so per-device range scans read contiguous pages
+        column_defs.append(f"PRIMARY KEY ({', '.join(spec['key'])})")
+        return f"CREATE TABLE {table} ({', '.join(column_defs)}) WITHOUT ROWID"
+    return f"CREATE TABLE {table} ({', '.join(column_defs)})"
+
+
+def _create_index_sql(table):
+    spec = TABLES[table]
+    if spec["key"] == ["id"] or spec.get("unique", True):
+        return []
+    return [
+        f"CREATE INDEX idx_{table}_key ON {table} ({', '.join(spec['key'])})",
+    ]
+
+
+def _create_views_sql():
+    statements = []
+    for family, spec in FAMILIES.items():
+        devices = spec["devices"]
+        pricing = spec["pricing_histories"]
+        id_column = spec["id_column"]
+
+        statements.append(f"""
+            CREATE VIEW {family}_price_summary AS
+            SELECT
+                p.{id_column} AS {id_column},
+                COUNT(*) AS num_prices,
+                MIN(p.price) AS min_price,
+                MAX(p.price) AS max_price,
+                MIN(p.timestamp) AS first_timestamp,
+                MAX(p.timestamp) AS last_timestamp,
+                (
+                    SELECT l.price FROM {pricing} l
+                    WHERE l.{id_column} = p.{id_column}
+                    ORDER BY l.timestamp DESC LIMIT 1
+                ) AS latest_price
+            FROM {pricing} p
+            GROUP BY p.{id_column}
+            """)
+
+        distribution_columns = ""
+        if spec["distributions"]:
+            distributions = spec["distributions"]
+            mark = spec["distribution_mark_column"]
+            statements.append(f"""
+                CREATE VIEW {family}_distribution_summary AS
+                SELECT
+                    {id_column},
+                    SUM(num_records) AS num_records,
+                    MIN({mark}) AS min_mark,
+                    MAX({mark}) AS max_mark,
+                    CAST(SUM({mark} * num_records) AS REAL)
+                        / NULLIF(SUM(num_records), 0) AS mean_mark
+                FROM {distributions}
+                GROUP BY {id_column}
+                """)
+            distribution_columns = f""",
+                (
+                    SELECT SUM(num_records) FROM {distributions} ds
+                    WHERE ds.{id_column} = d.id
+                ) AS distribution_num_records,
+                (
+                    SELECT CAST(SUM({mark} * num_records) AS REAL)
+                        / NULLIF(SUM(num_records), 0)
+                    FROM {distributions} ds
+                    WHERE ds.{id_column} = d.id
+                ) AS distribution_mean_mark"""
+
+        # Correlated subqueries rather than joins against the summary views, so
+        # a filtered overview only touches the matching devices' index ranges
+        statements.append(f"""
+            CREATE VIEW {family}_overview AS
+            SELECT
+                d.*,
+                (
+                    SELECT p.price FROM {pricing} p
+                    WHERE p.{id_column} = d.id
+                    ORDER BY p.timestamp DESC LIMIT 1
+                ) AS latest_price,
+                (
+                    SELECT MIN(p.price) FROM {pricing} p
+                    WHERE p.{id_column} = d.id
+                ) AS min_price,
+                (
+                    SELECT COUNT(*) FROM {pricing} p
+                    WHERE p.{id_column} = d.id
+                ) AS num_prices{distribution_columns}
+            FROM {devices} d
+            """)
+    return statements
+
+
+def _insert_csv(connection, table, path):
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        columns = next(reader)
+        connection.execute(_create_table_sql(table, columns))
+
+        placeholders = ", ".join("?" for _ in columns)
+        insert_sql = f"INSERT INTO {table} VALUES ({placeholders})"
+        batch = []
+        for row in reader:
+            # Empty CSV cells are missing values, not empty strings
+            batch.append([value if value != "" else None for value in row])
+            if len(batch) >= INSERT_BATCH_SIZE:
+                connection.executemany(insert_sql, batch)
+                batch = []
+        if batch:
+            connection.executemany(insert_sql, batch)
+
+
+def build_database(path=DATABASE_PATH):
+    # Build into a temporary file and swap it in, so readers never see a
+    # half-loaded database
+    tmp_path = path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    connection = sqlite3.connect(tmp_path)
+    try:
+        connection.execute("PRAGMA journal_mode = OFF")
+        connection.execute("PRAGMA synchronous = OFF")
+        with connection:
+            for table in TABLES:
+                _insert_csv(connection, table, raw_table_path(table))
+                for statement in _create_index_sql(table):
+                    connection.execute(statement)
+            connection.execute("CREATE INDEX idx_cpus_cpu_class ON cpus (cpu_class)")
+            connection.execute("CREATE INDEX idx_cpus_socket ON cpus (socket)")
+            connection.execute("CREATE INDEX idx_gpus_category ON gpus (category)")
+            connection.execute(
+                "CREATE INDEX idx_ram_modules_generation ON ram_modules (generation)"
+            )
+            for statement in _create_views_sql():
+                connection.execute(statement)
+        connection.execute("ANALYZE")
+    finally:
+        connection.close()
+
+    os.replace(tmp_path, path)
+    return path
+
+
+class PassMarkDatabase:
+    def __init__(self, path=DATABASE_PATH):
+        if not os.path.exists(path):
+            raise FileNotFoundError(
+                f"{path} does not exist, build it with build_database() first"
+            )
+        self.connection = sqlite3.connect(
+            f"file:{os.path.abspath(path)}?mode=ro", uri=True
+        )
+        self.connection.row_factory = sqlite3.Row
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def query(self, sql, params=()):
+        return [dict(row) for row in self.connection.execute(sql, params)]
+
+    def query_df(self, sql, params=()):
+        return pd.read_sql_query(sql, self.connection, params=params)
+
+    def device(self, family, device_id):
+        rows = self.query(
+            f"SELECT * FROM {FAMILIES[family]['devices']} WHERE id = ?", (device_id,)
+        )
+        return rows[0] if rows else None
+
+    def find_devices(self, family, name, limit=20):
+        return self.query(
+            f"SELECT * FROM {FAMILIES[family]['devices']} "
+            "WHERE name LIKE ? ORDER BY id LIMIT ?",
+            (f"%{name}%", limit),
+        )
+
+    def price_history(self, family, device_id, start=None, end=None):
+        spec = FAMILIES[family]
+        sql = (
+            f"SELECT timestamp, price FROM {spec['pricing_histories']} "
+            f"WHERE {spec['id_column']} = ?"
+        )
+        params = [device_id]
+        if start is not None:
+            sql += " AND timestamp >= ?"
+            params.append(start)
+        if end is not None:
+            sql += " AND timestamp <= ?"
+            params.append(end)
+        return self.query_df(sql + " ORDER BY timestamp", params)
+
+    def mark_distribution(self, family, device_id):
+        spec = FAMILIES[family]
+        if spec["distributions"] is None:
+            raise ValueError(f"No mark distributions are scraped for {family}")
+        mark = spec["distribution_mark_column"]
+        return self.query_df(
+            f"SELECT {mark}, num_records FROM {spec['distributions']} "
+            f"WHERE {spec['id_column']} = ? ORDER BY {mark}",
+            (device_id,),
+        )
+
+    def overview(self, family, where=None, params=(), limit=None):
+        sql = f"SELECT * FROM {family}_overview"
+        if where:
+            sql += f" WHERE {where}"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        return self.query_df(sql, params)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the PassMark SQLite database")
+    parser.add_argument("--output", default=DATABASE_PATH, help="database file")
+    args = parser.parse_args()
+    print(f"Wrote {build_database(args.output)}")
+
+
+if __name__ == "__main__":
+    main()
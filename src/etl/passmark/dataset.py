@@ -0,0 +1,335 @@
+# standard library imports
+import argparse
+import os
+import sqlite3
+
+# third party imports
+import pandas as pd
+
+# local imports
+from .constants import FAMILIES, RAW_DATA_DIR, TABLES
+from .parsing import parse_number, parse_numbers
+
+# Files a table may have been written to by the scraper's sinks, in order of
+# preference: Parquet (a file, or a directory of hive-partitioned files) reads
+# only the requested columns and the row groups whose statistics can match,
+# SQLite filters in the query, CSV and JSON lines are filtered chunk by chunk
+SOURCES = [
+    ("parquet", ".parquet"),
+    ("sqlite", None),
+    *[("csv", ".csv" + suffix) for suffix in ("", ".gz", ".bz2", ".xz")],
+    *[("jsonl", ".jsonl" + suffix) for suffix in ("", ".gz", ".bz2", ".xz")],
+]
+BATCH_ROWS = 100_000
+OPERATORS = ["==", "!=", "<", "<=", ">", ">=", "in", "not in"]
+DTYPES = {"INTEGER": "Int64", "REAL": "float64"}
+
+
+class Dataset:
+    """Lazy query over one scraped table.
+
+    Nothing is read until the dataset is materialized with to_pandas(),
+    head() or iter_batches(); select() and where() return narrowed copies.
+    Conditions are (column, operator, value) tuples that must all hold, as in
+    the `filters` of pyarrow.parquet. Columns listed in the table's types come
+    back as nullable integers or floats whatever the file format, every other
+    column as text, with "" where a value is missing; missing values match no
+    condition but "in". A condition with a numeric value on a text column compares
+    the number in the text, as parsing.parse_number reads it ("20,811
+    MOps/Sec" is 20811), in every format.
+    """
+
+    def __init__(self, table, columns=None, where=None, data_dir=RAW_DATA_DIR):
+        if table not in TABLES:
+            raise KeyError(f"Unknown table {table!r}")
+        self.table = table
+        self.columns = list(columns) if columns is not None else None
+        self.conditions = _conditions(where)
+        self.data_dir = data_dir
+
+    def select(self, *columns):
+        return Dataset(self.table, columns, self.conditions, self.data_dir)
+
+    def where(self, *conditions):
+        return Dataset(
+            self.table,
+            self.columns,
+            self.conditions + _conditions(list(conditions)),
+            self.data_dir,
+        )
+
+    def source(self):
+        # (format, path) of the first output of the table found on disk
+        family = TABLES[self.table]["family"]
+        directory = os.path.join(self.data_dir, family)
+        for source_format, extension in SOURCES:
+            if extension is None:
+                path = os.path.join(directory, f"{family}.sqlite")
+                if os.path.exists(path) and _sqlite_has_table(path, self.table):
+                    return source_format, path
+                continue
+            path = os.path.join(directory, self.table + extension)
+            if os.path.exists(path):
+                return source_format, path
+        raise FileNotFoundError(f"No output of {self.table} in {directory}")
+
+    def iter_batches(self, batch_rows=BATCH_ROWS):
+        source_format, path = self.source()
+        batches = getattr(self, f"_{source_format}_batches")(path, batch_rows)
+        for batch in batches:
+            if len(batch):
+                yield self._cast(batch)
+
+    def to_pandas(self):
+        batches = list(self.iter_batches())
+        if not batches:
+            return self._empty()
+        return pd.concat(batches, ignore_index=True)
+
+    def head(self, n=5):
+        # Stops reading as soon as n matching rows have been found
+        batches = []
+        remaining = n
+        for batch in self.iter_batches(min(BATCH_ROWS, max(n, 1000))):
+            batches.append(batch.iloc[:remaining])
+            remaining -= len(batches[-1])
+            if remaining <= 0:
+                break
+        if not batches:
+            return self._empty()
+        return pd.concat(batches, ignore_index=True)
+
+    def _empty(self):
+        return self._cast(pd.DataFrame(columns=self.columns or []))
+
+    def _output_columns(self, available):
+        needed = self._needed() if self.columns is not None else []
+        missing = [column for column in needed if column not in available]
+        if missing:
+            raise KeyError(f"{self.table} has no columns {missing}")
+        return self.columns if self.columns is not None else list(available)
+
+    def _needed(self):
+        # Requested columns plus those only used in conditions
+        needed = list(self.columns if self.columns is not None else [])
+        for column, _, _ in self.conditions:
+            if column not in needed:
+                needed.append(column)
+        return needed
+
+    def _cast(self, df):
+        # Missing text is "" in every format, as the CSV sink writes it
+        types = TABLES[self.table]["types"]
+        dtypes = {
+            column: DTYPES.get(types.get(column), "object") for column in df.columns
+        }
+        text = {column: "" for column, dtype in dtypes.items() if dtype == "object"}
+        return df.astype(dtypes).fillna(text).astype({column: "str" for column in text})
+
+    def _parquet_batches(self, path, batch_rows):
+        import pyarrow.dataset as ds
+        import pyarrow.parquet as pq
+
+        dataset = ds.dataset(
+            path,
+            format="parquet",
+            partitioning="hive" if os.path.isdir(path) else None,
+        )
+        columns = self._output_columns(dataset.schema.names)
+        # Numbers in text columns cannot be compared in the scan; those
+        # conditions are applied to each batch instead
+        pushed = [c for c in self.conditions if not self._parses_numbers(c)]
+        residual = [c for c in self.conditions if self._parses_numbers(c)]
+        expression = pq.filters_to_expression(pushed) if pushed else None
+        for column, operator, _ in pushed:
+            # Arrow's "not in" keeps nulls, which match no condition here
+            if operator == "not in":
+                expression &= ds.field(column).is_valid()
+        scanner = dataset.scanner(
+            columns=columns
+            + [column for column, _, _ in residual if column not in columns],
+            filter=expression,
+            batch_size=batch_rows,
+        )
+        for batch in scanner.to_batches():
+            df = batch.to_pandas()
+            if residual:
+                df = df.loc[self._mask(df, residual), columns]
+            yield df
+
+    def _sqlite_batches(self, path, batch_rows):
+        connection = sqlite3.connect(path)
+        connection.create_function(
+            "passmark_number", 1, parse_number, deterministic=True
+        )
+        try:
+            available = [
+                row[1] for row in connection.execute(f"PRAGMA table_info({self.table})")
+            ]
+            columns = self._output_columns(available)
+            clauses = []
+            params = []
+            for condition in self.conditions:
+                column, operator, value = condition
+                if self._parses_numbers(condition):
+                    column = f"passmark_number({column})"
+                if operator in ("in", "not in"):
+                    placeholders = ", ".join("?" for _ in value)
+                    clauses.append(f"{column} {operator.upper()} ({placeholders})")
+                    params.extend(value)
+                else:
+                    clauses.append(f"{column} {operator} ?")
+                    params.append(value)
+            query = f"SELECT {', '.join(columns)} FROM {self.table}"
+            if clauses:
+                query += " WHERE " + " AND ".join(clauses)
+            yield from pd.read_sql_query(
+                query, connection, params=params, chunksize=batch_rows
+            )
+        finally:
+            connection.close()
+
+    def _csv_batches(self, path, batch_rows):
+        available = pd.read_csv(path, nrows=0).columns
+        columns = self._output_columns(available)
+        needed = self._needed() if self.columns is not None else columns
+        types = TABLES[self.table]["types"]
+        dtype = {column: DTYPES.get(types.get(column), "str") for column in needed}
+        # Text such as "NA" is kept as is; only empty numbers are missing
+        chunks = pd.read_csv(
+            path,
+            usecols=needed,
+            dtype=dtype,
+            keep_default_na=False,
+            na_values={column: [""] for column in needed if types.get(column)},
+            chunksize=batch_rows,
+        )
+        for chunk in chunks:
+            yield chunk.loc[self._mask(chunk), columns]
+
+    def _jsonl_batches(self, path, batch_rows):
+        # JSON lines have no column projection: each chunk is parsed whole and
+        # narrowed right away
+        chunks = pd.read_json(path, lines=True, dtype=False, chunksize=batch_rows)
+        for chunk in chunks:
+            columns = self._output_columns(chunk.columns)
+            chunk = self._cast(chunk)
+            yield chunk.loc[self._mask(chunk), columns]
+
+    def _parses_numbers(self, condition):
+        # A numeric value compared with a text column
+        column, operator, value = condition
+        values = value if operator in ("in", "not in") else [value]
+        return (
+            TABLES[self.table]["types"].get(column) not in DTYPES
+            and bool(values)
+            and all(
+                isinstance(v, (int, float)) and not isinstance(v, bool) for v in values
+            )
+        )
+
+    def _mask(self, df, conditions=None):
+        mask = pd.Series(True, index=df.index)
+        for condition in self.conditions if conditions is None else conditions:
+            column, operator, value = condition
+            series = df[column]
+            # Missing values match no condition but "in", as in SQL and Arrow
+            present = series.notna()
+            if TABLES[self.table]["types"].get(column) not in DTYPES:
+                present &= series != ""
+            if self._parses_numbers(condition):
+                series = parse_numbers(series)
+            if operator == "in":
+                matches = series.isin(value)
+            elif operator == "not in":
+                matches = ~series.isin(value) & present
+            else:
+                matches = getattr(series, _PANDAS_OPERATORS[operator])(value) & present
+            mask &= matches.fillna(False).astype(bool)
+        return mask
+
+
+_PANDAS_OPERATORS = {
+    "==": "eq",
+    "!=": "ne",
+    "<": "lt",
+    "<=": "le",
+    ">": "gt",
+    ">=": "ge",
+}
+
+
+def _conditions(where):
+    if where is None:
+        return []
+    if isinstance(where, tuple):
+        where = [where]
+    conditions = []
+    for column, operator, value in where:
+        if operator not in OPERATORS:
+            raise ValueError(
+                f"Unsupported operator {operator!r}, expected one of {OPERATORS}"
+            )
+        if operator in ("in", "not in"):
+            value = list(value)
+        conditions.append((column, operator, value))
+    return conditions
+
+
+def _sqlite_has_table(path, table):
+    connection = sqlite3.connect(path)
+    try:
+        return (
+            connection.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                (table,),
+            ).fetchone()
+            is not None
+        )
+    finally:
+        connection.close()
+
+
+def load(name, columns=None, where=None, data_dir=RAW_DATA_DIR):
+    # name is a table or a family, which stands for its devices table:
+    #
+    #     load("cpu", ["id", "name", "multi_thread_rating"],
+    #          where=("cpu_class", "==", "Desktop")).to_pandas()
+    table = FAMILIES[name]["devices"] if name in FAMILIES else name
+    return Dataset(table, columns, where, data_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query a scraped table")
+    parser.add_argument("name", help="table, or family for its devices table")
+    parser.add_argument("--columns", nargs="+")
+    parser.add_argument(
+        "--where",
+        nargs=3,
+        action="append",
+        metavar=("COLUMN", "OPERATOR", "VALUE"),
+        help="condition on a column; numeric values compare as numbers",
+    )
+    parser.add_argument("--head", type=int, default=10)
+    parser.add_argument("--data-dir", default=RAW_DATA_DIR)
+    args = parser.parse_args()
+
+    where = [
+        (column, operator, _parse_value(value))
+        for column, operator, value in args.where or []
+    ]
+    dataset = load(args.name, args.columns, where, args.data_dir)
+    print(dataset.head(args.head).to_string(index=False))
+
+
+def _parse_value(value):
+    for parse in (int, float):
+        try:
+            return parse(value)
+        except ValueError:
+            pass
+    return value
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+# standard library imports
+import argparse
+import os
+
+# third party imports
+import numpy as np
+import pandas as pd
+
+# local imports
+from .constants import FAMILIES, PROCESSED_DATA_DIR, raw_table_path
+from .parsing import parse_numbers, parse_prices
+
+HASH_COLUMN = "source_hash"
+
+# Source columns of the derived metrics of each family. "marks" start with the
+# family's headline mark; "cores" lists fallbacks in order (hybrid CPUs only
+# fill in total_cores). Percentile ranks are computed within the first class
+# listed in "class", e.g. "Desktop" for "Desktop, Laptop"
+DERIVED_METRICS = {
+    "cpu": {
+        "marks": ["multi_thread_rating", "single_thread_rating"],
+        "cores": ["cores", "total_cores"],
+        "threads": "threads",
+        "watts": "typical_tdp",
+        "class": "cpu_class",
+    },
+    "gpu": {
+        "marks": ["g3d_mark", "g2d_mark"],
+        "cores": [],
+        "threads": None,
+        "watts": "max_tdp",
+        "class": "category",
+    },
+    "ram": {
+        "marks": ["mark"],
+        "cores": [],
+        "threads": None,
+        "watts": None,
+        "class": "generation",
+    },
+    "hdd_ssd": {
+        "marks": ["drive_rating"],
+        "cores": [],
+        "threads": None,
+        "watts": None,
+        "class": None,
+    },
+}
+
+
+def derived_metrics_path(family, output_dir=PROCESSED_DATA_DIR):
+    return os.path.join(output_dir, f"{family}_derived_metrics.csv")
+
+
+def _source_columns(family):
+    spec = DERIVED_METRICS[family]
+    columns = ["id", "name", *spec["marks"], *spec["cores"], "last_price_change"]
+    for column in (spec["threads"], spec["watts"], spec["class"]):
+        if column is not None:
+            columns.append(column)
+    return columns
+
+
+def load_sources(family):
+    # One row per device with the source columns as text, plus the latest
+    # and lowest price of its pricing history
+    family_spec = FAMILIES[family]
+    devices = pd.read_csv(
+        raw_table_path(family_spec["devices"]),
+        usecols=_source_columns(family),
+        dtype=str,
+    )
+    devices["id"] = devices["id"].astype(np.int64)
+
+    id_column = family_spec["id_column"]
+    prices = pd.read_csv(
+        raw_table_path(family_spec["pricing_histories"]),
+        usecols=[id_column, "timestamp", "price"],
+    ).sort_values([id_column, "timestamp"], kind="stable")
+    # A price of 0 marks a listing without a price
+    prices = prices[prices["price"] > 0]
+    history = prices.groupby(id_column)["price"].agg(["last", "min"])
+    history.columns = ["history_latest_price", "history_min_price"]
+    devices = devices.merge(
+        history, how="left", left_on="id", right_index=True, validate="1:1"
+    )
+    return devices[_source_columns(family) + list(history.columns)]
+
+
+def source_hashes(sources):
+    # Stable per-row hash of everything a device's metrics are derived from
+    return pd.util.hash_pandas_object(sources, index=False).to_numpy().view(np.int64)
+
+
+def _ratio(numerator, denominator):
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(denominator > 0, numerator / denominator, np.nan)
+
+
+def compute_metrics(family, sources):
+    # Typed metrics of the given source rows, in one vectorized pass
+    spec = DERIVED_METRICS[family]
+    metrics = pd.DataFrame({"id": sources["id"], "name": sources["name"]})
+    if spec["class"] is not None:
+        metrics["class"] = sources[spec["class"]]
+
+    for mark in spec["marks"]:
+        metrics[mark] = parse_numbers(sources[mark])
+    if spec["cores"]:
+        cores = parse_numbers(sources[spec["cores"][0]])
+        for column in spec["cores"][1:]:
+            cores = cores.fillna(parse_numbers(sources[column]))
+        metrics["cores"] = cores.astype("Int64")
+    if spec["threads"] is not None:
+        metrics["threads"] = parse_numbers(sources[spec["threads"]]).astype("Int64")
+    if spec["watts"] is not None:
+        metrics["watts"] = parse_numbers(sources[spec["watts"]])
+
+    latest_price = parse_prices(sources["last_price_change"])
+    latest_price = latest_price.fillna(sources["history_latest_price"])
+    metrics["latest_price"] = latest_price
+    metrics["min_price"] = np.fmin(sources["history_min_price"], latest_price)
+
+    headline = metrics[spec["marks"][0]].to_numpy(dtype=np.float64)
+    if "cores" in metrics:
+        cores = metrics["cores"].to_numpy(dtype=np.float64, na_value=np.nan)
+        metrics[f"{spec['marks'][0]}_per_core"] = _ratio(headline, cores)
+    if "threads" in metrics:
+        threads = metrics["threads"].to_numpy(dtype=np.float64, na_value=np.nan)
+        metrics[f"{spec['marks'][0]}_per_thread"] = _ratio(headline, threads)
+    if "watts" in metrics:
+        watts = metrics["watts"].to_numpy(dtype=np.float64)
+        metrics[f"{spec['marks'][0]}_per_watt"] = _ratio(headline, watts)
+    for mark in spec["marks"]:
+        values = metrics[mark].to_numpy(dtype=np.float64)
+        metrics[f"{mark}_per_dollar"] = _ratio(
+            values, metrics["latest_price"].to_numpy()
+        )
+        metrics[f"{mark}_per_dollar_min"] = _ratio(
+            values, metrics["min_price"].to_numpy()
+        )
+    return metrics
+
+
+def rank_metrics(family, metrics):
+    # Percentile rank (0-100] of the headline mark and of its ratios within the
+    # device's class; devices without a value get no rank
+    spec = DERIVED_METRICS[family]
+    headline = spec["marks"][0]
+    if spec["class"] is None:
+        groups = pd.Series("", index=metrics.index)
+    else:
+        groups = metrics["class"].str.split(",", n=1).str[0].str.strip()
+    columns = [
+        column
+        for column in metrics.columns
+        if column == headline or column.startswith(f"{headline}_per_")
+    ]
+    ranks = metrics.groupby(groups, dropna=False)[columns].rank(pct=True) * 100
+    for column in columns:
+        metrics[f"{column}_class_percentile"] = ranks[column]
+    return metrics
+
+
+def build_derived_metrics(family, output_dir=PROCESSED_DATA_DIR, full=False):
+    # Refreshes <family>_derived_metrics.csv. Unless `full`, only devices whose
+    # source rows or price history changed since the last build are parsed
+    # again; the class percentiles always cover the whole table
+    path = derived_metrics_path(family, output_dir)
+    sources = load_sources(family)
+    hashes = source_hashes(sources)
+
+    previous = None
+    if not full and os.path.exists(path):
+        previous = pd.read_csv(path)
+    if previous is not None:
+        base_columns = [
+            column
+            for column in previous.columns
+            if not column.endswith("_class_percentile")
+        ]
+        expected = compute_metrics(family, sources.iloc[:0]).columns
+        if list(base_columns[:-1]) != list(expected):
+            previous = None
+
+    if previous is None:
+        metrics = compute_metrics(family, sources)
+        metrics[HASH_COLUMN] = hashes
+        num_computed = len(metrics)
+    else:
+        current = pd.MultiIndex.from_arrays([sources["id"].to_numpy(), hashes])
+        known = pd.MultiIndex.from_frame(previous[["id", HASH_COLUMN]])
+        stale = ~current.isin(known)
+        reused = previous.loc[known.isin(current), base_columns]
+        changed = compute_metrics(family, sources[stale])
+        changed[HASH_COLUMN] = hashes[stale]
+        metrics = pd.concat([reused, changed], ignore_index=True)
+        metrics = metrics.astype(changed.dtypes.to_dict())
+        num_computed = len(changed)
+
+    metrics = metrics.sort_values("id", ignore_index=True)
+    metrics = rank_metrics(family, metrics)
+    columns = [column for column in metrics.columns if column != HASH_COLUMN]
+    metrics = metrics[columns + [HASH_COLUMN]]
+
+    os.makedirs(output_dir, exist_ok=True)
+    tmp_path = path + ".tmp"
+    metrics.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, path)
+    return path, len(metrics), num_computed
+
+
+def load_derived_metrics(family, output_dir=PROCESSED_DATA_DIR):
+    metrics = pd.read_csv(derived_metrics_path(family, output_dir))
+    for column in ("cores", "threads"):
+        if column in metrics:
+            metrics[column] = metrics[column].astype("Int64")
+    return metrics.drop(columns=HASH_COLUMN)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-core/watt/dollar metrics")
+    parser.add_argument("--family", action="append", choices=list(DERIVED_METRICS))
+    parser.add_argument("--full", action="store_true", help="recompute every row")
+    args = parser.parse_args()
+    for family in args.family or DERIVED_METRICS:
+        path, num_rows, num_computed = build_derived_metrics(family, full=args.full)
+        print(f"Wrote {path} ({num_computed} of {num_rows} rows recomputed)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+# standard library imports
+import argparse
+import os
+
+# third party imports
+import numpy as np
+import pandas as pd
+
+# local imports
+from .constants import FAMILIES, PROCESSED_DATA_DIR, raw_table_path
+
+DEFAULT_PERCENTILES = (5, 25, 50, 75, 95)
+
+
+class Histograms:
+    """Binned mark distributions of many devices as padded 2D arrays.
+
+    Row i holds the bins of device `ids[i]` in ascending mark order; rows
+    shorter than the longest one are padded with zero-count bins that repeat
+    the row's last mark, so every row stays sorted.
+    """
+
+    def __init__(self, ids, marks, counts):
+        self.ids = ids
+        self.marks = marks
+        self.counts = counts
+        self.row_of = {device_id: row for row, device_id in enumerate(ids.tolist())}
+
+        totals = counts.sum(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            self.probabilities = counts / totals[:, None]
+        self.totals = totals
+
+    @classmethod
+    def from_frame(cls, df, id_column, mark_column):
+        device_ids = df[id_column].to_numpy(dtype=np.int64)
+        marks = df[mark_column].to_numpy(dtype=np.int64)
+        counts = df["num_records"].to_numpy(dtype=np.int64)
+        order = np.lexsort((marks, device_ids))
+        device_ids, marks, counts = device_ids[order], marks[order], counts[order]
+
+        ids, starts, lengths = np.unique(
+            device_ids, return_index=True, return_counts=True
+        )
+        rows = np.repeat(np.arange(len(ids)), lengths)
+        columns = np.arange(len(device_ids)) - np.repeat(starts, lengths)
+
+        width = lengths.max() if len(ids) else 0
+        last_marks = marks[starts + lengths - 1] if len(ids) else marks
+        padded_marks = np.repeat(last_marks[:, None], width, axis=1)
+        padded_counts = np.zeros((len(ids), width), dtype=np.int64)
+        padded_marks[rows, columns] = marks
+        padded_counts[rows, columns] = counts
+        return cls(ids, padded_marks, padded_counts)
+
+    @classmethod
+    def load(cls, family):
+        spec = FAMILIES[family]
+        if spec["distributions"] is None:
+            raise ValueError(f"No mark distributions are scraped for {family}")
+        df = pd.read_csv(raw_table_path(spec["distributions"]))
+        return cls.from_frame(df, spec["id_column"], spec["distribution_mark_column"])
+
+    def rows(self, device_ids):
+        return np.array([self.row_of[device_id] for device_id in device_ids])
+
+    def moments(self):
+        p, x = self.probabilities, self.marks.astype(np.float64)
+        mean = (p * x).sum(axis=1)
+        centered = x - mean[:, None]
+        variance = (p * centered**2).sum(axis=1)
+        std = np.sqrt(variance)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            skew = (p * centered**3).sum(axis=1) / std**3
+        return mean, variance, std, skew
+
+    def percentiles(self, percentiles=DEFAULT_PERCENTILES):
+        # Smallest bin whose cumulative share reaches each percentile, for all
+        # devices at once: (num_percentiles, num_devices)
+        cdf = np.cumsum(self.probabilities, axis=1)
+        q = np.asarray(percentiles, dtype=np.float64)[:, None, None] / 100
+        positions = (cdf[None, :, :] < q - 1e-12).sum(axis=2)
+        positions = np.minimum(positions, self.marks.shape[1] - 1)
+        values = np.take_along_axis(self.marks[None, :, :], positions[:, :, None], 2)
+        values = values[:, :, 0].astype(np.float64)
+        values[:, self.totals == 0] = np.nan
+        return values
+
+    def mode(self):
+        mode = self.marks[np.arange(len(self.ids)), self.counts.argmax(axis=1)]
+        return np.where(self.totals > 0, mode, np.nan)
+
+    def summary(self, percentiles=DEFAULT_PERCENTILES):
+        mean, variance, std, skew = self.moments()
+        values = self.percentiles(percentiles)
+        summary = pd.DataFrame(
+            {
+                "id": self.ids,
+                "num_records": self.totals,
+                "mean": mean,
+                "variance": variance,
+                "std": std,
+                "skew": skew,
+                "mode": self.mode(),
+            }
+        )
+        for percentile, column in zip(percentiles, values):
+            summary[f"p{percentile}"] = column
+        if 25 in percentiles and 75 in percentiles:
+            summary["iqr"] = summary["p75"] - summary["p25"]
+        return summary
+
+    def prob_outscores(self, a_ids, b_ids, chunk_size=100_000):
+        # P(A > B) + P(A == B) / 2 for paired device ids, i.e. the chance that a
+        # random submission of A beats a random submission of B
+        a_rows, b_rows = self.rows(a_ids), self.rows(b_ids)
+        result = np.empty(len(a_rows), dtype=np.float64)
+        for start in range(0, len(a_rows), chunk_size):
+            stop = start + chunk_size
+            result[start:stop] = self._prob_outscores_rows(
+                a_rows[start:stop], b_rows[start:stop]
+            )
+        return result
+
+    def _prob_outscores_rows(self, a_rows, b_rows):
+        num_pairs, width = len(a_rows), self.marks.shape[1]
+        a_marks, a_probs = self.marks[a_rows], self.probabilities[a_rows]
+        b_marks = self.marks[b_rows]
+        b_cdf = np.zeros((num_pairs, width + 1))
+        np.cumsum(self.probabilities[b_rows], axis=1, out=b_cdf[:, 1:])
+
+        # Offset each pair's marks into its own range so a single searchsorted
+        # over the flattened B bins locates A's bins within the matching row
+        low = min(a_marks.min(), b_marks.min())
+        span = max(a_marks.max(), b_marks.max()) - low + 1
+        offsets = (np.arange(num_pairs, dtype=np.int64) * span)[:, None]
+        b_keys = (b_marks - low + offsets).ravel()
+        a_keys = (a_marks - low + offsets).ravel()
+        row_starts = np.repeat(np.arange(num_pairs) * width, width)
+
+        below = np.searchsorted(b_keys, a_keys, side="left") - row_starts
+        at_or_below = np.searchsorted(b_keys, a_keys, side="right") - row_starts
+        pair_rows = np.repeat(np.arange(num_pairs), width)
+        b_less = b_cdf[pair_rows, below].reshape(num_pairs, width)
+        b_less_equal = b_cdf[pair_rows, at_or_below].reshape(num_pairs, width)
+        return (a_probs * (b_less + b_less_equal) / 2).sum(axis=1)
+
+    def prob_outscores_matrix(self, a_ids=None, b_ids=None):
+        # Dense (len(a_ids), len(b_ids)) matrix of P(A > B) + P(A == B) / 2,
+        # computed as one matrix product over a shared grid of marks
+        a_rows = np.arange(len(self.ids)) if a_ids is None else self.rows(a_ids)
+        b_rows = np.arange(len(self.ids)) if b_ids is None else self.rows(b_ids)
+        grid = np.unique(np.concatenate([self.marks[a_rows], self.marks[b_rows]]))
+
+        def on_grid(rows):
+            dense = np.zeros((len(rows), len(grid)), dtype=np.float32)
+            positions = np.searchsorted(grid, self.marks[rows])
+            np.add.at(
+                dense,
+                (
+                    np.repeat(np.arange(len(rows)), positions.shape[1]),
+                    positions.ravel(),
+                ),
+                np.nan_to_num(self.probabilities[rows]).ravel(),
+            )
+            return dense
+
+        a_dense, b_dense = on_grid(a_rows), on_grid(b_rows)
+        b_below_half = np.cumsum(b_dense, axis=1) - b_dense / 2
+        return a_dense @ b_below_half.T
+
+
+def build_distribution_stats(families=("cpu", "gpu"), output_dir=PROCESSED_DATA_DIR):
+    paths = []
+    for family in families:
+        summary = Histograms.load(family).summary()
+        path = os.path.join(output_dir, f"{family}_distribution_stats.csv")
+        summary.to_csv(path, index=False)
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Statistics of mark distributions")
+    parser.add_argument("--family", action="append", choices=["cpu", "gpu"])
+    args = parser.parse_args()
+    for path in build_distribution_stats(tuple(args.family or ("cpu", "gpu"))):
+        print(f"Wrote {path}")
+
+
+if __name__ == "__main__":
+    main()
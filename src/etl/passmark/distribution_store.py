@@ -0,0 +1,192 @@
+# standard library imports
+import argparse
+import os
+import time
+
+# third party imports
+import numpy as np
+import pandas as pd
+
+# local imports
+from .constants import FAMILIES, PROCESSED_DATA_DIR, raw_table_path
+
+
+def compact_path(family):
+    return os.path.join(PROCESSED_DATA_DIR, f"{FAMILIES[family]['distributions']}.npz")
+
+
+def _smallest_uint(values):
+    return np.min_scalar_type(int(values.max()) if len(values) else 0)
+
+
+class CompactDistributions:
+    """Mark distributions stored as start, bin width and sparse counts.
+
+    Evenly spaced devices (all but a handful) keep only their first mark, bin
+    width and number of bins; the rest keep their marks verbatim. Counts keep
+    only the non-zero bins as (bin position, count) pairs, so the long runs of
+    empty bins cost nothing.
+    """
+
+    def __init__(self, arrays, id_column, mark_column):
+        self.id_column = id_column
+        self.mark_column = mark_column
+        self.ids = arrays["ids"]
+        self.starts = arrays["starts"]
+        self.widths = arrays["widths"]
+        self.num_bins = arrays["num_bins"]
+        self.explicit_offsets = arrays["explicit_offsets"]
+        self.explicit_marks = arrays["explicit_marks"]
+        self.nonzero_offsets = arrays["nonzero_offsets"]
+        self.nonzero_positions = arrays["nonzero_positions"]
+        self.nonzero_counts = arrays["nonzero_counts"]
+        self.row_of = {
+            device_id: row for row, device_id in enumerate(self.ids.tolist())
+        }
+
+    @classmethod
+    def from_frame(cls, df, id_column, mark_column):
+        device_ids = df[id_column].to_numpy(dtype=np.int64)
+        marks = df[mark_column].to_numpy(dtype=np.int64)
+        counts = df["num_records"].to_numpy(dtype=np.int64)
+        # Bins are runs of rows in (id, mark) order; the pipelines write them
+        # in that order, but flushed batches or edited files need not be
+        order = np.lexsort((marks, device_ids))
+        if (np.diff(order) != 1).any():
+            device_ids, marks, counts = device_ids[order], marks[order], counts[order]
+
+        ids, starts, num_bins = np.unique(
+            device_ids, return_index=True, return_counts=True
+        )
+        first_marks = marks[starts]
+        last_marks = marks[starts + num_bins - 1]
+        widths = np.where(
+            num_bins > 1, (last_marks - first_marks) // np.maximum(num_bins - 1, 1), 0
+        )
+
+        # Devices whose marks are not exactly start + i * width keep them as is
+        positions = np.arange(len(marks)) - np.repeat(starts, num_bins)
+        expected = np.repeat(first_marks, num_bins) + positions * np.repeat(
+            widths, num_bins
+        )
+        mismatched = np.zeros(len(ids), dtype=bool)
+        np.logical_or.at(
+            mismatched, np.repeat(np.arange(len(ids)), num_bins), marks != expected
+        )
+        irregular_rows = np.repeat(mismatched, num_bins)
+        explicit_lengths = np.where(mismatched, num_bins, 0)
+        widths = np.where(mismatched, 0, widths)
+
+        nonzero = counts != 0
+        nonzero_lengths = np.add.reduceat(nonzero, starts) if len(ids) else starts
+
+        arrays = {
+            "ids": ids.astype(_smallest_uint(ids)),
+            "starts": first_marks.astype(np.int32),
+            "widths": widths.astype(_smallest_uint(widths)),
+            "num_bins": num_bins.astype(_smallest_uint(num_bins)),
+            "explicit_offsets": np.concatenate([[0], np.cumsum(explicit_lengths)]),
+            "explicit_marks": marks[irregular_rows].astype(np.int32),
+            "nonzero_offsets": np.concatenate([[0], np.cumsum(nonzero_lengths)]),
+            "nonzero_positions": positions[nonzero].astype(_smallest_uint(positions)),
+            "nonzero_counts": counts[nonzero].astype(_smallest_uint(counts)),
+        }
+        return cls(arrays, id_column, mark_column)
+
+    @classmethod
+    def load(cls, family, path=None):
+        spec = FAMILIES[family]
+        with np.load(path or compact_path(family)) as npz:
+            arrays = {name: npz[name] for name in npz.files}
+        return cls(arrays, spec["id_column"], spec["distribution_mark_column"])
+
+    def save(self, path):
+        np.savez_compressed(
+            path,
+            ids=self.ids,
+            starts=self.starts,
+            widths=self.widths,
+            num_bins=self.num_bins,
+            explicit_offsets=self.explicit_offsets,
+            explicit_marks=self.explicit_marks,
+            nonzero_offsets=self.nonzero_offsets,
+            nonzero_positions=self.nonzero_positions,
+            nonzero_counts=self.nonzero_counts,
+        )
+
+    def dense(self, device_id):
+        # (marks, counts) of one device, zero bins included
+        row = self.row_of[device_id]
+        num_bins = int(self.num_bins[row])
+        explicit = slice(self.explicit_offsets[row], self.explicit_offsets[row + 1])
+        if explicit.stop > explicit.start:
+            marks = self.explicit_marks[explicit].astype(np.int64)
+        else:
+            marks = self.starts[row] + np.arange(num_bins, dtype=np.int64) * int(
+                self.widths[row]
+            )
+        counts = np.zeros(num_bins, dtype=np.int64)
+        nonzero = slice(self.nonzero_offsets[row], self.nonzero_offsets[row + 1])
+        counts[self.nonzero_positions[nonzero]] = self.nonzero_counts[nonzero]
+        return marks, counts
+
+    def to_frame(self):
+        # The dense long table, identical to the scraped CSV
+        num_bins = self.num_bins.astype(np.int64)
+        row_starts = np.concatenate([[0], np.cumsum(num_bins)[:-1]])
+        positions = np.arange(num_bins.sum()) - np.repeat(row_starts, num_bins)
+        marks = np.repeat(self.starts.astype(np.int64), num_bins) + positions * (
+            np.repeat(self.widths.astype(np.int64), num_bins)
+        )
+        irregular = np.diff(self.explicit_offsets) > 0
+        marks[np.repeat(irregular, num_bins)] = self.explicit_marks
+
+        counts = np.zeros(len(marks), dtype=np.int64)
+        nonzero_rows = np.repeat(
+            np.arange(len(self.ids)), np.diff(self.nonzero_offsets)
+        )
+        counts[row_starts[nonzero_rows] + self.nonzero_positions] = self.nonzero_counts
+        return pd.DataFrame(
+            {
+                self.id_column: np.repeat(self.ids.astype(np.int64), num_bins),
+                self.mark_column: marks,
+                "num_records": counts,
+            }
+        )
+
+
+def write_compact(family, path=None):
+    spec = FAMILIES[family]
+    df = pd.read_csv(raw_table_path(spec["distributions"]))
+    compact = CompactDistributions.from_frame(
+        df, spec["id_column"], spec["distribution_mark_column"]
+    )
+    path = path or compact_path(family)
+    compact.save(path)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compact mark distribution files")
+    parser.add_argument("--family", action="append", choices=["cpu", "gpu"])
+    args = parser.parse_args()
+
+    for family in args.family or ["cpu", "gpu"]:
+        csv_path = raw_table_path(FAMILIES[family]["distributions"])
+        path = write_compact(family)
+
+        start = time.perf_counter()
+        pd.read_csv(csv_path)
+        csv_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        CompactDistributions.load(family).to_frame()
+        compact_seconds = time.perf_counter() - start
+
+        print(
+            f"{family}: {os.path.getsize(csv_path):,} -> {os.path.getsize(path):,} "
+            f"bytes, load {csv_seconds * 1000:.1f} -> {compact_seconds * 1000:.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,380 @@
+# standard library imports
+import argparse
+import hashlib
+import importlib
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+# third party imports
+
+# local imports
+from .constants import (
+    FAMILIES,
+    PROCESSED_DATA_DIR,
+    SNAPSHOTS_DIR,
+    TABLES,
+    raw_table_path,
+)
+
+SCRAPING_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "scraping")
+STATE_PATH = os.path.join(PROCESSED_DATA_DIR, "orchestrator_state.json")
+REPORT_PATH = os.path.join(PROCESSED_DATA_DIR, "orchestrator_report.json")
+SPIDERS = {
+    "cpu": "cpu_spider",
+    "gpu": "gpu_spider",
+    "hdd_ssd": "hdd_ssd_spider",
+    "ram": "ram_spider",
+}
+
+
+class Stage:
+    # One job of the refresh: module.function(**kwargs), run in a worker
+    # process. Stages producing one of its inputs run before it
+    def __init__(self, name, module, function, kwargs, inputs, outputs, after=()):
+        self.name = name
+        self.module = module
+        self.function = function
+        self.kwargs = kwargs
+        self.inputs = inputs
+        self.outputs = outputs
+        self.after = set(after)
+
+
+def family_tables(family):
+    return [
+        raw_table_path(table)
+        for table, spec in TABLES.items()
+        if spec["family"] == family
+    ]
+
+
+def build_stages(
+    families=tuple(FAMILIES), crawl=True, crawl_settings=None, canary=True
+):
+    # canary -> crawl -> per-family snapshots and compact distributions ->
+    # derived metrics and distribution statistics -> database, price matrices
+    # and the CPU/RAM compatibility index. A canary that finds layout drift
+    # blocks its family's crawl
+    from .compatibility import INDEX_PATH
+    from .derived_metrics import derived_metrics_path
+    from .distribution_store import compact_path
+    from .price_matrix import INDEX_GROUPS, price_matrix_dir
+
+    stages = []
+    for family in families:
+        raw = family_tables(family)
+        distributions = FAMILIES[family]["distributions"]
+        if crawl and canary:
+            stages.append(
+                Stage(
+                    f"canary:{family}",
+                    "passmark.orchestrator",
+                    "run_canary",
+                    {"spider": SPIDERS[family], "settings": crawl_settings or {}},
+                    [],
+                    [],
+                )
+            )
+        if crawl:
+            stages.append(
+                Stage(
+                    f"crawl:{family}",
+                    "passmark.orchestrator",
+                    "run_crawl",
+                    {"spider": SPIDERS[family], "settings": crawl_settings or {}},
+                    [],
+                    raw,
+                    [f"canary:{family}"] if canary else [],
+                )
+            )
+        stages.append(
+            Stage(
+                f"snapshot:{family}",
+                "passmark.snapshots",
+                "snapshot_raw_tables",
+                {"tables": [t for t, s in TABLES.items() if s["family"] == family]},
+                raw,
+                [
+                    os.path.join(SNAPSHOTS_DIR, table, "manifest.json")
+                    for table, spec in TABLES.items()
+                    if spec["family"] == family
+                ],
+            )
+        )
+        if distributions:
+            stages.append(
+                Stage(
+                    f"compact:{family}",
+                    "passmark.distribution_store",
+                    "write_compact",
+                    {"family": family},
+                    [raw_table_path(distributions)],
+                    [compact_path(family)],
+                )
+            )
+            stages.append(
+                Stage(
+                    f"distribution_stats:{family}",
+                    "passmark.distribution_stats",
+                    "build_distribution_stats",
+                    {"families": (family,)},
+                    [raw_table_path(distributions)],
+                    [
+                        os.path.join(
+                            PROCESSED_DATA_DIR, f"{family}_distribution_stats.csv"
+                        )
+                    ],
+                )
+            )
+        stages.append(
+            Stage(
+                f"derived_metrics:{family}",
+                "passmark.derived_metrics",
+                "build_derived_metrics",
+                {"family": family},
+                raw,
+                [derived_metrics_path(family)],
+            )
+        )
+        stages.append(
+            Stage(
+                f"price_matrix:{family}",
+                "passmark.price_matrix",
+                "build_price_matrices",
+                {"families": (family,)},
+                raw,
+                [price_matrix_dir(family, "D")]
+                + [
+                    os.path.join(
+                        PROCESSED_DATA_DIR, f"{family}_price_index_{column}_D.csv"
+                    )
+                    for column in INDEX_GROUPS[family]
+                ],
+            )
+        )
+    # The database holds every table, so it waits for all crawls
+    stages.append(
+        Stage(
+            "database",
+            "passmark.database",
+            "build_database",
+            {},
+            [raw_table_path(table) for table in TABLES],
+            [os.path.join(PROCESSED_DATA_DIR, "passmark.sqlite")],
+        )
+    )
+    stages.append(
+        Stage(
+            "compatibility",
+            "passmark.compatibility",
+            "build_compatibility",
+            {},
+            [raw_table_path("cpus"), raw_table_path("ram_modules")],
+            [INDEX_PATH],
+        )
+    )
+
+    producers = {path: stage.name for stage in stages for path in stage.outputs}
+    for stage in stages:
+        stage.after |= {producers[path] for path in stage.inputs if path in producers}
+    return stages
+
+
+def run_crawl(spider, settings):
+    # Crawls run in their own interpreter in the Scrapy project; the run fails
+    # unless the spider finished cleanly
+    command = [
+        sys.executable,
+        "-m",
+        "scrapy_passmark.sharding",
+        f"--run-spider={spider}",
+        "--arguments-json={}",
+        f"--settings-json={json.dumps(settings)}",
+    ]
+    if subprocess.run(command, cwd=SCRAPING_DIR).returncode != 0:
+        raise RuntimeError(f"Crawl of {spider} did not finish")
+
+
+def run_canary(spider, settings):
+    # Fails on layout drift, and when there is no previous output to compare
+    # with (crawl with --no-canary the first time), see scrapy_passmark.canary
+    command = [sys.executable, "-m", "scrapy_passmark.canary", f"--spider={spider}"]
+    for name, value in settings.items():
+        command += ["-s", f"{name}={value}"]
+    if subprocess.run(command, cwd=SCRAPING_DIR).returncode != 0:
+        raise RuntimeError(f"Canary of {spider} found layout drift or has no baseline")
+
+
+def _run_stage(module, function, kwargs):
+    start = time.perf_counter()
+    getattr(importlib.import_module(module), function)(**kwargs)
+    return time.perf_counter() - start
+
+
+class Fingerprints:
+    # Hashes of the stages' inputs, code and arguments at their last
+    # successful run. File hashes are cached by size and modification time,
+    # since a crawl often rewrites a file with identical contents
+    def __init__(self, path=STATE_PATH):
+        self.path = path
+        self.state = {"stages": {}, "files": {}}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.state = json.load(f)
+
+    def file_hash(self, path):
+        stat = os.stat(path)
+        key = f"{stat.st_size}:{stat.st_mtime_ns}"
+        cached = self.state["files"].get(path)
+        if cached and cached[0] == key:
+            return cached[1]
+        digest = hashlib.sha1()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        self.state["files"][path] = [key, digest.hexdigest()]
+        return digest.hexdigest()
+
+    def stage_hash(self, stage):
+        digest = hashlib.sha1()
+        with open(importlib.util.find_spec(stage.module).origin, "rb") as f:
+            digest.update(f.read())
+        digest.update(json.dumps([stage.function, stage.kwargs]).encode())
+        for path in stage.inputs:
+            exists = os.path.exists(path)
+            digest.update(f"{path}:{self.file_hash(path) if exists else '-'}".encode())
+        return digest.hexdigest()
+
+    def unchanged(self, stage):
+        # Crawls have no inputs to compare and always run
+        if not stage.inputs or not all(os.path.exists(p) for p in stage.outputs):
+            return False
+        return self.state["stages"].get(stage.name) == self.stage_hash(stage)
+
+    def record(self, stage):
+        self.state["stages"][stage.name] = self.stage_hash(stage)
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+
+def run(stages, workers=None, force=False, state_path=STATE_PATH):
+    # Runs every stage once its predecessors are done, as many at a time as
+    # there are workers. Returns {stage: {"status", "seconds", ...}}; a failed
+    # stage blocks everything downstream of it
+    fingerprints = Fingerprints(state_path)
+    pending = {stage.name: stage for stage in stages}
+    results = {}
+    running = {}
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        while pending or running:
+            for name, stage in list(pending.items()):
+                statuses = [
+                    results.get(before, {}).get("status") for before in stage.after
+                ]
+                if any(status in ("failed", "blocked") for status in statuses):
+                    results[name] = {"status": "blocked", "seconds": 0.0}
+                    del pending[name]
+                elif all(status in ("done", "skipped") for status in statuses):
+                    del pending[name]
+                    if not force and fingerprints.unchanged(stage):
+                        results[name] = {"status": "skipped", "seconds": 0.0}
+                        continue
+                    future = pool.submit(
+                        _run_stage, stage.module, stage.function, stage.kwargs
+                    )
+                    running[future] = (stage, time.perf_counter() - start)
+            if not running:
+                continue
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                stage, started = running.pop(future)
+                result = {
+                    "started": round(started, 3),
+                    "finished": round(time.perf_counter() - start, 3),
+                }
+                try:
+                    result["seconds"] = round(future.result(), 3)
+                    result["status"] = "done"
+                    fingerprints.record(stage)
+                    fingerprints.save()
+                except Exception as exc:
+                    result["seconds"] = round(result["finished"] - started, 3)
+                    result["status"] = "failed"
+                    result["error"] = f"{type(exc).__name__}: {exc}"
+                results[stage.name] = result
+                print(f"{stage.name}: {result['status']} in {result['seconds']}s")
+    fingerprints.save()
+    return results, time.perf_counter() - start
+
+
+def _parse_settings(pairs):
+    settings = {}
+    for pair in pairs:
+        name, _, value = pair.partition("=")
+        settings[name] = value
+    return settings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresh crawls and derived data")
+    parser.add_argument("--family", action="append", choices=list(FAMILIES))
+    parser.add_argument(
+        "--no-crawl", action="store_true", help="only rebuild from data/raw"
+    )
+    parser.add_argument(
+        "--no-canary", action="store_true", help="crawl without a canary first"
+    )
+    parser.add_argument("--force", action="store_true", help="rerun unchanged stages")
+    parser.add_argument("--workers", type=int, help="processes (default: CPU count)")
+    parser.add_argument(
+        "-s",
+        dest="settings",
+        action="append",
+        default=[],
+        metavar="NAME=VALUE",
+        help="extra Scrapy setting for the crawls",
+    )
+    parser.add_argument("--report", default=REPORT_PATH, help="JSON timing report")
+    args = parser.parse_args()
+
+    stages = build_stages(
+        tuple(args.family or FAMILIES),
+        not args.no_crawl,
+        _parse_settings(args.settings),
+        not args.no_canary,
+    )
+    results, seconds = run(stages, args.workers, args.force)
+
+    os.makedirs(os.path.dirname(args.report), exist_ok=True)
+    with open(args.report, "w", encoding="utf-8") as f:
+        json.dump({"seconds": round(seconds, 3), "stages": results}, f, indent=2)
+    busy = sum(result["seconds"] for result in results.values())
+    counts = {}
+    for result in results.values():
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+    print(
+        f"{len(results)} stages in {seconds:.1f}s ({busy:.1f}s of stage time): "
+        + ", ".join(f"{count} {status}" for status, count in sorted(counts.items()))
+    )
+    for name, result in results.items():
+        if result["status"] == "failed":
+            print(f"  {name}: {result['error']}")
+    sys.exit(
+        1 if any(r["status"] in ("failed", "blocked") for r in results.values()) else 0
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+# standard library imports
+import re
+
+# third party imports
+import pandas as pd
+
+# local imports
+
+NUMBER_PATTERN = re.compile(r"-?\d[\d,]*(?:\.\d+)?|-?\.\d+")
+PRICE_PATTERN = re.compile(r"\$\s*([\d,]*\.?\d+)")
+
+
+def parse_number(text):
+    # "20,811 MOps/Sec" -> 20811.0, "95 W" -> 95.0, "" / "NA" / None -> None
+    if text is None:
+        return None
+    match = NUMBER_PATTERN.search(str(text))
+    if not match:
+        return None
+    return float(match.group(0).replace(",", ""))
+
+
+def parse_price(text):
+    # "$189.69 USD (2025-05-30)" -> 189.69, "NA" -> None
+    if text is None:
+        return None
+    match = PRICE_PATTERN.search(str(text))
+    if not match:
+        return None
+    return float(match.group(1).replace(",", ""))
+
+
+def parse_numbers(series):
+    # Vectorized parse_number over a column of strings, as float64 with NaN
+    text = series.astype("string").str.replace(",", "", regex=False)
+    numbers = text.str.extract(r"(-?\d*\.?\d+)", expand=False)
+    return pd.to_numeric(numbers).astype("float64")
+
+
+def parse_prices(series):
+    # Vectorized parse_price over a column of strings, as float64 with NaN
+    text = series.astype("string").str.replace(",", "", regex=False)
+    numbers = text.str.extract(r"\$\s*(\d*\.?\d+)", expand=False)
+    return pd.to_numeric(numbers).astype("float64")
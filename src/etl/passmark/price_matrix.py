@@ -0,0 +1,243 @@
+# standard library imports
+import argparse
+import json
+import os
+
+# third party imports
+import numpy as np
+import pandas as pd
+
+# local imports
+from .constants import FAMILIES, PROCESSED_DATA_DIR, raw_table_path
+
+MS_PER_DAY = 86_400_000
+# Pricing histories contain a few placeholder points at the epoch
+MIN_TIMESTAMP = 946684800000  # 2000-01-01
+# Days per grid step; weekly steps start on Mondays (1970-01-05 is day 4)
+FREQUENCIES = {"D": (1, 0), "W": (7, 4)}
+# Matrices larger than this are built directly in a memory-mapped .npy file
+MEMMAP_THRESHOLD = 256 * 2**20
+CHUNK_ROWS = 1024
+
+# Device columns that price indexes are grouped by
+INDEX_GROUPS = {
+    "cpu": ["cpu_class", "socket"],
+    "gpu": ["category"],
+    "ram": ["generation"],
+    "hdd_ssd": [],
+}
+
+
+class PriceMatrix:
+    """Prices of many devices on a common date grid.
+
+    `prices[i, j]` is the price of device `ids[i]` on `dates[j]`: the last
+    price listed within that grid step, carried forward over steps without
+    one for at most `max_gap` steps, and NaN before the first listing.
+    """
+
+    def __init__(self, ids, dates, prices, freq="D", max_gap=None):
+        self.ids = ids
+        self.dates = dates
+        self.prices = prices
+        self.freq = freq
+        self.max_gap = max_gap
+        self.row_of = {device_id: row for row, device_id in enumerate(ids.tolist())}
+
+    @classmethod
+    def from_histories(
+        cls, device_ids, timestamps, prices, freq="D", max_gap=None, path=None
+    ):
+        step_days, offset = FREQUENCIES[freq]
+        device_ids = np.asarray(device_ids, dtype=np.int64)
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        prices = np.asarray(prices, dtype=np.float32)
+        listed = (prices > 0) & (timestamps >= MIN_TIMESTAMP)
+        device_ids, timestamps, prices = (
+            device_ids[listed],
+            timestamps[listed],
+            prices[listed],
+        )
+
+        steps = (timestamps // MS_PER_DAY - offset) // step_days
+        ids, rows = np.unique(device_ids, return_inverse=True)
+        first_step = steps.min() if len(steps) else 0
+        num_steps = int(steps.max() - first_step + 1) if len(steps) else 0
+        columns = steps - first_step
+
+        # Last price of each (device, step): sort by time and keep the final
+        # point of every run of equal cells
+        order = np.lexsort((timestamps, columns, rows))
+        rows, columns, prices = rows[order], columns[order], prices[order]
+        cells = rows * num_steps + columns
+        last = np.append(cells[1:] != cells[:-1], True)
+
+        shape = (len(ids), num_steps)
+        matrix = _allocate(shape, path)
+        matrix[:] = np.nan
+        matrix[rows[last], columns[last]] = prices[last]
+        for start in range(0, len(ids), CHUNK_ROWS):
+            _forward_fill(matrix[start : start + CHUNK_ROWS], max_gap)
+
+        days = (np.arange(num_steps) + first_step) * step_days + offset
+        dates = np.datetime64("1970-01-01", "D") + days
+        return cls(ids, dates, matrix, freq, max_gap)
+
+    @classmethod
+    def build(cls, family, freq="D", max_gap=None, path=None):
+        spec = FAMILIES[family]
+        histories = pd.read_csv(raw_table_path(spec["pricing_histories"]))
+        return cls.from_histories(
+            histories[spec["id_column"]].to_numpy(),
+            histories["timestamp"].to_numpy(),
+            histories["price"].to_numpy(),
+            freq,
+            max_gap,
+            path,
+        )
+
+    def save(self, directory):
+        # prices.npy (memory-mappable), ids.npy, dates.npy and meta.json
+        os.makedirs(directory, exist_ok=True)
+        prices_path = os.path.join(directory, "prices.npy")
+        if getattr(self.prices, "filename", None) != os.path.abspath(prices_path):
+            np.save(prices_path, self.prices)
+        elif isinstance(self.prices, np.memmap):
+            self.prices.flush()
+        np.save(os.path.join(directory, "ids.npy"), self.ids)
+        np.save(os.path.join(directory, "dates.npy"), self.dates)
+        with open(os.path.join(directory, "meta.json"), "w") as f:
+            json.dump({"freq": self.freq, "max_gap": self.max_gap}, f)
+
+    @classmethod
+    def load(cls, directory, mmap_mode="r"):
+        with open(os.path.join(directory, "meta.json")) as f:
+            meta = json.load(f)
+        return cls(
+            np.load(os.path.join(directory, "ids.npy")),
+            np.load(os.path.join(directory, "dates.npy")),
+            np.load(os.path.join(directory, "prices.npy"), mmap_mode=mmap_mode),
+            meta["freq"],
+            meta["max_gap"],
+        )
+
+    def rows(self, device_ids):
+        return np.array([self.row_of[device_id] for device_id in device_ids])
+
+    def frame(self, device_ids=None):
+        # Dates x devices DataFrame, for plotting or pandas time-series work
+        rows = np.arange(len(self.ids)) if device_ids is None else self.rows(device_ids)
+        return pd.DataFrame(
+            self.prices[rows].T,
+            index=pd.DatetimeIndex(self.dates, name="date"),
+            columns=pd.Index(self.ids[rows], name="id"),
+        )
+
+    def group_index(self, labels, statistic="median", relative=True):
+        # Price index per group of devices: dates x groups DataFrame of the
+        # median (or mean) price of the group's listed devices. With
+        # `relative`, each device is first scaled to 100 at its first listing,
+        # so the index follows price changes rather than the product mix
+        labels = pd.Series(labels).reindex(self.ids)
+        codes, groups = pd.factorize(labels.to_numpy(), sort=True)
+        order = np.argsort(codes, kind="stable")
+        order = order[codes[order] >= 0]
+        bounds = np.searchsorted(codes[order], np.arange(len(groups) + 1))
+
+        reduce = np.nanmedian if statistic == "median" else np.nanmean
+        index = np.full((len(self.dates), len(groups)), np.nan)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            for group, (start, stop) in enumerate(zip(bounds[:-1], bounds[1:])):
+                prices = np.asarray(self.prices[order[start:stop]], dtype=np.float64)
+                if relative:
+                    prices = 100 * prices / _first_valid(prices)[:, None]
+                listed = ~np.isnan(prices).all(axis=0)
+                index[listed, group] = reduce(prices[:, listed], axis=0)
+        return pd.DataFrame(
+            index,
+            index=pd.DatetimeIndex(self.dates, name="date"),
+            columns=pd.Index(groups, name=labels.name),
+        )
+
+
+def _allocate(shape, path):
+    nbytes = int(np.prod(shape)) * np.dtype(np.float32).itemsize
+    if nbytes <= MEMMAP_THRESHOLD:
+        return np.empty(shape, dtype=np.float32)
+    if path is None:
+        raise ValueError(
+            f"A {nbytes / 2**20:.0f} MB price matrix needs a path to be "
+            "memory-mapped at"
+        )
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    return np.lib.format.open_memmap(path, mode="w+", dtype=np.float32, shape=shape)
+
+
+def _forward_fill(block, max_gap):
+    # In place, along the date axis: each cell takes the last listed price at
+    # or before it, unless that listing is more than max_gap steps back
+    if block.size == 0:
+        return
+    listed = ~np.isnan(block)
+    columns = np.arange(block.shape[1])
+    source = np.where(listed, columns, -1)
+    np.maximum.accumulate(source, axis=1, out=source)
+    filled = np.take_along_axis(block, np.maximum(source, 0), axis=1)
+    stale = source < 0
+    if max_gap is not None:
+        stale |= columns - source > max_gap
+    filled[stale] = np.nan
+    block[:] = filled
+
+
+def _first_valid(prices):
+    listed = ~np.isnan(prices)
+    first = listed.argmax(axis=1)
+    return np.where(listed.any(axis=1), prices[np.arange(len(prices)), first], np.nan)
+
+
+def device_labels(family, column):
+    devices = pd.read_csv(
+        raw_table_path(FAMILIES[family]["devices"]), usecols=["id", column]
+    )
+    return devices.set_index("id")[column]
+
+
+def price_matrix_dir(family, freq, output_dir=PROCESSED_DATA_DIR):
+    return os.path.join(output_dir, f"{family}_price_matrix_{freq}")
+
+
+def build_price_matrices(
+    families=tuple(FAMILIES), freq="D", max_gap=None, output_dir=PROCESSED_DATA_DIR
+):
+    paths = []
+    for family in families:
+        directory = price_matrix_dir(family, freq, output_dir)
+        matrix = PriceMatrix.build(
+            family, freq, max_gap, os.path.join(directory, "prices.npy")
+        )
+        matrix.save(directory)
+        paths.append(directory)
+        for column in INDEX_GROUPS[family]:
+            index = matrix.group_index(device_labels(family, column))
+            path = os.path.join(output_dir, f"{family}_price_index_{column}_{freq}.csv")
+            index.to_csv(path)
+            paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prices on a common date grid")
+    parser.add_argument("--family", action="append", choices=list(FAMILIES))
+    parser.add_argument("--freq", choices=list(FREQUENCIES), default="D")
+    parser.add_argument(
+        "--max-gap", type=int, help="grid steps a price is carried forward"
+    )
+    args = parser.parse_args()
+    families = tuple(args.family or FAMILIES)
+    for path in build_price_matrices(families, args.freq, args.max_gap):
+        print(f"Wrote {path}")
+
+
+if __name__ == "__main__":
+    main()
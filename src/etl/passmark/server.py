@@ -0,0 +1,334 @@
+# standard library imports
+import argparse
+import asyncio
+import csv
+import hashlib
+import json
+import logging
+import os
+from collections import OrderedDict
+from urllib.parse import parse_qs, unquote, urlsplit
+
+# third party imports
+
+# local imports
+from .constants import FAMILIES, TABLES, raw_table_path
+from .parsing import parse_number, parse_price
+
+logger = logging.getLogger(__name__)
+
+STATUS_REASONS = {
+    200: "OK",
+    304: "Not Modified",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+}
+MAX_HEADER_BYTES = 16 * 1024
+
+
+def _read_csv(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        columns = next(reader)
+        for row in reader:
+            yield columns, row
+
+
+class FamilyIndex:
+    def __init__(self, family):
+        spec = FAMILIES[family]
+        self.devices = {}
+        self.names = []
+        self.prices = {}
+        self.distributions = {}
+
+        for columns, row in _read_csv(raw_table_path(spec["devices"])):
+            device = {
+                column: (value if value != "" else None)
+                for column, value in zip(columns, row)
+            }
+            device["id"] = int(device["id"])
+            self.devices[device["id"]] = device
+            self.names.append(((device["name"] or "").lower(), device["id"]))
+
+        for _, (device_id, timestamp, price) in _read_csv(
+            raw_table_path(spec["pricing_histories"])
+        ):
+            self.prices.setdefault(int(device_id), []).append(
+                [int(timestamp), float(price)]
+            )
+
+        if spec["distributions"]:
+            for _, (device_id, mark, num_records) in _read_csv(
+                raw_table_path(spec["distributions"])
+            ):
+                self.distributions.setdefault(int(device_id), []).append(
+                    [int(mark), int(num_records)]
+                )
+
+        # Performance per dollar, best first, at the device's current price
+        ranking = []
+        for device_id, device in self.devices.items():
+            mark = parse_number(device[spec["mark_column"]])
+            price = parse_price(device["last_price_change"])
+            if price is None and device_id in self.prices:
+                price = self.prices[device_id][-1][1]
+            if mark and price:
+                ranking.append((mark / price, device_id, mark, price))
+        ranking.sort(key=lambda entry: (-entry[0], entry[1]))
+        self.performance_per_dollar = ranking
+
+
+class DataIndex:
+    def __init__(self, fingerprint):
+        self.fingerprint = fingerprint
+        self.generation = hashlib.blake2b(
+            repr(fingerprint).encode(), digest_size=8
+        ).hexdigest()
+        self.families = {family: FamilyIndex(family) for family in FAMILIES}
+
+
+def data_fingerprint():
+    fingerprint = []
+    for table in TABLES:
+        stat = os.stat(raw_table_path(table))
+        fingerprint.append((table, stat.st_mtime_ns, stat.st_size))
+    return tuple(fingerprint)
+
+
+class LRUCache:
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+
+
+class NotFound(Exception):
+    pass
+
+
+class BadRequest(Exception):
+    pass
+
+
+class PassMarkServer:
+    def __init__(self, cache_size=4096, reload_interval=5.0):
+        self.index = DataIndex(data_fingerprint())
+        self.cache = LRUCache(cache_size)
+        self.reload_interval = reload_interval
+
+    async def serve(self, host="127.0.0.1", port=8080):
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        reloader = asyncio.create_task(self.watch_for_new_crawls())
+        logger.info("Serving PassMark data on http://%s:%s", host, port)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            reloader.cancel()
+
+    async def watch_for_new_crawls(self):
+        loop = asyncio.get_running_loop()
+        pending = None
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            try:
+                fingerprint = data_fingerprint()
+            except FileNotFoundError:
+                # A pipeline is in the middle of rewriting the raw files
+                pending = None
+                continue
+
+            if fingerprint == self.index.fingerprint:
+                pending = None
+            elif fingerprint != pending:
+                # Wait until the files stop changing before reloading
+                pending = fingerprint
+            else:
+                try:
+                    index = await loop.run_in_executor(None, DataIndex, fingerprint)
+                except Exception:
+                    logger.exception("Reload failed, keeping the current data")
+                    continue
+                # Swapping the reference is atomic: requests see either the old
+                # or the new index, never a mix of both
+                self.index = index
+                self.cache.clear()
+                pending = None
+                logger.info("Reloaded PassMark data (%s)", index.generation)
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except asyncio.LimitOverrunError:
+                    writer.write(self.build_response(400, b"", {}, True))
+                    break
+                if len(head) > MAX_HEADER_BYTES:
+                    writer.write(self.build_response(400, b"", {}, True))
+                    break
+
+                lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = lines[0].split(" ", 2)
+                except ValueError:
+                    writer.write(self.build_response(400, b"", {}, True))
+                    break
+                headers = {}
+                for line in lines[1:]:
+                    if ":" in line:
+                        name, value = line.split(":", 1)
+                        headers[name.strip().lower()] = value.strip()
+
+                connection = headers.get("connection", "").lower()
+                close = connection == "close" or (
+                    version == "HTTP/1.0" and connection != "keep-alive"
+                )
+                writer.write(self.respond(method, target, headers, close))
+                await writer.drain()
+                if close:
+                    break
+        finally:
+            writer.close()
+
+    def respond(self, method, target, headers, close):
+        if method not in ("GET", "HEAD"):
+            return self.build_response(405, b"", {"Allow": "GET, HEAD"}, close)
+
+        index = self.index
+        cache_key = (index.generation, target)
+        entry = self.cache.get(cache_key)
+        if entry is None:
+            try:
+                payload = self.route(index, target)
+                status = 200
+            except NotFound as e:
+                payload, status = {"error": str(e) or "not found"}, 404
+            except BadRequest as e:
+                payload, status = {"error": str(e)}, 400
+            body = json.dumps(payload, separators=(",", ":")).encode()
+            etag = '"%s"' % hashlib.blake2b(body, digest_size=12).hexdigest()
+            entry = (status, etag, body)
+            if status == 200:
+                self.cache.put(cache_key, entry)
+
+        status, etag, body = entry
+        extra_headers = {"ETag": etag, "Content-Type": "application/json"}
+        if status == 200 and headers.get("if-none-match") == etag:
+            return self.build_response(304, b"", {"ETag": etag}, close)
+        if method == "HEAD":
+            extra_headers["Content-Length"] = str(len(body))
+            return self.build_response(status, b"", extra_headers, close)
+        return self.build_response(status, body, extra_headers, close)
+
+    def build_response(self, status, body, headers, close):
+        lines = [f"HTTP/1.1 {status} {STATUS_REASONS[status]}"]
+        headers.setdefault("Content-Length", str(len(body)))
+        headers["Connection"] = "close" if close else "keep-alive"
+        lines.extend(f"{name}: {value}" for name, value in headers.items())
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body
+
+    def route(self, index, target):
+        url = urlsplit(target)
+        query = parse_qs(url.query)
+        parts = [unquote(part) for part in url.path.split("/") if part]
+
+        if parts == ["health"]:
+            return {"status": "ok", "generation": index.generation}
+        if not parts or parts[0] not in index.families:
+            raise NotFound(f"unknown family, expected one of {list(FAMILIES)}")
+        family = index.families[parts[0]]
+
+        if parts[1:] == ["devices"]:
+            name = query.get("name", [""])[0].lower()
+            limit = _int_param(query, "limit", 20)
+            matches = [
+                family.devices[device_id]
+                for device_name, device_id in family.names
+                if name in device_name
+            ]
+            return {"devices": matches[:limit], "total": len(matches)}
+
+        if parts[1:] == ["top"]:
+            limit = _int_param(query, "n", 10)
+            return {
+                "devices": [
+                    {
+                        "id": device_id,
+                        "name": family.devices[device_id]["name"],
+                        "mark": mark,
+                        "price": price,
+                        "mark_per_dollar": value,
+                    }
+                    for value, device_id, mark, price in (
+                        family.performance_per_dollar[:limit]
+                    )
+                ]
+            }
+
+        if len(parts) in (3, 4) and parts[1] == "devices":
+            try:
+                device_id = int(parts[2])
+            except ValueError:
+                raise BadRequest("device id must be an integer")
+            if device_id not in family.devices:
+                raise NotFound(f"no device with id {device_id}")
+            if len(parts) == 3:
+                return family.devices[device_id]
+            if parts[3] == "prices":
+                return {
+                    "id": device_id,
+                    "prices": family.prices.get(device_id, []),
+                }
+            if parts[3] == "distribution" and FAMILIES[parts[0]]["distributions"]:
+                return {
+                    "id": device_id,
+                    "distribution": family.distributions.get(device_id, []),
+                }
+
+        raise NotFound()
+
+
+def _int_param(query, name, default):
+    try:
+        value = int(query.get(name, [default])[0])
+    except ValueError:
+        raise BadRequest(f"{name} must be an integer")
+    if value < 0:
+        raise BadRequest(f"{name} must not be negative")
+    return value
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Read-only PassMark HTTP API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--cache-size", type=int, default=4096)
+    parser.add_argument("--reload-interval", type=float, default=5.0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    server = PassMarkServer(args.cache_size, args.reload_interval)
+    asyncio.run(server.serve(args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
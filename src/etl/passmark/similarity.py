@@ -0,0 +1,220 @@
+# standard library imports
+import argparse
+
+# third party imports
+import numpy as np
+import pandas as pd
+
+# local imports
+from .constants import FAMILIES, raw_table_path
+from .parsing import parse_numbers, parse_prices
+
+# Benchmark sub-test columns of each family, and those where lower is better
+SUBSCORES = {
+    "cpu": [
+        "integer_math",
+        "floating_point_math",
+        "find_prime_numbers",
+        "random_string_sorting",
+        "data_encryption",
+        "data_compression",
+        "physics",
+        "extended_instructions",
+    ],
+    "gpu": ["directx_9", "directx_10", "directx_11", "directx_12", "gpu_compute"],
+    "ram": [
+        "database_operations",
+        "memory_read_cached",
+        "memory_read_uncached",
+        "memory_write",
+        "latency",
+        "memory_threaded",
+    ],
+    "hdd_ssd": [
+        "sequential_read",
+        "sequential_write",
+        "random_seek_read_write",
+        "iops_4kqd1",
+    ],
+}
+LOWER_IS_BETTER = {"latency"}
+
+
+class SubscoreIndex:
+    """Devices of one family as vectors of normalized benchmark sub-scores.
+
+    Each sub-score is log-scaled and standardized, so every test weighs the
+    same regardless of its unit. Distances are the RMS difference over the
+    sub-scores both devices have; pairs that share fewer than `min_shared`
+    sub-scores are never neighbors.
+    """
+
+    def __init__(self, ids, names, values, prices, lower_is_better, min_shared=None):
+        self.ids = ids
+        self.names = names
+        self.values = values
+        self.prices = prices
+        self.lower_is_better = lower_is_better
+        self.row_of = {device_id: row for row, device_id in enumerate(ids.tolist())}
+
+        logs = np.log1p(np.clip(values, 0, None))
+        mean = np.nanmean(logs, axis=0)
+        std = np.nanstd(logs, axis=0)
+        std[~(std > 0)] = 1.0
+        self.present = ~np.isnan(values)
+        vectors = np.where(self.present, (logs - mean) / std, 0.0).astype(np.float32)
+        present = self.present.astype(np.float32)
+        # sum over dims both have of (a - b)^2 = a^2 . b_present + a_present . b^2
+        # - 2 a . b, i.e. a single product of these two stacked matrices
+        self.query_terms = np.hstack([vectors**2, present, vectors])
+        self.index_terms = np.hstack([present, vectors**2, -2 * vectors]).T.copy()
+        self.present_terms = present
+        self.num_dims = values.shape[1]
+        self.min_shared = min_shared or (self.num_dims + 1) // 2
+
+    @classmethod
+    def load(cls, family, min_shared=None):
+        columns = SUBSCORES[family]
+        devices = pd.read_csv(
+            raw_table_path(FAMILIES[family]["devices"]),
+            usecols=["id", "name", "last_price_change", *columns],
+            dtype=str,
+        )
+        values = np.column_stack([parse_numbers(devices[c]) for c in columns])
+        # Devices without any sub-score cannot be placed in the index
+        scored = ~np.isnan(values).all(axis=1)
+        devices, values = devices[scored], values[scored]
+        return cls(
+            devices["id"].astype(np.int64).to_numpy(),
+            devices["name"].to_numpy(),
+            values,
+            parse_prices(devices["last_price_change"]).to_numpy(),
+            np.array([column in LOWER_IS_BETTER for column in columns]),
+            min_shared,
+        )
+
+    def rows(self, device_ids):
+        return np.array([self.row_of[device_id] for device_id in device_ids])
+
+    def mean_squared_distances(self, rows):
+        # (len(rows), num_devices) mean squared differences over the shared
+        # sub-scores; inf where fewer than min_shared are shared
+        squared = self.query_terms[rows] @ self.index_terms
+        shared = self.present_terms[rows] @ self.present_terms.T
+        np.maximum(squared, 0, out=squared)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            squared /= shared
+        squared[shared < self.min_shared] = np.inf
+        return squared
+
+    def nearest(self, device_ids=None, k=10, chunk_size=1024):
+        # Ids and distances of the k nearest other devices of each device, as
+        # (num_queries, k) arrays; missing neighbors have id -1
+        rows = np.arange(len(self.ids)) if device_ids is None else self.rows(device_ids)
+        k = min(k, len(self.ids) - 1)
+        neighbor_ids = np.full((len(rows), k), -1, dtype=np.int64)
+        neighbor_distances = np.full((len(rows), k), np.inf)
+        for start in range(0, len(rows), chunk_size):
+            chunk = rows[start : start + chunk_size]
+            distances = self.mean_squared_distances(chunk)
+            distances[np.arange(len(chunk)), chunk] = np.inf
+            candidates = np.argpartition(distances, k - 1, axis=1)[:, :k]
+            candidate_distances = np.take_along_axis(distances, candidates, axis=1)
+            order = np.argsort(candidate_distances, axis=1, kind="stable")
+            candidates = np.take_along_axis(candidates, order, axis=1)
+            candidate_distances = np.take_along_axis(candidate_distances, order, 1)
+            found = np.isfinite(candidate_distances)
+            neighbor_ids[start : start + len(chunk)] = np.where(
+                found, self.ids[candidates], -1
+            )
+            neighbor_distances[start : start + len(chunk)] = np.sqrt(
+                candidate_distances
+            )
+        return neighbor_ids, neighbor_distances
+
+    def most_similar(self, device_id, k=10):
+        neighbor_ids, distances = self.nearest([device_id], k)
+        found = neighbor_ids[0] >= 0
+        rows = self.rows(neighbor_ids[0][found])
+        return pd.DataFrame(
+            {
+                "id": self.ids[rows],
+                "name": self.names[rows],
+                "distance": distances[0][found],
+                "price": self.prices[rows],
+            }
+        )
+
+    def cheapest_within(self, device_ids=None, tolerance=0.05, chunk_size=1024):
+        # For each device, the cheapest other priced device that is at most
+        # `tolerance` worse on every sub-score the device has. Returns a frame
+        # of id, price, match_id (-1 if none) and match_price
+        rows = np.arange(len(self.ids)) if device_ids is None else self.rows(device_ids)
+        # Flip lower-is-better sub-scores so "at least (1 - tolerance) of X"
+        # holds for every column
+        values = np.where(self.lower_is_better, -self.values, self.values)
+        floors = np.where(
+            self.lower_is_better, values * (1 + tolerance), values * (1 - tolerance)
+        )
+        # Candidates in ascending price order, so the first qualifying one is
+        # the cheapest
+        by_price = np.argsort(self.prices, kind="stable")
+        by_price = by_price[~np.isnan(self.prices[by_price])]
+        candidates = values[by_price].T
+
+        match_rows = np.full(len(rows), -1, dtype=np.int64)
+        # Nothing can match when no device has a price
+        starts = range(0, len(rows), chunk_size) if len(by_price) else []
+        for start in starts:
+            chunk = rows[start : start + chunk_size]
+            qualifies = by_price[None, :] != chunk[:, None]
+            for column, column_floors in zip(candidates, floors[chunk].T):
+                # A candidate missing one of the query's sub-scores compares
+                # False and never qualifies; sub-scores the query lacks are
+                # skipped
+                qualifies &= (column[None, :] >= column_floors[:, None]) | np.isnan(
+                    column_floors
+                )[:, None]
+            first = qualifies.argmax(axis=1)
+            found = qualifies[np.arange(len(chunk)), first]
+            match_rows[start : start + len(chunk)] = np.where(
+                found, by_price[first], -1
+            )
+
+        found = match_rows >= 0
+        return pd.DataFrame(
+            {
+                "id": self.ids[rows],
+                "price": self.prices[rows],
+                "match_id": np.where(found, self.ids[match_rows], -1),
+                "match_price": np.where(found, self.prices[match_rows], np.nan),
+            }
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Devices with similar sub-scores")
+    parser.add_argument("family", choices=list(SUBSCORES))
+    parser.add_argument("id", type=int, help="device id")
+    parser.add_argument("-k", type=int, default=10, help="number of neighbors")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.05, help="for the cheapest match"
+    )
+    args = parser.parse_args()
+
+    index = SubscoreIndex.load(args.family)
+    print(index.most_similar(args.id, args.k).to_string(index=False))
+    match = index.cheapest_within([args.id], args.tolerance)
+    match_id = int(match["match_id"].iloc[0])
+    if match_id >= 0:
+        print(
+            f"\nCheapest within {args.tolerance:.0%}: "
+            f"{index.names[index.row_of[match_id]]} (id {match_id}) "
+            f"at ${match['match_price'].iloc[0]:.2f}"
+        )
+    else:
+        print(f"\nNo priced device within {args.tolerance:.0%} of every sub-score")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+# standard library imports
+import argparse
+import datetime
+import json
+import os
+
+# third party imports
+import pandas as pd
+
+# local imports
+from .constants import SNAPSHOTS_DIR, TABLES, raw_table_path
+
+MANIFEST_FILENAME = "manifest.json"
+ORDINAL_COLUMN = "_ordinal"
+
+
+class SnapshotStore:
+    """Append-only, versioned history of a single scraped table.
+
+    Every commit is stored as a columnar delta (upserted rows plus deleted keys)
+    over the previous version. Every `checkpoint_interval` versions the full
+    table is written instead, so a read only replays the deltas since the
+    nearest checkpoint.
+    """
+
+    def __init__(self, table, root=SNAPSHOTS_DIR, checkpoint_interval=7):
+        self.table = table
+        self.key = TABLES[table]["key"]
+        self.directory = os.path.join(root, table)
+        self.checkpoint_interval = checkpoint_interval
+        self.manifest = self._load_manifest()
+
+    @property
+    def versions(self):
+        return self.manifest["versions"]
+
+    def commit(self, df, crawl_date=None):
+        crawl_date = _to_date(crawl_date or datetime.date.today()).isoformat()
+        if self.versions and crawl_date < self.versions[-1]["crawl_date"]:
+            raise ValueError(
+                f"Crawl date {crawl_date} is older than the latest version "
+                f"({self.versions[-1]['crawl_date']}) of {self.table}"
+            )
+
+        os.makedirs(self.directory, exist_ok=True)
+        current = self._with_ordinal(df)
+        version_number = len(self.versions) + 1
+        version = {"version": version_number, "crawl_date": crawl_date}
+
+        previous = self.read_version(version_number - 1) if self.versions else None
+        since_checkpoint = version_number - self._checkpoint_before(version_number)
+        if (
+            previous is None
+            or list(previous.columns) != list(df.columns)
+            or since_checkpoint >= self.checkpoint_interval
+        ):
+            version.update(self._write_checkpoint(current, version_number))
+        else:
+            version.update(
+                self._write_delta(self._with_ordinal(previous), current, version_number)
+            )
+
+        self.manifest["versions"].append(version)
+        self._save_manifest()
+        return version
+
+    def compact(self):
+        # Turn the latest version into a checkpoint so reads of it (and of every
+        # later delta) no longer replay the deltas before it
+        if not self.versions or self.versions[-1]["kind"] == "checkpoint":
+            return
+        latest = self.versions[-1]
+        df = self.read_version(latest["version"])
+        stale_paths = [latest.pop("upserts"), latest.pop("deletes")]
+        latest.pop("num_upserts")
+        latest.pop("num_deletes")
+        latest.update(self._write_checkpoint(self._with_ordinal(df), latest["version"]))
+        self._save_manifest()
+        for path in stale_paths:
+            os.remove(os.path.join(self.directory, path))
+
+    def as_of(self, date):
+        date = _to_date(date).isoformat()
+        eligible = [v for v in self.versions if v["crawl_date"] <= date]
+        if not eligible:
+            raise KeyError(f"No snapshot of {self.table} as of {date}")
+        return self.read_version(eligible[-1]["version"])
+
+    def read_version(self, version_number):
+        if not 1 <= version_number <= len(self.versions):
+            raise KeyError(f"Version {version_number} of {self.table} does not exist")
+
+        checkpoint_number = self._checkpoint_before(version_number + 1)
+        checkpoint = self.versions[checkpoint_number - 1]
+        df = self._read(checkpoint["path"])
+        columns = checkpoint["columns"]
+
+        index_columns = self.key + [ORDINAL_COLUMN]
+        df = df.set_index(index_columns)
+        for version in self.versions[checkpoint_number:version_number]:
+            upserts = self._read(version["upserts"]).set_index(index_columns)
+            deletes = self._read(version["deletes"]).set_index(index_columns)
+            df = df.drop(index=deletes.index.union(upserts.index), errors="ignore")
+            df = pd.concat([df, upserts])
+
+        df = df.sort_index().reset_index()
+        return df[columns].reset_index(drop=True)
+
+    def _write_checkpoint(self, current, version_number):
+        path = f"v{version_number:06d}.checkpoint.parquet"
+        current.to_parquet(os.path.join(self.directory, path), index=False)
+        return {
+            "kind": "checkpoint",
+            "path": path,
+            "columns": [c for c in current.columns if c != ORDINAL_COLUMN],
+            "rows": len(current),
+        }
+
+    def _write_delta(self, previous, current, version_number):
+        index_columns = self.key + [ORDINAL_COLUMN]
+        previous = previous.set_index(index_columns)
+        current = current.set_index(index_columns)
+
+        deleted = previous.index.difference(current.index)
+        added = current.index.difference(previous.index)
+        common = current.index.intersection(previous.index)
+
+        # Rows present in both versions whose values changed (NaN == NaN)
+        old, new = previous.loc[common], current.loc[common]
+        differs = (old != new) & ~(old.isna() & new.isna())
+        changed = common[differs.any(axis=1).to_numpy()]
+
+        upserts = current.loc[added.union(changed)].reset_index()
+        deletes = pd.DataFrame(index=deleted).reset_index()
+        if deletes.empty:
+            deletes = pd.DataFrame(columns=index_columns)
+
+        upserts_path = f"v{version_number:06d}.upserts.parquet"
+        deletes_path = f"v{version_number:06d}.deletes.parquet"
+        upserts.to_parquet(os.path.join(self.directory, upserts_path), index=False)
+        deletes.to_parquet(os.path.join(self.directory, deletes_path), index=False)
+        return {
+            "kind": "delta",
+            "upserts": upserts_path,
+            "deletes": deletes_path,
+            "num_upserts": len(upserts),
+            "num_deletes": len(deleted),
+        }
+
+    def _checkpoint_before(self, version_number):
+        # Number of the last checkpoint strictly before `version_number`
+        for version in reversed(self.versions[: version_number - 1]):
+            if version["kind"] == "checkpoint":
+                return version["version"]
+        return 0
+
+    def _with_ordinal(self, df):
+        df = df.copy()
+        df[ORDINAL_COLUMN] = df.groupby(self.key, dropna=False).cumcount()
+        return df
+
+    def _read(self, path):
+        return pd.read_parquet(os.path.join(self.directory, path))
+
+    def _load_manifest(self):
+        path = os.path.join(self.directory, MANIFEST_FILENAME)
+        if not os.path.exists(path):
+            return {"table": self.table, "key": self.key, "versions": []}
+        with open(path) as f:
+            return json.load(f)
+
+    def _save_manifest(self):
+        path = os.path.join(self.directory, MANIFEST_FILENAME)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(tmp_path, path)
+
+
+def _to_date(value):
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    return datetime.date.fromisoformat(str(value))
+
+
+def snapshot_raw_tables(crawl_date=None, tables=None, root=SNAPSHOTS_DIR):
+    versions = {}
+    for table in tables or TABLES:
+        path = raw_table_path(table)
+        if not os.path.exists(path):
+            continue
+        store = SnapshotStore(table, root=root)
+        versions[table] = store.commit(pd.read_csv(path), crawl_date)
+    return versions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Versioned PassMark table snapshots")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    commit_parser = subparsers.add_parser("commit", help="snapshot the raw tables")
+    commit_parser.add_argument("--date", help="crawl date (YYYY-MM-DD)")
+    commit_parser.add_argument("--table", action="append", choices=list(TABLES))
+
+    as_of_parser = subparsers.add_parser("as-of", help="rebuild a table at a date")
+    as_of_parser.add_argument("table", choices=list(TABLES))
+    as_of_parser.add_argument("date", help="date (YYYY-MM-DD)")
+    as_of_parser.add_argument("--output", required=True, help="CSV file to write")
+
+    subparsers.add_parser("compact", help="checkpoint the latest version of each table")
+
+    args = parser.parse_args()
+    if args.command == "commit":
+        for table, version in snapshot_raw_tables(args.date, args.table).items():
+            print(f"{table}: version {version['version']} ({version['kind']})")
+    elif args.command == "as-of":
+        SnapshotStore(args.table).as_of(args.date).to_csv(args.output, index=False)
+    elif args.command == "compact":
+        for table in TABLES:
+            SnapshotStore(table).compact()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+# standard library imports
+import hashlib
+import inspect
+import json
+import os
+import re
+import sqlite3
+import sys
+import zlib
+
+# third party imports
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from scrapy.utils.misc import load_object
+
+# local imports
+from . import page_parsers
+from .constants import CRAWL_STATE_DIR
+
+# Fragments of a detail page that change between fetches without changing
+# anything the spiders extract: comments, ad slots, iframes, external and
+# ad/analytics scripts. PASSMARK_BODY_HASH_IGNORE adds to these
+VOLATILE_PATTERNS = [
+    r"<!--.*?-->",
+    r"<ins\b[^>]*>.*?</ins>",
+    r"<iframe\b[^>]*>.*?</iframe>",
+    r"<script\b[^>]*\bsrc=[^>]*>\s*</script>",
+    r"<script\b[^>]*>(?:(?!</script>).)*?"
+    r"(?:adsbygoogle|googletag|gtag\(|dataLayer)(?:(?!</script>).)*?</script>",
+]
+WHITESPACE = re.compile(rb"\s+")
+COMMIT_EVERY = 500
+
+
+class BodyHashStore:
+    # device id -> (hash of the normalized detail page, items parsed from it),
+    # one SQLite database per family next to the crawl state
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            "device_id INTEGER PRIMARY KEY, body_hash TEXT, items BLOB)"
+        )
+        self.pending = 0
+
+    def get(self, device_id, body_hash):
+        row = self.connection.execute(
+            "SELECT items FROM pages WHERE device_id = ? AND body_hash = ?",
+            (device_id, body_hash),
+        ).fetchone()
+        return None if row is None else json.loads(zlib.decompress(row[0]))
+
+    def put(self, device_id, body_hash, items):
+        self.connection.execute(
+            "INSERT OR REPLACE INTO pages VALUES (?, ?, ?)",
+            (device_id, body_hash, zlib.compress(json.dumps(items).encode())),
+        )
+        self.pending += 1
+        if self.pending >= COMMIT_EVERY:
+            self.commit()
+
+    def commit(self):
+        self.connection.commit()
+        self.pending = 0
+
+    def close(self):
+        self.commit()
+        self.connection.close()
+
+
+class BodyHashMiddleware:
+    # Spider middleware that skips parsing of detail pages identical (after
+    # dropping VOLATILE_PATTERNS) to the last fetch of the same device, and
+    # emits the items stored from that fetch instead. The detail callbacks are
+    # generators, so leaving their output unconsumed means they never run.
+    # The hash covers the spider's and the page parsers' source code, so a
+    # parser change invalidates every stored page
+    def __init__(self, crawler, state_dir, ignore_patterns):
+        self.crawler = crawler
+        self.state_dir = state_dir
+        self.volatile = [
+            re.compile(pattern.encode(), re.DOTALL | re.IGNORECASE)
+            for pattern in VOLATILE_PATTERNS + list(ignore_patterns)
+        ]
+        self.store = None
+        self.parser_fingerprint = None
+        self.item_classes = {}
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        if not settings.getbool("PASSMARK_BODY_HASH_ENABLED"):
+            raise NotConfigured
+        middleware = cls(
+            crawler,
+            settings.get("PASSMARK_CRAWL_STATE_DIR") or CRAWL_STATE_DIR,
+            settings.getlist("PASSMARK_BODY_HASH_IGNORE"),
+        )
+        crawler.signals.connect(middleware.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(middleware.spider_closed, signal=signals.spider_closed)
+        return middleware
+
+    def spider_opened(self, spider):
+        if getattr(spider, "family", None) is None:
+            return
+        self.store = BodyHashStore(
+            os.path.join(self.state_dir, f"{spider.family}_pages.sqlite")
+        )
+        sources = inspect.getsource(sys.modules[type(spider).__module__])
+        sources += inspect.getsource(page_parsers)
+        self.parser_fingerprint = hashlib.sha1(sources.encode()).digest()
+
+    def spider_closed(self, spider):
+        if self.store is not None:
+            self.store.close()
+            self.store = None
+
+    def body_hash(self, body):
+        for pattern in self.volatile:
+            body = pattern.sub(b"", body)
+        body = WHITESPACE.sub(b" ", body)
+        return hashlib.sha1(self.parser_fingerprint + body).hexdigest()
+
+    async def process_spider_output(self, response, result):
+        device_id = self._device_id(response)
+        if device_id is None:
+            async for item_or_request in result:
+                yield item_or_request
+            return
+
+        body_hash = self.body_hash(response.body)
+        stored = self.store.get(device_id, body_hash)
+        stats = self.crawler.stats
+        if stored is not None:
+            await result.aclose()
+            stats.inc_value("passmark/body_hash/unchanged")
+            for class_path, fields in stored:
+                yield self._build_item(class_path, fields)
+            return
+
+        stats.inc_value("passmark/body_hash/parsed")
+        items = []
+        async for item_or_request in result:
+            if not hasattr(item_or_request, "fields"):
+                # Detail pages only yield items; anything else opts out
+                items = None
+            elif items is not None:
+                cls = type(item_or_request)
+                items.append(
+                    (f"{cls.__module__}.{cls.__qualname__}", dict(item_or_request))
+                )
+            yield item_or_request
+        if items is not None:
+            self.store.put(device_id, body_hash, items)
+
+    def _device_id(self, response):
+        if self.store is None or response.request is None:
+            return None
+        id_argument = getattr(self.crawler.spider, "id_argument", None)
+        return response.request.cb_kwargs.get(id_argument)
+
+    def _build_item(self, class_path, fields):
+        item_class = self.item_classes.get(class_path)
+        if item_class is None:
+            item_class = self.item_classes[class_path] = load_object(class_path)
+        # Item classes pre-fill every field, so values are set one by one
+        item = item_class()
+        for name, value in fields.items():
+            item[name] = value
+        return item
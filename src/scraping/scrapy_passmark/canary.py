@@ -0,0 +1,295 @@
+# Canary crawl: before a full crawl, fetch the list pages and a small sample of
+# detail pages (stratified by device class and id range) and compare what the
+# parsers get from them with the previous crawl's output for the same devices:
+#
+#     python -m scrapy_passmark.canary --spider cpu_spider --sample 40
+#
+# Markup changes show up as columns that are no longer filled, devices without
+# chart points, or list pages that no longer list the devices. Exits with
+# status 1 on such drift, so a scheduler can hold back the full crawl.
+
+# standard library imports
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+
+# third party imports
+
+# local imports
+from .constants import RAW_DATA_DIR
+from .schemas import SCHEMAS
+from .sharding import run_crawl, spider_family
+from .sinks import read_output
+
+SPIDERS = ["cpu_spider", "gpu_spider", "ram_spider", "hdd_ssd_spider"]
+# Device columns the sample is stratified by, besides the id quartile
+STRATA = {
+    "cpu": "cpu_class",
+    "gpu": "category",
+    "ram": "generation",
+    "hdd_ssd": None,
+}
+ID_BUCKETS = 4
+
+# Drift thresholds: share of the previously listed devices still listed, share
+# of sampled devices parsed, drop of a column's fill rate, share of sampled
+# devices with chart points before that have none now, and chart points now
+# against before
+MIN_LISTED = 0.9
+MIN_PARSED = 0.9
+MAX_FILL_DROP = 0.25
+MAX_MISSING_CHARTS = 0.25
+MIN_CHART_RATIO = 0.5
+
+
+def read_table(directory, family, table):
+    # A table in any sink format, all columns as text; empty if not written
+    import pandas as pd
+
+    df = read_output(directory, family, table)
+    if df is None:
+        return pd.DataFrame(columns=table.columns, dtype=str)
+    return df
+
+
+def stratified_sample(devices, family, size, seed=0):
+    # Ids spread over the strata in proportion to their size, at least one per
+    # stratum
+    column = STRATA[family]
+    ids = devices["id"].astype(int)
+    buckets = (
+        ids.rank(method="first", pct=True).mul(ID_BUCKETS).clip(upper=ID_BUCKETS - 0.5)
+    )
+    keys = buckets.astype(int).astype(str)
+    if column is not None:
+        keys = devices[column].astype(str) + "/" + keys
+    strata = sorted(ids.groupby(keys).apply(sorted).items())
+
+    rng = random.Random(seed)
+    total = len(ids)
+    sample = []
+    for _, members in strata:
+        share = max(1, round(size * len(members) / total))
+        sample.extend(rng.sample(members, min(share, len(members))))
+    rng.shuffle(sample)
+    sample = sample[:size]
+    # Rounding can leave room, which goes to devices of any stratum
+    rest = sorted(set(ids) - set(sample))
+    sample += rng.sample(rest, min(size - len(sample), len(rest)))
+    return sorted(sample)
+
+
+def _check(name, value, threshold, drift, baseline=None):
+    check = {"check": name, "value": round(float(value), 3), "threshold": threshold}
+    if baseline is not None:
+        check["baseline"] = round(float(baseline), 3)
+    check["drift"] = bool(drift)
+    return check
+
+
+def compare(family, baseline_dir, canary_dir, sample):
+    # Checks of the sampled devices' output against the baseline; a check with
+    # "drift": True fails the canary
+    checks = []
+    tables = SCHEMAS[family]
+    device_table = tables[0]
+    baseline = read_table(baseline_dir, family, device_table)
+    baseline = baseline[baseline["id"].astype(int).isin(sample)]
+    canary = read_table(canary_dir, family, device_table)
+    canary = canary[canary["id"].astype(int).isin(sample)]
+    checks.append(
+        _check(
+            "parsed",
+            len(canary) / len(sample),
+            MIN_PARSED,
+            len(canary) < MIN_PARSED * len(sample),
+        )
+    )
+    for column in device_table.columns:
+        before = (baseline[column] != "").mean() if len(baseline) else 0.0
+        after = (canary[column] != "").mean() if len(canary) else 0.0
+        if before == 0:
+            continue
+        checks.append(
+            _check(
+                f"fill:{column}",
+                after,
+                MAX_FILL_DROP,
+                after < before - MAX_FILL_DROP,
+                before,
+            )
+        )
+
+    for table in tables[1:]:
+        id_column = table.columns[0]
+        counts = {}
+        for name, directory in (("before", baseline_dir), ("after", canary_dir)):
+            df = read_table(directory, family, table)
+            ids = df[id_column].astype(int)
+            counts[name] = ids[ids.isin(sample)].value_counts()
+        before = counts["before"]
+        after = counts["after"].reindex(before.index, fill_value=0)
+        if not len(before):
+            continue
+        missing = (after == 0).mean()
+        ratio = after.sum() / before.sum()
+        checks.append(
+            _check(
+                f"missing:{table.name}",
+                missing,
+                MAX_MISSING_CHARTS,
+                missing > MAX_MISSING_CHARTS,
+            )
+        )
+        checks.append(
+            _check(
+                f"points:{table.name}", ratio, MIN_CHART_RATIO, ratio < MIN_CHART_RATIO
+            )
+        )
+    return checks
+
+
+def run_canary(
+    spider_name,
+    sample_size=40,
+    baseline_dir=None,
+    settings=None,
+    seed=0,
+    allow_no_baseline=False,
+):
+    family = spider_family(spider_name)
+    # By default the baseline is the output the full crawl would replace
+    baseline_dir = baseline_dir or (settings or {}).get("PASSMARK_OUTPUT_DIR")
+    baseline_dir = os.path.join(baseline_dir or RAW_DATA_DIR, family)
+    baseline = read_table(baseline_dir, family, SCHEMAS[family][0])
+    result = {"spider": spider_name, "family": family, "checks": []}
+    if not len(baseline):
+        # Nothing to compare with is no evidence the layout is fine: a failure
+        # unless explicitly allowed, e.g. for the first crawl
+        result.update(
+            status="no_baseline",
+            drift=not allow_no_baseline,
+            error=f"No devices in {baseline_dir}",
+        )
+        return result
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # Nothing of the canary may leak into the real outputs: output and
+        # crawl state go to scratch, and stored items of unchanged pages are
+        # not replayed, since the parsers are what is being checked
+        settings = {
+            **(settings or {}),
+            "PASSMARK_OUTPUT_DIR": os.path.join(tmp_dir, "output"),
+            "PASSMARK_OUTPUT_FORMAT": "jsonl",
+            "PASSMARK_OUTPUT_COMPRESSION": None,
+            "PASSMARK_CRAWL_STATE_DIR": os.path.join(tmp_dir, "state"),
+            "PASSMARK_BODY_HASH_ENABLED": False,
+            "PASSMARK_PRICE_ALERTS_ENABLED": False,
+            "PASSMARK_VALIDATION_ENABLED": False,
+        }
+        listed_path = os.path.join(tmp_dir, "listed.json")
+        if not run_crawl(spider_name, {"devices_out": listed_path}, settings):
+            result.update(status="list_failed", drift=True)
+            return result
+        with open(listed_path, encoding="utf-8") as f:
+            listed = dict((device_id, kwargs) for device_id, kwargs in json.load(f))
+
+        candidates = baseline[baseline["id"].astype(int).isin(listed)]
+        result["checks"].append(
+            _check(
+                "listed",
+                len(candidates) / len(baseline),
+                MIN_LISTED,
+                len(candidates) < MIN_LISTED * len(baseline),
+            )
+        )
+        if not len(candidates):
+            result.update(status="nothing_listed", drift=True)
+            return result
+
+        sample = stratified_sample(candidates, family, sample_size, seed)
+        devices_path = os.path.join(tmp_dir, "sample.json")
+        with open(devices_path, "w", encoding="utf-8") as f:
+            json.dump([[device_id, listed[device_id]] for device_id in sample], f)
+        if not run_crawl(spider_name, {"devices_in": devices_path}, settings):
+            result.update(status="crawl_failed", drift=True)
+            return result
+
+        result["checks"] += compare(
+            family, baseline_dir, os.path.join(tmp_dir, "output", family), sample
+        )
+    result["sample"] = sample
+    result["drift"] = any(check["drift"] for check in result["checks"])
+    result["status"] = "drift" if result["drift"] else "ok"
+    return result
+
+
+def _parse_settings(pairs):
+    settings = {}
+    for pair in pairs:
+        name, _, value = pair.partition("=")
+        settings[name] = value
+    return settings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Canary crawl for layout drift")
+    parser.add_argument("--spider", action="append", choices=SPIDERS)
+    parser.add_argument(
+        "--sample", type=int, default=40, help="detail pages per spider"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--baseline-dir",
+        help="output of the previous crawl (default: PASSMARK_OUTPUT_DIR or data/raw)",
+    )
+    parser.add_argument(
+        "-s",
+        dest="settings",
+        action="append",
+        default=[],
+        metavar="NAME=VALUE",
+        help="extra Scrapy setting for the crawls",
+    )
+    parser.add_argument(
+        "--allow-no-baseline",
+        action="store_true",
+        help="pass instead of fail when there is no previous output",
+    )
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    results = []
+    for spider_name in args.spider or SPIDERS:
+        result = run_canary(
+            spider_name,
+            args.sample,
+            args.baseline_dir,
+            _parse_settings(args.settings),
+            args.seed,
+            args.allow_no_baseline,
+        )
+        results.append(result)
+        print(f"{spider_name}: {result['status']}")
+        if "error" in result:
+            print(f"  {result['error']}")
+        for check in result["checks"]:
+            if check["drift"]:
+                baseline = check.get("baseline")
+                print(
+                    f"  {check['check']}: {check['value']}"
+                    + (f" (was {baseline})" if baseline is not None else "")
+                    + f", threshold {check['threshold']}"
+                )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    sys.exit(1 if any(result["drift"] for result in results) else 0)
+
+
+if __name__ == "__main__":
+    main()
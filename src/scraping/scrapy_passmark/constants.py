@@ -5,4 +5,6 @@ import os
 
 # local imports
 
-RAW_DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "..", "data", "raw")
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "..", "data")
+RAW_DATA_DIR = os.path.join(DATA_DIR, "raw")
+CRAWL_STATE_DIR = os.path.join(DATA_DIR, "crawl_state")
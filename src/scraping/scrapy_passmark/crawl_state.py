@@ -0,0 +1,121 @@
+# standard library imports
+import datetime as dt
+import json
+import math
+import os
+import re
+import time
+
+# third party imports
+
+# local imports
+
+
+def _parse_int(value):
+    try:
+        return int(str(value).replace(",", ""))
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_price_change_date(value):
+    match = re.search(r"\((\d{4}-\d{2}-\d{2})\)", str(value or ""))
+    return match.group(1) if match else None
+
+
+class CrawlState:
+    # Last fetch time, sample count and last price change of every device a
+    # family's spider has scraped, persisted as JSON between runs. Requests are
+    # prioritized so a crawl cut short (e.g. by CLOSESPIDER_TIMEOUT) has spent
+    # its time on the devices where a refresh matters most:
+    #
+    #   hours since the last fetch, capped at MAX_STALE_HOURS (and at the cap
+    #   for devices never fetched)
+    #   + SAMPLES_WEIGHT per power of ten of benchmark samples
+    #   + up to PRICE_CHANGE_BONUS for a price change within the last
+    #   PRICE_CHANGE_WINDOW_DAYS, fading linearly with its age
+    MAX_STALE_HOURS = 90 * 24
+    SAMPLES_WEIGHT = 100
+    PRICE_CHANGE_BONUS = 720
+    PRICE_CHANGE_WINDOW_DAYS = 30
+
+    # List pages come before every detail page, so new devices are found early
+    LIST_PRIORITY = 1_000_000
+
+    def __init__(self, path, devices=None):
+        self.path = path
+        self.devices = devices or {}
+
+    @classmethod
+    def load(cls, path):
+        devices = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                devices = json.load(f)
+        return cls(path, devices)
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.devices, f, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def record(self, device_id, num_samples, last_price_change, kwargs, now=None):
+        # kwargs are the detail callback's keyword arguments besides the id,
+        # needed to request the device again without its list page
+        self.devices.setdefault(str(device_id), {}).update(
+            {
+                "fetched": time.time() if now is None else now,
+                "samples": _parse_int(num_samples),
+                "price_changed": _parse_price_change_date(last_price_change),
+                "kwargs": kwargs,
+            }
+        )
+
+    def price_points(self):
+        # {device id: timestamp (ms) of the newest pricing history point seen}
+        return {
+            int(device_id): entry["price_point"]
+            for device_id, entry in self.devices.items()
+            if entry.get("price_point") is not None
+        }
+
+    def record_price_point(self, device_id, timestamp):
+        # Only for devices recorded by this or an earlier crawl
+        entry = self.devices.get(str(device_id))
+        if entry is not None and timestamp > (entry.get("price_point") or 0):
+            entry["price_point"] = timestamp
+
+    def priority(self, device_id, now=None):
+        now = time.time() if now is None else now
+        entry = self.devices.get(str(device_id))
+        if entry is None:
+            return self.MAX_STALE_HOURS
+
+        stale_hours = min((now - entry["fetched"]) / 3600, self.MAX_STALE_HOURS)
+        score = max(stale_hours, 0)
+        if entry["samples"]:
+            score += self.SAMPLES_WEIGHT * math.log10(1 + entry["samples"])
+        if entry["price_changed"]:
+            changed = dt.datetime.strptime(entry["price_changed"], "%Y-%m-%d")
+            age_days = (
+                now - changed.replace(tzinfo=dt.timezone.utc).timestamp()
+            ) / 86400
+            if age_days < self.PRICE_CHANGE_WINDOW_DAYS:
+                score += self.PRICE_CHANGE_BONUS * (
+                    1 - max(age_days, 0) / self.PRICE_CHANGE_WINDOW_DAYS
+                )
+        return int(score)
+
+    def known_devices(self, now=None):
+        # (device id, callback kwargs) of every recorded device, highest
+        # priority first
+        now = time.time() if now is None else now
+        device_ids = sorted(
+            self.devices, key=lambda device_id: -self.priority(device_id, now)
+        )
+        return [
+            (int(device_id), self.devices[device_id]["kwargs"])
+            for device_id in device_ids
+        ]
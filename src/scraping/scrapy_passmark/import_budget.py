@@ -0,0 +1,146 @@
+# Import-time budget of the project's startup paths, measured with
+# `python -X importtime` in a fresh interpreter per scenario:
+#
+#     python -m scrapy_passmark.import_budget
+#     python -m scrapy_passmark.import_budget --scenario crawl --budget crawl=800
+#
+# Exits with status 1 when a scenario's imports take longer than its budget.
+
+# standard library imports
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# third party imports
+
+# local imports
+
+PROJECT_DIR = os.path.join(os.path.dirname(__file__), "..")
+
+# Imports done by `scrapy list`, and by a crawl up to its first request: the
+# settings, one spider and every component class it enables
+SCENARIOS = {
+    "list": """
+from scrapy.cmdline import execute
+from scrapy.spiderloader import get_spider_loader
+from scrapy.utils.project import get_project_settings
+
+get_spider_loader(get_project_settings()).list()
+""",
+    "crawl": """
+from scrapy.crawler import CrawlerProcess
+from scrapy.spiderloader import get_spider_loader
+from scrapy.utils.conf import build_component_list
+from scrapy.utils.misc import load_object
+from scrapy.utils.project import get_project_settings
+
+settings = get_project_settings()
+spider_class = get_spider_loader(settings).load({spider!r})
+settings.setdict(spider_class.custom_settings or {{}}, priority="spider")
+for name in ("ADDONS", "DOWNLOADER_MIDDLEWARES", "SPIDER_MIDDLEWARES",
+             "EXTENSIONS", "ITEM_PIPELINES"):
+    for path in build_component_list(settings.getwithbase(name)):
+        load_object(path)
+""",
+}
+# Milliseconds of cumulative import time
+DEFAULT_BUDGETS = {"list": 700, "crawl": 900}
+
+
+def parse_importtime(stderr):
+    # [(module, self_us, cumulative_us, depth)] from -X importtime output
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        modules.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return modules
+
+
+def measure(scenario, spider="cpu_spider"):
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            SCENARIOS[scenario].format(spider=spider),
+        ],
+        cwd=PROJECT_DIR,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        check=True,
+    )
+    modules = parse_importtime(result.stderr)
+    top_level = [module for module in modules if module[3] == 0]
+    return {
+        "scenario": scenario,
+        "total_ms": round(sum(module[2] for module in top_level) / 1000, 1),
+        "num_modules": len(modules),
+        "heaviest": [
+            {"module": name, "cumulative_ms": round(cumulative / 1000, 1)}
+            for name, _, cumulative, _ in sorted(
+                top_level, key=lambda module: module[2], reverse=True
+            )[:5]
+        ],
+        "loaded": sorted({module[0].split(".")[0] for module in modules}),
+    }
+
+
+def _parse_budgets(pairs):
+    budgets = dict(DEFAULT_BUDGETS)
+    for pair in pairs:
+        name, _, value = pair.partition("=")
+        budgets[name] = float(value)
+    return budgets
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time budget check")
+    parser.add_argument("--scenario", action="append", choices=list(SCENARIOS))
+    parser.add_argument("--spider", default="cpu_spider")
+    parser.add_argument(
+        "--budget",
+        action="append",
+        default=[],
+        metavar="SCENARIO=MS",
+        help="override a scenario's budget",
+    )
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    budgets = _parse_budgets(args.budget)
+    results = []
+    over_budget = False
+    for scenario in args.scenario or SCENARIOS:
+        result = measure(scenario, args.spider)
+        result["budget_ms"] = budgets[scenario]
+        results.append(result)
+        over = result["total_ms"] > budgets[scenario]
+        over_budget |= over
+        heaviest = ", ".join(
+            f"{module['module']} {module['cumulative_ms']}ms"
+            for module in result["heaviest"]
+        )
+        print(
+            f"{scenario}: {result['total_ms']}ms of imports "
+            f"({result['num_modules']} modules), budget {budgets[scenario]}ms"
+            f"{' EXCEEDED' if over else ''}; heaviest: {heaviest}"
+        )
+        for heavy in ("pandas", "numpy", "pyarrow"):
+            if heavy in result["loaded"]:
+                print(f"  {heavy} is imported at startup")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    sys.exit(1 if over_budget else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+# standard library imports
+import json
+import os
+import resource
+import time
+import tracemalloc
+
+# third party imports
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from scrapy.utils.asyncio import create_looping_call
+from scrapy.utils.trackref import live_refs
+
+# local imports
+
+
+def current_rss():
+    # Resident set size in bytes; falls back to the peak where /proc is missing
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # ru_maxrss is in kilobytes on Linux, bytes on macOS
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _mb(num_bytes):
+    return round(num_bytes / 2**20, 2)
+
+
+def _allocations(statistics):
+    return [
+        {
+            "location": str(stat.traceback),
+            "size_mb": _mb(stat.size),
+            "size_diff_mb": _mb(getattr(stat, "size_diff", 0)),
+            "count": stat.count,
+        }
+        for stat in statistics
+    ]
+
+
+class MemoryProfiler:
+    # Samples, every PASSMARK_MEMORY_PROFILE_INTERVAL seconds, the RSS, the live
+    # instances of every trackref-tracked class (items, requests, responses,
+    # selectors), the records buffered in the item pipelines and optionally the
+    # top tracemalloc allocation sites. At spider_closed the timeline goes to a
+    # JSON report together with the allocation sites that grew the most
+    def __init__(self, crawler, interval, top, path, trace):
+        self.crawler = crawler
+        self.interval = interval
+        self.top = top
+        self.path = path
+        self.trace = trace
+        self.samples = []
+        self.baseline = None
+        self.started = None
+        self.task = None
+        # Whether tracing was started here, and so is ours to stop
+        self.started_tracing = False
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        if not settings.getbool("PASSMARK_MEMORY_PROFILE_ENABLED"):
+            raise NotConfigured
+        profiler = cls(
+            crawler,
+            settings.getfloat("PASSMARK_MEMORY_PROFILE_INTERVAL", 30.0),
+            settings.getint("PASSMARK_MEMORY_PROFILE_TOP", 10),
+            settings.get("PASSMARK_MEMORY_PROFILE_FILE"),
+            settings.getbool("PASSMARK_MEMORY_PROFILE_TRACEMALLOC", True),
+        )
+        crawler.signals.connect(profiler.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(profiler.spider_closed, signal=signals.spider_closed)
+        return profiler
+
+    def spider_opened(self, spider):
+        self.started = time.monotonic()
+        if self.trace and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracing = True
+        if self.trace:
+            self.baseline = tracemalloc.take_snapshot()
+        self.task = create_looping_call(self.sample)
+        self.task.start(self.interval, now=True)
+
+    def sample(self):
+        sample = {
+            "elapsed": round(time.monotonic() - self.started, 1),
+            "rss_mb": _mb(current_rss()),
+            "live_refs": {
+                cls.__name__: len(refs)
+                for cls, refs in sorted(
+                    live_refs.items(), key=lambda item: item[0].__name__
+                )
+                if len(refs)
+            },
+            "buffered_records": self.buffered_records(),
+        }
+        if self.trace:
+            current, peak = tracemalloc.get_traced_memory()
+            sample["traced_mb"] = _mb(current)
+            sample["traced_peak_mb"] = _mb(peak)
+            snapshot = tracemalloc.take_snapshot()
+            sample["top_allocations"] = _allocations(
+                snapshot.statistics("lineno")[: self.top]
+            )
+        self.samples.append(sample)
+        self.crawler.stats.max_value("passmark/memory/max_rss_mb", sample["rss_mb"])
+
+    def buffered_records(self):
+        # Records held by pipelines that buffer per table until they flush
+        engine = self.crawler.engine
+        pipelines = engine.scraper.itemproc.middlewares if engine else []
+        return {
+            table: len(records)
+            for pipeline in pipelines
+            for table, records in getattr(pipeline, "buffers", {}).items()
+        }
+
+    def spider_closed(self, spider, reason):
+        if self.task is not None and self.task.running:
+            self.task.stop()
+        self.sample()
+
+        report = {
+            "spider": spider.name,
+            "reason": reason,
+            "interval": self.interval,
+            "samples": self.samples,
+        }
+        if self.trace:
+            snapshot = tracemalloc.take_snapshot()
+            report["top_growth"] = _allocations(
+                snapshot.compare_to(self.baseline, "lineno")[: self.top]
+            )
+            if self.started_tracing:
+                tracemalloc.stop()
+
+        path = self.path or f"{spider.name}_memory_profile.json"
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        spider.logger.info("Memory profile written to %s", path)
@@ -0,0 +1,173 @@
+# End-to-end load test of the spiders against the mock server: starts
+# scrapy_passmark.mock.server, runs each spider in its own process (so peak
+# memory is per spider) and reports pages/sec, items and peak RSS:
+#
+#     python -m scrapy_passmark.mock.harness --devices 20000 --latency 20 \
+#         -s CONCURRENT_REQUESTS=32 -s CONCURRENT_REQUESTS_PER_DOMAIN=32
+
+# standard library imports
+import argparse
+import json
+import os
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+# third party imports
+
+# local imports
+
+SPIDERS = ["cpu_spider", "gpu_spider", "ram_spider", "hdd_ssd_spider"]
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_for_port(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Mock server did not start on port {port}")
+
+
+def run_spider(spider_name, settings):
+    # Runs in the child process; prints one JSON line of results
+    from scrapy.crawler import CrawlerProcess
+    from scrapy.utils.project import get_project_settings
+
+    project_settings = get_project_settings()
+    for name, value in settings.items():
+        project_settings.set(name, value, priority="cmdline")
+    process = CrawlerProcess(project_settings)
+    crawler = process.create_crawler(spider_name)
+    process.crawl(crawler)
+
+    start = time.perf_counter()
+    process.start()
+    elapsed = time.perf_counter() - start
+
+    stats = crawler.stats.get_stats()
+    pages = stats.get("response_received_count", 0)
+    result = {
+        "spider": spider_name,
+        "pages": pages,
+        "items": stats.get("item_scraped_count", 0),
+        "errors": stats.get("log_count/ERROR", 0),
+        "rejects": sum(
+            value
+            for name, value in stats.items()
+            if name.startswith("passmark/rejects/")
+        ),
+        "seconds": round(elapsed, 2),
+        "pages_per_second": round(pages / elapsed, 1) if elapsed else None,
+        # ru_maxrss is in kilobytes on Linux
+        "peak_rss_mb": round(
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1
+        ),
+        "finish_reason": stats.get("finish_reason"),
+    }
+    print(json.dumps(result))
+
+
+def _parse_settings(pairs):
+    settings = {}
+    for pair in pairs:
+        name, _, value = pair.partition("=")
+        settings[name] = value
+    return settings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Crawl the mock PassMark sites")
+    parser.add_argument("--spider", action="append", choices=SPIDERS)
+    parser.add_argument("--devices", type=int, default=5000, help="per family")
+    parser.add_argument("--latency", type=float, default=0.0, help="milliseconds")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--padding", type=int, default=0, help="bytes per page")
+    parser.add_argument(
+        "-s",
+        dest="settings",
+        action="append",
+        default=[],
+        metavar="NAME=VALUE",
+        help="extra Scrapy setting for the crawls",
+    )
+    parser.add_argument("--json", help="also write the results to this file")
+    parser.add_argument("--run-spider", help=argparse.SUPPRESS)
+    parser.add_argument("--settings-json", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_spider:
+        run_spider(args.run_spider, json.loads(args.settings_json))
+        return
+
+    port = _free_port()
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "scrapy_passmark.mock.server",
+            f"--port={port}",
+            f"--devices={args.devices}",
+            f"--latency={args.latency}",
+            f"--error-rate={args.error_rate}",
+            f"--padding={args.padding}",
+        ],
+        stderr=subprocess.DEVNULL,
+    )
+    results = []
+    try:
+        _wait_for_port(port)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            # Output and crawl state go to a scratch directory, never data/
+            settings = {
+                "PASSMARK_MOCK_SERVER": f"http://127.0.0.1:{port}",
+                "PASSMARK_OUTPUT_DIR": os.path.join(tmp_dir, "output"),
+                "PASSMARK_CRAWL_STATE_DIR": os.path.join(tmp_dir, "crawl_state"),
+                "LOG_LEVEL": "WARNING",
+                "CLOSESPIDER_ERRORCOUNT": 0,
+                **_parse_settings(args.settings),
+            }
+            for spider_name in args.spider or SPIDERS:
+                output = subprocess.run(
+                    [
+                        sys.executable,
+                        "-m",
+                        "scrapy_passmark.mock.harness",
+                        f"--run-spider={spider_name}",
+                        f"--settings-json={json.dumps(settings)}",
+                    ],
+                    stdout=subprocess.PIPE,
+                    text=True,
+                    check=True,
+                ).stdout
+                result = json.loads(output.strip().splitlines()[-1])
+                results.append(result)
+                print(
+                    f"{result['spider']}: {result['pages']} pages, "
+                    f"{result['items']} items in {result['seconds']}s "
+                    f"({result['pages_per_second']} pages/s), "
+                    f"peak RSS {result['peak_rss_mb']} MB, "
+                    f"{result['errors']} errors, {result['rejects']} rejects"
+                )
+    finally:
+        server.terminate()
+        server.wait()
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+# standard library imports
+from urllib.parse import urlsplit
+
+# third party imports
+from scrapy.exceptions import NotConfigured
+
+# local imports
+from .pages import SITES
+
+MIDDLEWARE = "scrapy_passmark.mock.middleware.MockServerMiddleware"
+
+
+class MockServer:
+    # Add-on enabling MockServerMiddleware when PASSMARK_MOCK_SERVER is set.
+    # It runs right after the offsite check (50), so allowed_domains still
+    # applies to the real hosts
+    def update_settings(self, settings):
+        if settings.get("PASSMARK_MOCK_SERVER"):
+            settings["DOWNLOADER_MIDDLEWARES"][MIDDLEWARE] = 60
+
+
+class MockServerMiddleware:
+    # Sends requests for the PassMark sites to the mock server instead, as
+    # <server>/<host><path>?<query>
+    def __init__(self, server_url):
+        self.server_url = server_url.rstrip("/")
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        server_url = crawler.settings.get("PASSMARK_MOCK_SERVER")
+        if not server_url:
+            raise NotConfigured
+        return cls(server_url)
+
+    def process_request(self, request, spider):
+        url = urlsplit(request.url)
+        if url.hostname not in SITES:
+            return None
+        # The rewritten request is scheduled again; dont_filter keeps it from
+        # being dropped as offsite or as a duplicate of itself
+        return request.replace(
+            url=f"{self.server_url}/{url.hostname}{url.path}?{url.query}",
+            dont_filter=True,
+        )
@@ -0,0 +1,299 @@
+# standard library imports
+import datetime as dt
+import html
+import random
+
+# third party imports
+
+# local imports
+
+# Host -> family, and each family's list pages (path -> RAM generation)
+SITES = {
+    "www.cpubenchmark.net": "cpu",
+    "www.videocardbenchmark.net": "gpu",
+    "www.memorybenchmark.net": "ram",
+    "www.harddrivebenchmark.net": "hdd_ssd",
+}
+LIST_PAGES = {
+    "cpu": {"/cpu_list.php": None},
+    "gpu": {"/gpu_list.php": None},
+    "ram": {
+        "/ram_list-ddr2.php": "DDR2",
+        "/ram_list-ddr3.php": "DDR3",
+        "/ram_list-ddr4.php": "DDR4",
+        "/ram_list.php": "DDR5",
+    },
+    "hdd_ssd": {"/hdd_list.php": None},
+}
+DETAIL_PAGES = {
+    "cpu": "/cpu.php",
+    "gpu": "/gpu.php",
+    "ram": "/ram.php",
+    "hdd_ssd": "/hdd.php",
+}
+LOOKUP_PAGES = {
+    "cpu": "cpu_lookup.php?cpu",
+    "gpu": "video_lookup.php?gpu",
+    "ram": "ram.php?ram",
+    "hdd_ssd": "hdd_lookup.php?hdd",
+}
+NAME_PREFIXES = {
+    "cpu": ["Intel Core i", "AMD Ryzen ", "Intel Xeon E", "AMD EPYC "],
+    "gpu": ["GeForce RTX ", "Radeon RX ", "Intel Arc A", "Quadro P"],
+    "ram": ["Corsair CMK", "Kingston KF", "G.Skill F4-", "Crucial CT"],
+    "hdd_ssd": ["Samsung SSD ", "WDC WD", "Seagate ST", "Crucial CT"],
+}
+RAM_GENERATIONS = list(LIST_PAGES["ram"].values())
+FIRST_PRICE_DATE = dt.datetime(2012, 1, 1, tzinfo=dt.timezone.utc)
+
+
+def generation_of(device_id):
+    return RAM_GENERATIONS[device_id % len(RAM_GENERATIONS)]
+
+
+def device_name(family, device_id):
+    prefixes = NAME_PREFIXES[family]
+    return f"{prefixes[device_id % len(prefixes)]}{1000 + device_id}"
+
+
+def _grouped(value):
+    return f"{value:,}"
+
+
+def _date(rng):
+    return (FIRST_PRICE_DATE + dt.timedelta(days=rng.randrange(4800))).strftime(
+        "%Y-%m-%d"
+    )
+
+
+def _paragraphs(fields):
+    return "".join(
+        f"<p><strong>{label}</strong>&nbsp;&nbsp;{html.escape(value)}</p>"
+        for label, value in fields
+    )
+
+
+def _ratings(ratings):
+    return "<br>".join(
+        f'<span>{label}</span><span>:</span> <span class="count">{value}</span>'
+        for label, value in ratings
+    )
+
+
+def _test_suite(rows):
+    return "".join(f"<tr><th>{name}</th><td>{value}</td></tr>" for name, value in rows)
+
+
+def _price_script(rng):
+    # Weekly-ish price points, as in the site's dataArray.push chart scripts
+    timestamp = int(FIRST_PRICE_DATE.timestamp() * 1000) + rng.randrange(10**11)
+    price = rng.uniform(20, 2000)
+    pushes = []
+    for _ in range(rng.randrange(40)):
+        timestamp += rng.randrange(86400000, 40 * 86400000)
+        price = max(price * rng.uniform(0.9, 1.1), 1)
+        pushes.append(f"dataArray.push({{x: {timestamp}, y: {price:.2f}}});")
+    return (
+        '<script>var chartLabel = "Price"; var dataArray = [];'
+        + "".join(pushes)
+        + "</script>"
+    )
+
+
+def _distribution_script(rng, mark):
+    width = max(mark // 50, 1)
+    start = max(mark - 50 * width, 0)
+    points = ", ".join(
+        f"{{x: {start + i * width}, y: {max(int(rng.gauss(50, 30) * (1 - abs(i - 50) / 50)), 0)}}}"
+        for i in range(100)
+    )
+    return f"<script>var distributionData = {{dataPoints: [{points}]}};</script>"
+
+
+def _price_change(rng):
+    if rng.random() < 0.5:
+        return "NA"
+    return f"${rng.uniform(20, 2000):,.2f} USD ({_date(rng)})"
+
+
+def _cpu(rng, device_id):
+    mark = rng.randrange(500, 90000)
+    cores = rng.choice([2, 4, 6, 8, 12, 16, 32, 64])
+    description = [
+        ("Class:", rng.choice(["Desktop", "Laptop", "Server", "Mobile/Embedded"])),
+        ("Socket:", rng.choice(["LGA1700", "AM5", "AM4", "FCLGA4677"])),
+        ("Clockspeed:", f"{rng.uniform(1.5, 4.5):.1f} GHz"),
+        ("Turbo Speed:", f"{rng.uniform(3.0, 6.0):.1f} GHz"),
+        ("Cores:", str(cores)),
+        ("Threads:", str(cores * 2)),
+        ("Typical TDP:", f"{rng.choice([15, 35, 65, 95, 125, 280])} W"),
+        ("Memory Support:", "DDR5-5600"),
+    ]
+    footer = [
+        ("Other names:", device_name("cpu", device_id) + " CPU"),
+        (
+            "CPU First Seen on Charts:",
+            f"Q{rng.randrange(1, 5)} {rng.randrange(2008, 2026)}",
+        ),
+        ("CPUmark/$Price:", f"{rng.uniform(1, 200):.2f}"),
+        ("Overall Rank:", f"{rng.randrange(1, 6000)}th fastest in multithreading"),
+        ("Last Price Change:", _price_change(rng)),
+    ]
+    ratings = [
+        ("Multithread Rating", mark),
+        ("Single Thread Rating", rng.randrange(300, 5000)),
+        ("Samples:", f"{rng.randrange(1, 50000)}*"),
+        ("Margin for error", rng.choice(["Low", "Medium", "High"])),
+    ]
+    test_suite = [
+        ("Integer Math", f"{_grouped(rng.randrange(1000, 900000))} MOps/Sec"),
+        ("Floating Point Math", f"{_grouped(rng.randrange(1000, 500000))} MOps/Sec"),
+        ("Find Prime Numbers", f"{rng.randrange(5, 900)} Million Primes/Sec"),
+        ("Random String Sorting", f"{rng.randrange(1, 300)} Thousand Strings/Sec"),
+        ("Data Encryption", f"{_grouped(rng.randrange(100, 90000))} MBytes/Sec"),
+        ("Data Compression", f"{_grouped(rng.randrange(1000, 900000))} KBytes/Sec"),
+        ("Physics", f"{rng.randrange(50, 9000)} Frames/Sec"),
+        (
+            "Extended Instructions",
+            f"{_grouped(rng.randrange(1000, 90000))} Million Matrices/Sec",
+        ),
+    ]
+    gaming_score = _grouped(rng.randrange(100, 5000))
+    return "div", description, footer, ratings, test_suite, mark, gaming_score
+
+
+def _gpu(rng, device_id):
+    mark = rng.randrange(50, 40000)
+    description = [
+        ("Bus Interface:", rng.choice(["PCIe 4.0 x16", "PCIe 3.0 x16"])),
+        ("Max Memory Size:", f"{rng.choice([2048, 4096, 8192, 16384])} MB"),
+        ("Core Clock(s):", f"{rng.randrange(800, 2500)} MHz"),
+        ("Memory Clock(s):", f"{rng.randrange(1000, 2500)} MHz"),
+        ("DirectX:", "12"),
+        ("OpenGL:", "4.6"),
+        ("Max TDP:", f"{rng.randrange(30, 450)} W"),
+        ("Videocard Category:", rng.choice(["Desktop", "Mobile", "Workstation"])),
+    ]
+    footer = [
+        ("Other names:", device_name("gpu", device_id) + " Graphics"),
+        ("Videocard First Benchmarked:", _date(rng)),
+        ("G3DMark/Price:", f"{rng.uniform(1, 100):.2f}"),
+        ("Overall Rank:", str(rng.randrange(1, 3000))),
+        ("Last Price Change:", _price_change(rng)),
+    ]
+    ratings = [
+        ("Average G3D Mark", mark),
+        ("Average G2D Mark:", rng.randrange(50, 1500)),
+        ("Samples:", f"{rng.randrange(1, 50000)}*"),
+    ]
+    test_suite = [
+        ("DirectX 9", f"{rng.randrange(10, 500)} Frames/Sec"),
+        ("DirectX 10", f"{rng.randrange(10, 500)} Frames/Sec"),
+        ("DirectX 11", f"{rng.randrange(10, 500)} Frames/Sec"),
+        ("DirectX 12", f"{rng.randrange(10, 500)} Frames/Sec"),
+        ("GPU Compute", f"{rng.randrange(100, 30000)} Ops/Sec"),
+    ]
+    return "em", description, footer, ratings, test_suite, mark, None
+
+
+def _ram(rng, device_id):
+    description = [
+        ("Description:", f"PC4-{rng.choice([17000, 19200, 21300, 25600])}, 1.2V"),
+    ]
+    footer = [
+        ("Other names:", device_name("ram", device_id) + " Module"),
+        ("Memory First Benchmarked:", _date(rng)),
+        ("Last Price Change:", _price_change(rng)),
+    ]
+    ratings = [
+        ("Average Mark", rng.randrange(500, 4000)),
+        ("Samples:", f"{rng.randrange(1, 20000)}*"),
+    ]
+    test_suite = [
+        ("Database Operations", f"{_grouped(rng.randrange(500, 9000))} KOps/Sec"),
+        ("Memory Read Cached", f"{_grouped(rng.randrange(5000, 60000))} MBytes/Sec"),
+        ("Memory Read Uncached", f"{_grouped(rng.randrange(5000, 60000))} MBytes/Sec"),
+        ("Memory Write", f"{_grouped(rng.randrange(5000, 60000))} MBytes/Sec"),
+        ("Latency", f"{rng.randrange(15, 90)} ns (lower is better)"),
+        ("Memory Threaded", f"{_grouped(rng.randrange(10000, 120000))} MBytes/Sec"),
+    ]
+    return "em", description, footer, ratings, test_suite, None, None
+
+
+def _hdd_ssd(rng, device_id):
+    description = [
+        ("Description:", rng.choice(['SATA 3 2.5"', "NVMe PCIe 4.0 x4", 'SATA 3.5"'])),
+        ("Drive Size:", f"{rng.uniform(100, 4000):.1f} GB"),
+    ]
+    footer = [
+        ("Other names:", device_name("hdd_ssd", device_id) + " Drive"),
+        ("Drive First Benchmarked:", _date(rng)),
+        ("Drive Rating/$Price:", f"{rng.uniform(1, 400):.2f}"),
+        ("Overall Rank:", str(rng.randrange(1, 15000))),
+        ("Last Price Change:", _price_change(rng)),
+    ]
+    ratings = [
+        ("Average Drive Rating", rng.randrange(100, 60000)),
+        ("Samples:", f"{rng.randrange(1, 5000)}*"),
+    ]
+    test_suite = [
+        ("Sequential Read", f"{_grouped(rng.randrange(100, 7000))} MBytes/Sec"),
+        ("Sequential Write", f"{_grouped(rng.randrange(100, 7000))} MBytes/Sec"),
+        (
+            "Random Seek Read Write (IOPS 32KQD20)",
+            f"{_grouped(rng.randrange(1, 3000))} MBytes/Sec",
+        ),
+        ("IOPS 4KQD1", f"{rng.randrange(1, 90)} MBytes/Sec"),
+    ]
+    return "em", description, footer, ratings, test_suite, None, None
+
+
+FAMILY_BUILDERS = {"cpu": _cpu, "gpu": _gpu, "ram": _ram, "hdd_ssd": _hdd_ssd}
+
+
+def detail_page(family, device_id, seed=0, padding=0):
+    # The same markup the spiders read off the real detail pages, with values
+    # drawn from a generator seeded by (seed, family, id), so every request for
+    # a device gets the same page. padding adds that many bytes of filler to
+    # bring the page size closer to the real ones (~100 KB)
+    rng = random.Random(f"{seed}:{family}:{device_id}")
+    main_tag, description, footer, ratings, test_suite, mark, gaming_score = (
+        FAMILY_BUILDERS[family](rng, device_id)
+    )
+
+    scripts = [_price_script(rng)]
+    if mark is not None:
+        scripts.append(_distribution_script(rng, mark))
+    gaming_table = ""
+    if gaming_score is not None:
+        gaming_table = (
+            '<table id="gamescoreChart"><tr><td class="value-cifre" '
+            f'style="background: #E2EDF4;">{gaming_score}</td></tr></table>'
+        )
+    filler = f"<!-- {'x' * padding} -->" if padding else ""
+
+    return (
+        "<!DOCTYPE html><html><head><title>PassMark</title>"
+        f"{''.join(scripts)}</head><body>"
+        '<div class="desc"><div class="desc-body"><div class="desc-header">'
+        f'<span class="cpuname">{html.escape(device_name(family, device_id))}</span>'
+        f'</div><{main_tag} class="left-desc-cpu">{_paragraphs(description)}'
+        f'</{main_tag}><div class="desc-foot">{_paragraphs(footer)}</div></div>'
+        f'<div class="right-desc">{_ratings(ratings)}</div></div>'
+        f'<table id="test-suite-results">{_test_suite(test_suite)}</table>'
+        f"{gaming_table}{filler}</body></html>"
+    )
+
+
+def list_page(family, device_ids):
+    lookup = LOOKUP_PAGES[family]
+    rows = []
+    for device_id in device_ids:
+        name = html.escape(device_name(family, device_id))
+        link = f"{lookup}={name.replace(' ', '+')}&amp;id={device_id}"
+        price_link = "" if family == "cpu" else f'<td><a href="{link}#price">$</a></td>'
+        rows.append(f'<tr><td><a href="{link}">{name}</a></td>{price_link}</tr>')
+    return (
+        "<!DOCTYPE html><html><head><title>PassMark</title></head><body>"
+        f'<table class="cpulist">{"".join(rows)}</table></body></html>'
+    )
@@ -0,0 +1,199 @@
+# Local stand-in for the four PassMark sites, for crawling offline:
+#
+#     python -m scrapy_passmark.mock.server --devices 100000 --latency 50
+#     scrapy crawl cpu_spider -s PASSMARK_MOCK_SERVER=http://127.0.0.1:8900
+#
+# Pages are addressed as /<host><path>?<query>, which is where
+# MockServerMiddleware sends the spiders' requests.
+
+# standard library imports
+import argparse
+import asyncio
+import logging
+import random
+from collections import OrderedDict
+from urllib.parse import parse_qs, urlsplit
+
+# third party imports
+
+# local imports
+from ..parser_equivalence import iter_cached_responses
+from .pages import (
+    DETAIL_PAGES,
+    LIST_PAGES,
+    SITES,
+    detail_page,
+    generation_of,
+    list_page,
+)
+
+logger = logging.getLogger(__name__)
+
+STATUS_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 503: "Busy"}
+MAX_HEADER_BYTES = 16 * 1024
+
+
+class MockPassMarkServer:
+    # Serves list pages of `devices` synthetic devices per family (ids 1..N)
+    # and their detail pages. Recorded pages from an HTTPCACHE_DIR take
+    # precedence over synthesized ones. Every response waits `latency` seconds
+    # (+-50% jitter) and fails with a 503 with probability `error_rate`
+    def __init__(
+        self,
+        devices=5000,
+        latency=0.0,
+        error_rate=0.0,
+        seed=0,
+        padding=0,
+        cache_dir=None,
+        cache_size=1024,
+    ):
+        self.devices = devices
+        self.latency = latency
+        self.error_rate = error_rate
+        self.seed = seed
+        self.padding = padding
+        self.random = random.Random(seed)
+        self.recorded = {}
+        if cache_dir:
+            for response in iter_cached_responses(cache_dir):
+                url = urlsplit(response.url)
+                self.recorded[(url.hostname, url.path, url.query)] = response.body
+        # Detail pages are cheap to rebuild, list pages are not
+        self.list_pages = {}
+        self.detail_cache = OrderedDict()
+        self.cache_size = cache_size
+        self.num_requests = 0
+
+    async def serve(self, host="127.0.0.1", port=8900):
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        logger.info(
+            "Mock PassMark sites with %d devices each on http://%s:%s",
+            self.devices,
+            host,
+            port,
+        )
+        async with server:
+            await server.serve_forever()
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except asyncio.LimitOverrunError:
+                    writer.write(self.build_response(400, b"", True))
+                    break
+                if len(head) > MAX_HEADER_BYTES:
+                    writer.write(self.build_response(400, b"", True))
+                    break
+
+                lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = lines[0].split(" ", 2)
+                except ValueError:
+                    writer.write(self.build_response(400, b"", True))
+                    break
+                close = any(
+                    line.lower().replace(" ", "") == "connection:close"
+                    for line in lines[1:]
+                )
+
+                self.num_requests += 1
+                if self.latency:
+                    await asyncio.sleep(self.latency * self.random.uniform(0.5, 1.5))
+                if self.error_rate and self.random.random() < self.error_rate:
+                    status, body = 503, b""
+                else:
+                    status, body = self.page(target)
+                if method == "HEAD":
+                    body = b""
+                writer.write(self.build_response(status, body, close))
+                await writer.drain()
+                if close:
+                    break
+        finally:
+            writer.close()
+
+    def build_response(self, status, body, close):
+        head = (
+            f"HTTP/1.1 {status} {STATUS_REASONS[status]}\r\n"
+            "Content-Type: text/html; charset=UTF-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'close' if close else 'keep-alive'}\r\n\r\n"
+        )
+        return head.encode("latin-1") + body
+
+    def page(self, target):
+        # /<host><path>?<query>
+        url = urlsplit(target)
+        host, _, path = url.path.lstrip("/").partition("/")
+        path = "/" + path
+        recorded = self.recorded.get((host, path, url.query))
+        if recorded is not None:
+            return 200, recorded
+
+        family = SITES.get(host)
+        if family is None:
+            return 404, b""
+        if path in LIST_PAGES[family]:
+            key = (family, path)
+            if key not in self.list_pages:
+                self.list_pages[key] = self.build_list_page(family, path).encode()
+            return 200, self.list_pages[key]
+        if path == DETAIL_PAGES[family]:
+            try:
+                device_id = int(parse_qs(url.query)["id"][0])
+            except (KeyError, ValueError):
+                return 400, b""
+            if not 1 <= device_id <= self.devices:
+                return 404, b""
+            return 200, self.cached_detail_page(family, device_id)
+        return 404, b""
+
+    def build_list_page(self, family, path):
+        device_ids = range(1, self.devices + 1)
+        generation = LIST_PAGES[family][path]
+        if generation is not None:
+            device_ids = [i for i in device_ids if generation_of(i) == generation]
+        return list_page(family, device_ids)
+
+    def cached_detail_page(self, family, device_id):
+        key = (family, device_id)
+        body = self.detail_cache.get(key)
+        if body is None:
+            body = detail_page(family, device_id, self.seed, self.padding).encode()
+            self.detail_cache[key] = body
+            if len(self.detail_cache) > self.cache_size:
+                self.detail_cache.popitem(last=False)
+        return body
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock PassMark sites")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--devices", type=int, default=5000, help="per family")
+    parser.add_argument("--latency", type=float, default=0.0, help="milliseconds")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--padding", type=int, default=0, help="bytes per page")
+    parser.add_argument("--cache-dir", help="HTTPCACHE_DIR of recorded pages")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    server = MockPassMarkServer(
+        args.devices,
+        args.latency / 1000,
+        args.error_rate,
+        args.seed,
+        args.padding,
+        args.cache_dir,
+    )
+    asyncio.run(server.serve(args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
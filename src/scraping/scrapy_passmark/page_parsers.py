@@ -0,0 +1,107 @@
+# standard library imports
+from functools import lru_cache
+
+# third party imports
+from lxml import etree
+from lxml.html import HTMLParser
+from parsel.csstranslator import css2xpath
+from parsel.selector import create_root_node
+
+# local imports
+
+# Both backends expose the same raw fragments of a PassMark detail page, so the
+# spiders build identical items whichever one is used:
+#
+#   name                   text of the device name header (or None)
+#   description_paragraphs HTML of each <p> in the description blocks
+#   ratings_texts          every text node of the ratings panel
+#   test_suite_rows        (th text, td text) of each test suite table row
+#   has_gaming_score       whether the gaming score table is present
+#   gaming_score           text of the highlighted gaming score cell (or None)
+#   scripts                HTML of every <script> element
+
+DESC_BODY_CSS = "div.desc > div.desc-body"
+NAME_CSS = "div.desc-header > span.cpuname::text"
+RATINGS_CSS = "div.desc > div.right-desc"
+TEST_SUITE_CSS = "table[id='test-suite-results']"
+GAMING_SCORE_CSS = "table[id='gamescoreChart']"
+GAMING_SCORE_VALUE_CSS = "td.value-cifre[style='background: #E2EDF4;']::text"
+
+
+class ParselDetailPage:
+    def __init__(self, response, main_desc_css):
+        desc_body = response.css(DESC_BODY_CSS)
+        self.name = desc_body.css(NAME_CSS).get()
+        self.description_paragraphs = desc_body.css(main_desc_css).css("p").getall()
+        self.ratings_texts = response.css(RATINGS_CSS).css("::text").getall()
+        self.test_suite_rows = [
+            (row.css("th::text").get(), row.css("td::text").get())
+            for row in response.css(TEST_SUITE_CSS).css("tr")
+        ]
+
+        gaming_score_table = response.css(GAMING_SCORE_CSS)
+        self.has_gaming_score = bool(gaming_score_table)
+        self.gaming_score = gaming_score_table.css(GAMING_SCORE_VALUE_CSS).get()
+
+        self.scripts = response.css("script").getall()
+
+
+@lru_cache(maxsize=None)
+def _compiled(css):
+    # Same CSS to XPath translation parsel uses, compiled once per process
+    return etree.XPath(css2xpath(css), smart_strings=False)
+
+
+def _select(elements, css):
+    xpath = _compiled(css)
+    return [result for element in elements for result in xpath(element)]
+
+
+def _first(results):
+    return results[0] if results else None
+
+
+def _serialize(element):
+    return etree.tostring(element, method="html", encoding="unicode", with_tail=False)
+
+
+class LxmlDetailPage:
+    # Walks a bare lxml tree with precompiled XPath expressions, skipping the
+    # per-node Selector objects and repeated query dispatch of parsel
+    def __init__(self, response, main_desc_css):
+        root = create_root_node(response.text, HTMLParser, base_url=response.url)
+        roots = [root]
+
+        desc_body = _select(roots, DESC_BODY_CSS)
+        self.name = _first(_select(desc_body, NAME_CSS))
+        self.description_paragraphs = [
+            _serialize(p) for p in _select(_select(desc_body, main_desc_css), "p")
+        ]
+        self.ratings_texts = _select(_select(roots, RATINGS_CSS), "::text")
+        self.test_suite_rows = [
+            (_first(_select([row], "th::text")), _first(_select([row], "td::text")))
+            for row in _select(_select(roots, TEST_SUITE_CSS), "tr")
+        ]
+
+        gaming_score_table = _select(roots, GAMING_SCORE_CSS)
+        self.has_gaming_score = bool(gaming_score_table)
+        self.gaming_score = _first(_select(gaming_score_table, GAMING_SCORE_VALUE_CSS))
+
+        self.scripts = [_serialize(script) for script in _select(roots, "script")]
+
+
+PARSER_BACKENDS = {
+    "parsel": ParselDetailPage,
+    "lxml": LxmlDetailPage,
+}
+
+
+def build_detail_page(response, main_desc_css, backend="parsel"):
+    try:
+        page_class = PARSER_BACKENDS[backend]
+    except KeyError:
+        raise ValueError(
+            f"Unknown parser backend {backend!r}, expected one of "
+            f"{sorted(PARSER_BACKENDS)}"
+        )
+    return page_class(response, main_desc_css)
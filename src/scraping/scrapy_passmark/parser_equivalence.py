@@ -0,0 +1,155 @@
+# Checks the parser backends against the items the spiders built before the
+# page_parsers refactor, recorded in fixtures/parser_reference for a small
+# corpus of detail pages, and optionally that every backend yields identical
+# items for the recorded detail pages of a crawl, i.e. the HTTPCACHE_DIR of a
+# crawl run with HTTPCACHE_ENABLED = True:
+#
+#     python -m scrapy_passmark.parser_equivalence .scrapy/httpcache
+
+# standard library imports
+import argparse
+import json
+import os
+import pickle
+import sys
+import time
+from urllib.parse import parse_qs, urlparse
+
+# third party imports
+from scrapy.http import Headers, HtmlResponse
+from scrapy.responsetypes import responsetypes
+from scrapy.settings import Settings
+from w3lib.http import headers_raw_to_dict
+
+# local imports
+from .page_parsers import PARSER_BACKENDS
+from .spiders.cpu_spider import CPUSpider
+from .spiders.gpu_spider import GPUSpider
+from .spiders.hdd_ssd_spider import HDDSSDSpider
+from .spiders.ram_spider import RAMSpider
+
+REFERENCE_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "parser_reference")
+
+# Detail page path -> (spider, callback name, id keyword argument)
+DETAIL_PAGES = {
+    "/cpu.php": (CPUSpider, "parse_cpu", "cpu_id"),
+    "/gpu.php": (GPUSpider, "parse_gpu", "gpu_id"),
+    "/ram.php": (RAMSpider, "parse_ram", "ram_id"),
+    "/hdd.php": (HDDSSDSpider, "parse_hdd_ssd", "hdd_ssd_id"),
+}
+
+
+def iter_cached_responses(cache_dir):
+    # Layout of scrapy.extensions.httpcache.FilesystemCacheStorage
+    for dirpath, _, filenames in os.walk(cache_dir):
+        if "pickled_meta" not in filenames:
+            continue
+        with open(os.path.join(dirpath, "pickled_meta"), "rb") as f:
+            meta = pickle.load(f)
+        with open(os.path.join(dirpath, "response_headers"), "rb") as f:
+            headers = Headers(headers_raw_to_dict(f.read()))
+        with open(os.path.join(dirpath, "response_body"), "rb") as f:
+            body = f.read()
+
+        url = meta["response_url"]
+        response_class = responsetypes.from_args(headers=headers, url=url, body=body)
+        yield response_class(url=url, headers=headers, status=meta["status"], body=body)
+
+
+def iter_reference_pages(reference_dir=REFERENCE_DIR):
+    # (response, items) of each page of the corpus, the items as built by the
+    # inline response.css extraction the spiders had before page_parsers
+    with open(os.path.join(reference_dir, "items.json"), encoding="utf-8") as f:
+        expected = json.load(f)
+    for filename, page in sorted(expected.items()):
+        with open(os.path.join(reference_dir, filename), "rb") as f:
+            body = f.read()
+        response = HtmlResponse(url=page["url"], body=body, encoding="utf-8")
+        yield response, page["items"]
+
+
+def parse_with_backend(response, backend):
+    url = urlparse(response.url)
+    spider_class, callback_name, id_argument = DETAIL_PAGES[url.path]
+    spider = spider_class()
+    spider.settings = Settings({"PASSMARK_PARSER_BACKEND": backend})
+
+    kwargs = {id_argument: int(parse_qs(url.query)["id"][0])}
+    if spider_class is RAMSpider:
+        # The generation comes from the list page, not the detail page
+        kwargs["generation"] = None
+    callback = getattr(spider, callback_name)
+    return [(type(item).__name__, dict(item)) for item in callback(response, **kwargs)]
+
+
+def compare_to_reference(reference_dir=REFERENCE_DIR, backends=tuple(PARSER_BACKENDS)):
+    num_pages = 0
+    mismatches = []
+    for response, expected in iter_reference_pages(reference_dir):
+        num_pages += 1
+        for backend in backends:
+            try:
+                # Through JSON, like the recorded items
+                items = json.loads(json.dumps(parse_with_backend(response, backend)))
+            except Exception as e:
+                items = f"{type(e).__name__}: {e}"
+            if items != expected:
+                mismatches.append((response.url, "reference", backend))
+    return num_pages, mismatches
+
+
+def compare_backends(responses, backends=tuple(PARSER_BACKENDS)):
+    num_pages = 0
+    mismatches = []
+    timings = {backend: 0.0 for backend in backends}
+    for response in responses:
+        if urlparse(response.url).path not in DETAIL_PAGES:
+            continue
+        num_pages += 1
+
+        results = {}
+        for backend in backends:
+            start = time.perf_counter()
+            try:
+                results[backend] = parse_with_backend(response, backend)
+            except Exception as e:
+                results[backend] = f"{type(e).__name__}: {e}"
+            timings[backend] += time.perf_counter() - start
+
+        reference = results[backends[0]]
+        for backend in backends[1:]:
+            if results[backend] != reference:
+                mismatches.append((response.url, backends[0], backend))
+    return num_pages, mismatches, timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare page parser backends")
+    parser.add_argument(
+        "cache_dir", nargs="?", help="HTTPCACHE_DIR of a recorded crawl"
+    )
+    parser.add_argument(
+        "--reference-dir", default=REFERENCE_DIR, help="pages and reference items"
+    )
+    args = parser.parse_args()
+
+    num_pages, mismatches = compare_to_reference(args.reference_dir)
+    print(
+        f"reference: {num_pages - len({url for url, _, _ in mismatches})}"
+        f"/{num_pages} pages identical for every backend"
+    )
+    if args.cache_dir:
+        num_pages, cache_mismatches, timings = compare_backends(
+            iter_cached_responses(args.cache_dir)
+        )
+        for backend, seconds in timings.items():
+            print(f"{backend}: {seconds:.2f}s for {num_pages} pages")
+        print(f"{num_pages - len(cache_mismatches)}/{num_pages} pages identical")
+        mismatches += cache_mismatches
+    for url, reference, backend in mismatches:
+        print(f"MISMATCH {url}: {backend} differs from {reference}")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+# Benchmark of the item pipelines and sinks at larger than real scale: streams
+# synthetic items through each family's pipeline (process_item, then
+# close_spider) and reports items/sec, close/write time, peak RSS and output
+# size per sink. Each case runs in its own process, so peak memory is its own:
+#
+#     python -m scrapy_passmark.pipeline_benchmark --scale 10 --sink csv \
+#         --sink parquet --json results/pipeline_benchmark.json
+#
+# The synthetic devices copy the rows of the previous crawl's output (and their
+# distribution and price rows) under new ids, --scale times over, so value
+# shapes and rows per device are those of the real data.
+
+# standard library imports
+import argparse
+import csv
+import datetime as dt
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+# third party imports
+from scrapy.utils.misc import load_object
+
+# local imports
+from .constants import RAW_DATA_DIR
+from .schemas import SCHEMAS
+from .sinks import SINKS, build_sink
+
+PIPELINES = {
+    "cpu": "scrapy_passmark.pipelines.cpu_pipelines.CPUItemPipeline",
+    "gpu": "scrapy_passmark.pipelines.gpu_pipelines.GPUItemPipeline",
+    "ram": "scrapy_passmark.pipelines.ram_pipelines.RAMItemPipeline",
+    "hdd_ssd": "scrapy_passmark.pipelines.hdd_ssd_pipelines.HDDSSDItemPipeline",
+}
+# Rows per device of the tables after the first, when there is no previous
+# output to copy
+DEFAULT_ROWS_PER_DEVICE = 40
+DEFAULT_DEVICES = 5000
+
+
+def _convert(value, column_type):
+    if value == "":
+        return None
+    if column_type == "int":
+        return int(value)
+    if column_type == "float":
+        return float(value)
+    return value
+
+
+def load_templates(family, raw_dir=RAW_DATA_DIR):
+    # Device records, and per device id the records of every other table, of
+    # the family's CSV output; None without one
+    tables = SCHEMAS[family]
+    paths = [os.path.join(raw_dir, family, f"{table.name}.csv") for table in tables]
+    if not all(os.path.exists(path) for path in paths):
+        return None
+
+    templates = []
+    for table, path in zip(tables, paths):
+        with open(path, encoding="utf-8", newline="") as f:
+            records = [
+                {
+                    column: _convert(row.get(column, ""), table.types[column])
+                    for column in table.columns
+                }
+                for row in csv.DictReader(f)
+            ]
+        if not templates:
+            templates.append(records)
+            continue
+        by_device = {}
+        for record in records:
+            by_device.setdefault(record[table.columns[0]], []).append(record)
+        templates.append(by_device)
+    return templates
+
+
+def synthetic_templates(family, num_devices=DEFAULT_DEVICES):
+    # Stand-in values by column type
+    tables = SCHEMAS[family]
+    samples = {"int": 1234, "float": 123.45, "str": "Synthetic value 1.0 GHz"}
+    devices = [
+        {column: samples[tables[0].types[column]] for column in tables[0].columns}
+        for _ in range(num_devices)
+    ]
+    for index, device in enumerate(devices):
+        device["id"] = index + 1
+    templates = [devices]
+    for table in tables[1:]:
+        templates.append(
+            {
+                device["id"]: [
+                    {
+                        **{
+                            column: samples[table.types[column]]
+                            for column in table.columns
+                        },
+                        table.columns[0]: device["id"],
+                        table.columns[1]: row,
+                    }
+                    for row in range(DEFAULT_ROWS_PER_DEVICE)
+                ]
+                for device in devices
+            }
+        )
+    return templates
+
+
+def iter_items(family, templates, scale):
+    # Device by device, in crawl order: a device item, then its rows of the
+    # other tables. The n-th synthetic device copies template n % len(devices)
+    tables = SCHEMAS[family]
+    devices = templates[0]
+    for n in range(int(len(devices) * scale)):
+        template = devices[n % len(devices)]
+        device_id = n + 1
+        yield _item(tables[0].item_class, template, "id", device_id)
+        for table, by_device in zip(tables[1:], templates[1:]):
+            id_column = table.columns[0]
+            for record in by_device.get(template["id"], ()):
+                yield _item(table.item_class, record, id_column, device_id)
+
+
+def _item(item_class, record, id_column, device_id):
+    item = item_class()
+    for name, value in record.items():
+        item[name] = value
+    item[id_column] = device_id
+    return item
+
+
+def _rss_mb():
+    # ru_maxrss is in kilobytes on Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def run_case(family, sink_format, scale, flush_size=0, raw_dir=RAW_DATA_DIR):
+    # Runs in the child process; returns the case's results
+    templates = load_templates(family, raw_dir)
+    source = "previous output"
+    if templates is None:
+        templates = synthetic_templates(family)
+        source = "synthetic"
+    pipeline_class = load_object(PIPELINES[family])
+    baseline_rss = _rss_mb()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        output_dir = os.path.join(tmp_dir, family)
+        sink = build_sink(sink_format, output_dir, family)
+        pipeline = pipeline_class(sink, flush_size)
+
+        num_items = 0
+        process_seconds = 0.0
+        for item in iter_items(family, templates, scale):
+            start = time.perf_counter()
+            pipeline.process_item(item, None)
+            process_seconds += time.perf_counter() - start
+            num_items += 1
+        rows = {name: len(buffer) for name, buffer in pipeline.buffers.items()}
+        buffered_rss = _rss_mb()
+
+        start = time.perf_counter()
+        pipeline.close_spider(None)
+        close_seconds = time.perf_counter() - start
+
+        output_bytes = 0
+        for dirpath, _, filenames in os.walk(output_dir):
+            for filename in filenames:
+                output_bytes += os.path.getsize(os.path.join(dirpath, filename))
+
+    return {
+        "family": family,
+        "sink": sink_format,
+        "scale": scale,
+        "flush_size": flush_size,
+        "templates": source,
+        "items": num_items,
+        "rows": rows if not flush_size else None,
+        "process_seconds": round(process_seconds, 3),
+        "items_per_second": (
+            round(num_items / process_seconds) if process_seconds else None
+        ),
+        "close_seconds": round(close_seconds, 3),
+        "baseline_rss_mb": baseline_rss,
+        "buffered_rss_mb": buffered_rss,
+        "peak_rss_mb": _rss_mb(),
+        "output_bytes": output_bytes,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Item pipeline and sink benchmark")
+    parser.add_argument("--family", action="append", choices=list(PIPELINES))
+    parser.add_argument("--sink", action="append", choices=list(SINKS))
+    parser.add_argument(
+        "--scale", type=float, default=1.0, help="devices relative to the templates"
+    )
+    parser.add_argument("--flush-size", type=int, default=0)
+    parser.add_argument("--raw-dir", default=RAW_DATA_DIR, help="templates to copy")
+    parser.add_argument("--json", help="also write the results to this file")
+    parser.add_argument("--run-case", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_case:
+        family, sink_format = args.run_case
+        result = run_case(
+            family, sink_format, args.scale, args.flush_size, args.raw_dir
+        )
+        print(json.dumps(result))
+        return
+
+    results = []
+    for family in args.family or PIPELINES:
+        for sink_format in args.sink or ["csv"]:
+            output = subprocess.run(
+                [
+                    sys.executable,
+                    "-m",
+                    "scrapy_passmark.pipeline_benchmark",
+                    "--run-case",
+                    family,
+                    sink_format,
+                    f"--scale={args.scale}",
+                    f"--flush-size={args.flush_size}",
+                    f"--raw-dir={args.raw_dir}",
+                ],
+                stdout=subprocess.PIPE,
+                text=True,
+                check=True,
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            results.append(result)
+            print(
+                f"{family}/{sink_format}: {result['items']} items, "
+                f"{result['items_per_second']} items/s in process_item, "
+                f"close {result['close_seconds']}s, "
+                f"peak RSS {result['peak_rss_mb']} MB "
+                f"(from {result['baseline_rss_mb']} MB), "
+                f"{result['output_bytes'] / 2**20:.1f} MiB written"
+            )
+
+    if args.json:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "created": dt.datetime.now(dt.timezone.utc).isoformat(),
+                    "python": sys.version.split()[0],
+                    "results": results,
+                },
+                f,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+# standard library imports
+import heapq
+import os
+import pickle
+import shutil
+import tempfile
+from operator import itemgetter
+
+# third party imports
+
+# local imports
+from ..constants import RAW_DATA_DIR
+from ..schemas import SCHEMAS
+from ..sinks import build_sink, sorted_records
+from ..validation import quarantine_table, validate
+
+
+class PassMarkItemPipeline:
+    # Routes a family's items into per-table buffers and hands them to the
+    # configured sink, either once at close or, with PASSMARK_FLUSH_SIZE, as
+    # sorted runs spilled to disk every N items and merged into the sink at
+    # close, so memory stays bounded and files stay in sorted order. Each batch
+    # is validated on the way out, rejects go to a quarantine table
+    family = None
+
+    def __init__(self, sink, flush_size=0, validation=True, stats=None):
+        self.tables = SCHEMAS[self.family]
+        self.sink = sink
+        self.flush_size = flush_size
+        self.validation = validation
+        self.stats = stats
+        self.buffers = {table.name: [] for table in self.tables}
+        self.quarantine = {table.name: quarantine_table(table) for table in self.tables}
+        self.runs = {}
+        self.run_dir = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        output_dir = settings.get("PASSMARK_OUTPUT_DIR") or RAW_DATA_DIR
+        sink = build_sink(
+            settings.get("PASSMARK_OUTPUT_FORMAT", "csv"),
+            os.path.join(output_dir, cls.family),
+            cls.family,
+            settings.get("PASSMARK_OUTPUT_COMPRESSION"),
+        )
+        return cls(
+            sink,
+            settings.getint("PASSMARK_FLUSH_SIZE", 0),
+            settings.getbool("PASSMARK_VALIDATION_ENABLED", True),
+            crawler.stats,
+        )
+
+    def process_item(self, item, spider):
+        for table in self.tables:
+            if isinstance(item, table.item_class):
+                buffer = self.buffers[table.name]
+                buffer.append(dict(item))
+                if self.flush_size and len(buffer) >= self.flush_size:
+                    self.flush(table)
+                break
+        return item
+
+    def flush(self, table):
+        records = self.buffers[table.name]
+        self.buffers[table.name] = []
+        if self.validation:
+            records, rejects = validate(table, records)
+            if rejects:
+                self.sink.write(self.quarantine[table.name], rejects)
+                if self.stats is not None:
+                    self.stats.inc_value(f"passmark/rejects/{table.name}", len(rejects))
+        if self.flush_size and table.sort_by:
+            self.spill(table, records)
+        else:
+            self.sink.write(table, records)
+
+    def spill(self, table, records):
+        if self.run_dir is None:
+            self.run_dir = tempfile.mkdtemp(prefix=f"passmark-{self.family}-")
+        runs = self.runs.setdefault(table.name, [])
+        path = os.path.join(self.run_dir, f"{table.name}-{len(runs)}.pickle")
+        with open(path, "wb") as f:
+            for record in sorted_records(table, records):
+                pickle.dump(record, f, pickle.HIGHEST_PROTOCOL)
+        runs.append(path)
+
+    def merge_runs(self, table):
+        # heapq.merge prefers earlier runs on ties, so the result is the stable
+        # sort of all records in arrival order, as without flushing
+        files = [open(path, "rb") for path in self.runs.pop(table.name)]
+        try:
+            merged = heapq.merge(
+                *(_read_run(f) for f in files), key=itemgetter(*table.sort_by)
+            )
+            batch = []
+            for record in merged:
+                batch.append(record)
+                if len(batch) >= self.flush_size:
+                    self.sink.write(table, batch)
+                    batch = []
+            if batch or table.name not in self.sink.started:
+                self.sink.write(table, batch)
+        finally:
+            for f in files:
+                f.close()
+
+    def close_spider(self, spider):
+        try:
+            for table in self.tables:
+                if self.buffers[table.name] or table.name not in self.sink.started:
+                    self.flush(table)
+                if table.name in self.runs:
+                    self.merge_runs(table)
+            self.sink.close()
+        finally:
+            if self.run_dir is not None:
+                shutil.rmtree(self.run_dir, ignore_errors=True)
+                self.run_dir = None
+
+
+def _read_run(f):
+    while True:
+        try:
+            yield pickle.load(f)
+        except EOFError:
+            return
@@ -0,0 +1,210 @@
+# standard library imports
+import datetime as dt
+import json
+import logging
+import os
+import time
+from bisect import bisect_left, insort
+from collections import deque
+
+# third party imports
+from scrapy.exceptions import NotConfigured
+
+# local imports
+from .constants import RAW_DATA_DIR
+from .schemas import SCHEMAS
+
+logger = logging.getLogger(__name__)
+
+
+class PriceState:
+    # Rolling state of one device's price history: last price, all-time low and
+    # the median of the last `window` prices. Updates cost O(window), a small
+    # constant, whatever the length of the history
+    __slots__ = ("last_price", "low", "count", "recent", "ordered")
+
+    def __init__(self, window):
+        self.last_price = None
+        self.low = None
+        self.count = 0
+        self.recent = deque(maxlen=window)
+        self.ordered = []
+
+    def median(self):
+        n = len(self.ordered)
+        if n % 2:
+            return self.ordered[n // 2]
+        return (self.ordered[n // 2 - 1] + self.ordered[n // 2]) / 2
+
+    def update(self, price):
+        if len(self.recent) == self.recent.maxlen:
+            del self.ordered[bisect_left(self.ordered, self.recent[0])]
+        self.recent.append(price)
+        insort(self.ordered, price)
+        self.last_price = price
+        self.low = price if self.low is None else min(self.low, price)
+        self.count += 1
+
+
+class PriceAlertPipeline:
+    # Watches the pricing history items of a crawl as they pass and appends an
+    # alert to <output dir>/<family>/price_alerts.jsonl (or
+    # PASSMARK_PRICE_ALERTS_FILE) as soon as a point is
+    #
+    #   new_low  below every earlier price of the device
+    #   drop     more than PASSMARK_PRICE_ALERTS_DROP below the previous price
+    #            (or the rolling median, if lower)
+    #   spike    more than PASSMARK_PRICE_ALERTS_SPIKE away from the median of
+    #            the previous PASSMARK_PRICE_ALERTS_WINDOW prices
+    #
+    # Each detail page carries the device's whole price history, so every point
+    # updates the rolling state but only points newer than any an earlier crawl
+    # saw raise alerts: the newest point of each device is kept in the spider's
+    # crawl state. Devices new to the crawl state alert on points from the last
+    # PASSMARK_PRICE_ALERTS_SINCE_DAYS days. Alerts are appended, so the file is
+    # a log in which each alert appears once; crawls to the memory sink have no
+    # alerts unless given a file
+    MIN_POINTS = 3
+
+    def __init__(
+        self,
+        crawler,
+        path,
+        drop=0.2,
+        spike=0.5,
+        window=9,
+        since_days=30,
+    ):
+        self.crawler = crawler
+        self.path = path
+        self.drop = drop
+        self.spike = spike
+        self.window = window
+        # Points before the cutoff (ms) only update the rolling state
+        self.cutoff = None
+        if since_days is not None:
+            self.cutoff = (time.time() - since_days * 86400) * 1000
+        self.pricing_tables = {
+            table.item_class: (family, table.columns[0])
+            for family, tables in SCHEMAS.items()
+            for table in tables
+            if table.name.endswith("_pricing_histories")
+        }
+        self.states = {}
+        self.file = None
+        self.crawl_state = None
+        # Newest point per device seen by earlier crawls, and by this one
+        self.seen_points = {}
+        self.newest_points = {}
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        if not settings.getbool("PASSMARK_PRICE_ALERTS_ENABLED"):
+            raise NotConfigured
+        if settings.get("PASSMARK_OUTPUT_FORMAT") == "memory" and not settings.get(
+            "PASSMARK_PRICE_ALERTS_FILE"
+        ):
+            raise NotConfigured
+        # None, or "None" or "" from the command line, for no cutoff
+        since_days = settings.get("PASSMARK_PRICE_ALERTS_SINCE_DAYS")
+        if since_days in ("", "None"):
+            since_days = None
+        return cls(
+            crawler,
+            settings.get("PASSMARK_PRICE_ALERTS_FILE"),
+            settings.getfloat("PASSMARK_PRICE_ALERTS_DROP", 0.2),
+            settings.getfloat("PASSMARK_PRICE_ALERTS_SPIKE", 0.5),
+            settings.getint("PASSMARK_PRICE_ALERTS_WINDOW", 9),
+            None if since_days is None else float(since_days),
+        )
+
+    def process_item(self, item):
+        table = self.pricing_tables.get(type(item))
+        if table is None:
+            return item
+        family, id_column = table
+        try:
+            device_id = int(item[id_column])
+            timestamp = int(item["timestamp"])
+            price = float(item["price"])
+        except (TypeError, ValueError):
+            return item
+        if price <= 0:
+            return item
+
+        state = self.states.get(device_id)
+        if state is None:
+            state = self.states[device_id] = PriceState(self.window)
+        recent = self.cutoff is None or timestamp >= self.cutoff
+        seen = self.seen_points.get(device_id)
+        if seen is not None:
+            recent = timestamp > seen
+        if timestamp > self.newest_points.get(device_id, timestamp - 1):
+            self.newest_points[device_id] = timestamp
+        if recent and state.count >= self.MIN_POINTS - 1 and self.file is not None:
+            self.check(family, device_id, timestamp, price, state)
+        state.update(price)
+        return item
+
+    def check(self, family, device_id, timestamp, price, state):
+        if price < state.low:
+            self.alert(family, device_id, timestamp, price, "new_low", state.low)
+        # A drop is measured from the lower of the previous price and the
+        # median, so falling back from a spike is not one
+        median = state.median()
+        previous = min(state.last_price, median)
+        if price < previous * (1 - self.drop):
+            self.alert(family, device_id, timestamp, price, "drop", previous)
+        if abs(price - median) > self.spike * median:
+            self.alert(family, device_id, timestamp, price, "spike", median)
+
+    def alert(self, family, device_id, timestamp, price, kind, reference):
+        record = {
+            "family": family,
+            "device_id": device_id,
+            "kind": kind,
+            "timestamp": timestamp,
+            "date": dt.datetime.fromtimestamp(timestamp / 1000, dt.timezone.utc)
+            .date()
+            .isoformat(),
+            "price": price,
+            "reference": round(reference, 2),
+            "change": round(price / reference - 1, 4),
+        }
+        # Flushed line by line so alerts can be followed during the crawl
+        self.file.write(json.dumps(record) + "\n")
+        self.file.flush()
+        self.crawler.stats.inc_value(f"passmark/price_alerts/{kind}")
+        logger.info(
+            "Price alert %s for %s %s: %s (was %s)",
+            kind,
+            family,
+            device_id,
+            price,
+            record["reference"],
+        )
+
+    def open_spider(self):
+        family = getattr(self.crawler.spider, "family", None)
+        if family is None:
+            return
+        self.crawl_state = getattr(self.crawler.spider, "crawl_state", None)
+        if self.crawl_state is not None:
+            self.seen_points = self.crawl_state.price_points()
+        path = self.path or os.path.join(
+            self.crawler.settings.get("PASSMARK_OUTPUT_DIR") or RAW_DATA_DIR,
+            family,
+            "price_alerts.jsonl",
+        )
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.file = open(path, "a", encoding="utf-8")
+
+    def close_spider(self):
+        # Before the spider saves its crawl state on spider_closed
+        if self.crawl_state is not None:
+            for device_id, timestamp in self.newest_points.items():
+                self.crawl_state.record_price_point(device_id, timestamp)
+        if self.file is not None:
+            self.file.close()
+            self.file = None
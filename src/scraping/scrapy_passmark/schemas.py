@@ -0,0 +1,198 @@
+# standard library imports
+
+# third party imports
+
+# local imports
+from .items.cpu_items import CPUItem, CPUMarkDistributionItem, CPUPricingHistoryItem
+from .items.gpu_items import G3DMarkDistributionItem, GPUItem, GPUPricingHistoryItem
+from .items.hdd_ssd_items import HDDSSDItem, HDDSSDPricingHistoryItem
+from .items.ram_items import RAMItem, RAMPricingHistoryItem
+
+
+class TableSchema:
+    # One output table: the item class feeding it, its column order, its sort
+    # order and the types of its non-text columns ("int" or "float")
+    def __init__(self, name, item_class, columns, sort_by, types=None):
+        self.name = name
+        self.item_class = item_class
+        self.columns = columns
+        self.sort_by = sort_by
+        self.types = {column: "str" for column in columns}
+        self.types.update(types or {})
+
+
+SCHEMAS = {
+    "cpu": [
+        TableSchema(
+            "cpus",
+            CPUItem,
+            [
+                "id",
+                "name",
+                "description",
+                "cpu_class",
+                "socket",
+                "clock_speed",
+                "turbo_speed",
+                "cores",
+                "threads",
+                "total_cores",
+                "primary_cores",
+                "secondary_cores",
+                "performance_cores",
+                "efficient_cores",
+                "typical_tdp",
+                "tdp_down",
+                "tdp_up",
+                "cache_per_cpu_package",
+                "cache_per_effective_cpu_package",
+                "memory_support",
+                "other_names",
+                "first_seen_on_charts",
+                "cpu_mark_per_dollar_price",
+                "overall_rank",
+                "last_price_change",
+                "multi_thread_rating",
+                "single_thread_rating",
+                "num_samples",
+                "margin_for_error",
+                "integer_math",
+                "floating_point_math",
+                "find_prime_numbers",
+                "random_string_sorting",
+                "data_encryption",
+                "data_compression",
+                "physics",
+                "extended_instructions",
+                "relative_gaming_score",
+            ],
+            ["id"],
+            {"id": "int"},
+        ),
+        TableSchema(
+            "cpu_mark_distributions",
+            CPUMarkDistributionItem,
+            ["cpu_id", "cpu_mark", "num_records"],
+            ["cpu_id", "cpu_mark"],
+            {"cpu_id": "int", "cpu_mark": "int", "num_records": "int"},
+        ),
+        TableSchema(
+            "cpu_pricing_histories",
+            CPUPricingHistoryItem,
+            ["cpu_id", "timestamp", "price"],
+            ["cpu_id", "timestamp"],
+            {"cpu_id": "int", "timestamp": "int", "price": "float"},
+        ),
+    ],
+    "gpu": [
+        TableSchema(
+            "gpus",
+            GPUItem,
+            [
+                "id",
+                "name",
+                "bus_interface",
+                "max_memory_size",
+                "core_clock",
+                "memory_clock",
+                "directx_version",
+                "opengl_version",
+                "max_tdp",
+                "category",
+                "other_names",
+                "first_benchmarked",
+                "g3d_mark_per_dollar_price",
+                "overall_rank",
+                "last_price_change",
+                "g3d_mark",
+                "g2d_mark",
+                "num_samples",
+                "directx_9",
+                "directx_10",
+                "directx_11",
+                "directx_12",
+                "gpu_compute",
+            ],
+            ["id"],
+            {"id": "int"},
+        ),
+        TableSchema(
+            "g3d_mark_distributions",
+            G3DMarkDistributionItem,
+            ["gpu_id", "g3d_mark", "num_records"],
+            ["gpu_id", "g3d_mark"],
+            {"gpu_id": "int", "g3d_mark": "int", "num_records": "int"},
+        ),
+        TableSchema(
+            "gpu_pricing_histories",
+            GPUPricingHistoryItem,
+            ["gpu_id", "timestamp", "price"],
+            ["gpu_id", "timestamp"],
+            {"gpu_id": "int", "timestamp": "int", "price": "float"},
+        ),
+    ],
+    "ram": [
+        TableSchema(
+            "ram_modules",
+            RAMItem,
+            [
+                "id",
+                "generation",
+                "name",
+                "description",
+                "other_names",
+                "first_benchmarked",
+                "last_price_change",
+                "mark",
+                "num_samples",
+                "database_operations",
+                "memory_read_cached",
+                "memory_read_uncached",
+                "memory_write",
+                "latency",
+                "memory_threaded",
+            ],
+            ["id"],
+            {"id": "int"},
+        ),
+        TableSchema(
+            "ram_pricing_histories",
+            RAMPricingHistoryItem,
+            ["ram_id", "timestamp", "price"],
+            ["ram_id", "timestamp"],
+            {"ram_id": "int", "timestamp": "int", "price": "float"},
+        ),
+    ],
+    "hdd_ssd": [
+        TableSchema(
+            "drives",
+            HDDSSDItem,
+            [
+                "id",
+                "name",
+                "description",
+                "size",
+                "other_names",
+                "first_benchmarked",
+                "drive_rating_per_dollar_price",
+                "overall_rank",
+                "last_price_change",
+                "drive_rating",
+                "num_samples",
+                "sequential_read",
+                "sequential_write",
+                "random_seek_read_write",
+                "iops_4kqd1",
+            ],
+            ["id"],
+            {"id": "int"},
+        ),
+        TableSchema(
+            "drive_pricing_histories",
+            HDDSSDPricingHistoryItem,
+            ["hdd_ssd_id", "timestamp", "price"],
+            ["hdd_ssd_id", "timestamp"],
+            {"hdd_ssd_id": "int", "timestamp": "int", "price": "float"},
+        ),
+    ],
+}
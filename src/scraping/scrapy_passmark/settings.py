@@ -12,7 +12,20 @@ BOT_NAME = "scrapy_passmark"
 SPIDER_MODULES = ["scrapy_passmark.spiders"]
 NEWSPIDER_MODULE = "scrapy_passmark.spiders"
 
-ADDONS = {}
+# Spiders are imported on demand from this registry instead of scanning
+# SPIDER_MODULES; register new spiders here to have them listed
+SPIDER_LOADER_CLASS = "scrapy_passmark.spider_loader.LazySpiderLoader"
+PASSMARK_SPIDERS = {
+    "cpu_spider": "scrapy_passmark.spiders.cpu_spider.CPUSpider",
+    "gpu_spider": "scrapy_passmark.spiders.gpu_spider.GPUSpider",
+    "hdd_ssd_spider": "scrapy_passmark.spiders.hdd_ssd_spider.HDDSSDSpider",
+    "ram_spider": "scrapy_passmark.spiders.ram_spider.RAMSpider",
+}
+
+ADDONS = {
+    "scrapy_passmark.transport.TransportProfile": 0,
+    "scrapy_passmark.mock.middleware.MockServer": 0,
+}
 
 
 # Crawl responsibly by identifying yourself (and your website) on the user-agent
@@ -49,6 +62,9 @@ ROBOTSTXT_OBEY = True
 # SPIDER_MIDDLEWARES = {
 #    "scrapy_passmark.middlewares.ScrapyPassmarkSpiderMiddleware": 543,
 # }
+SPIDER_MIDDLEWARES = {
+    "scrapy_passmark.body_hash.BodyHashMiddleware": 950,
+}
 
 # Enable or disable downloader middlewares
 # See https://docs.scrapy.org/en/latest/topics/downloader-middleware.html
@@ -62,6 +78,9 @@ DOWNLOADER_MIDDLEWARES = {
 # EXTENSIONS = {
 #    "scrapy.extensions.telnet.TelnetConsole": None,
 # }
+EXTENSIONS = {
+    "scrapy_passmark.memory_profile.MemoryProfiler": 500,
+}
 
 # Configure item pipelines
 # See https://docs.scrapy.org/en/latest/topics/item-pipeline.html
@@ -92,3 +111,71 @@ DOWNLOADER_MIDDLEWARES = {
 
 # Set settings whose default value is deprecated to a future-proof value
 FEED_EXPORT_ENCODING = "utf-8"
+
+# Parser backend for detail pages: "parsel" (Selector based) or "lxml" (bare lxml
+# tree walked with precompiled XPath). Both yield identical items, which can be
+# checked on a recorded crawl with scrapy_passmark.parser_equivalence
+PASSMARK_PARSER_BACKEND = "parsel"
+
+# Output of the item pipelines: "csv", "parquet", "jsonl", "sqlite", "memory" or
+# the import path of a scrapy_passmark.sinks.Sink subclass. Compression is
+# "gzip", "bz2" or "xz" for the text formats and a Parquet codec for parquet
+PASSMARK_OUTPUT_FORMAT = "csv"
+PASSMARK_OUTPUT_COMPRESSION = None
+# Defaults to data/raw; each family writes to its own subdirectory
+PASSMARK_OUTPUT_DIR = None
+# Spill buffered records to sorted temporary runs every N items instead of
+# holding them all until close, where the runs are merged into the sink
+PASSMARK_FLUSH_SIZE = 0
+
+# Check each flushed batch against scrapy_passmark.validation.RULES. Records
+# failing a check go to a <table>_rejects table with the reasons instead
+PASSMARK_VALIDATION_ENABLED = True
+
+# Per-family JSON of last fetch time, samples and price change of each device,
+# used to request the stalest and most relevant devices first. Defaults to
+# data/crawl_state. Pair with CLOSESPIDER_TIMEOUT for time-boxed crawls
+PASSMARK_CRAWL_STATE_DIR = None
+
+# Download handler configuration, applied by the TransportProfile add-on:
+# "http11" (keep-alive HTTP/1.1) or "http2" (HTTP/2 for https, needs the h2
+# package), both with compressed transfer and passmark/transport/* stats on
+# connections opened and bytes on the wire vs decoded. None keeps Scrapy's
+# default handlers
+PASSMARK_TRANSPORT_PROFILE = "http11"
+
+# Base URL of a scrapy_passmark.mock.server instance to crawl instead of the
+# real sites, e.g. "http://127.0.0.1:8900"
+PASSMARK_MOCK_SERVER = None
+
+# Memory timeline of a crawl (RSS, live items/requests/responses/selectors,
+# buffered pipeline records and top tracemalloc allocation sites), sampled
+# every INTERVAL seconds and written as JSON at close, by default to
+# <spider name>_memory_profile.json. tracemalloc slows the crawl noticeably
+PASSMARK_MEMORY_PROFILE_ENABLED = False
+PASSMARK_MEMORY_PROFILE_INTERVAL = 30.0
+PASSMARK_MEMORY_PROFILE_TOP = 10
+PASSMARK_MEMORY_PROFILE_TRACEMALLOC = True
+PASSMARK_MEMORY_PROFILE_FILE = None
+
+# Skip parsing detail pages that are unchanged since the last crawl and emit
+# the items stored from it instead. Pages are compared by a hash of the body
+# without comments, ads and analytics scripts, plus any regexes listed in
+# PASSMARK_BODY_HASH_IGNORE; hashes and items live in
+# <crawl state dir>/<family>_pages.sqlite
+PASSMARK_BODY_HASH_ENABLED = True
+PASSMARK_BODY_HASH_IGNORE = []
+
+# Alerts on pricing history points raised while the crawl runs, appended to
+# <output dir>/<family>/price_alerts.jsonl (or PRICE_ALERTS_FILE): new all-time
+# lows, drops of more than DROP from the previous price and spikes of more
+# than SPIKE away from the median of the last WINDOW prices. Only points newer
+# than the device's newest point in the crawl state raise alerts, or for
+# devices not in it yet, points from the last SINCE_DAYS days (None, or
+# -s PASSMARK_PRICE_ALERTS_SINCE_DAYS= on the command line, for all)
+PASSMARK_PRICE_ALERTS_ENABLED = True
+PASSMARK_PRICE_ALERTS_FILE = None
+PASSMARK_PRICE_ALERTS_DROP = 0.2
+PASSMARK_PRICE_ALERTS_SPIKE = 0.5
+PASSMARK_PRICE_ALERTS_WINDOW = 9
+PASSMARK_PRICE_ALERTS_SINCE_DAYS = 30
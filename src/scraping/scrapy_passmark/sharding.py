@@ -0,0 +1,436 @@
+# Sharded crawling: a coordinator splits the devices of a spider's list pages
+# into shards in a SQLite work queue, any number of workers (processes or
+# hosts sharing the queue and shard directories) lease and crawl shards, and a
+# merge step writes the same sorted tables as a single-process crawl:
+#
+#     python -m scrapy_passmark.sharding plan cpu_spider --shards 8
+#     python -m scrapy_passmark.sharding work cpu_spider   # on every worker
+#     python -m scrapy_passmark.sharding merge cpu_spider
+#
+# A worker holds a lease while it crawls a shard and renews it periodically;
+# shards of workers that die or fail are leased again once their lease expires.
+
+# standard library imports
+import argparse
+import json
+import os
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+# third party imports
+
+# local imports
+from .constants import CRAWL_STATE_DIR, DATA_DIR, RAW_DATA_DIR
+from .crawl_state import CrawlState
+from .schemas import SCHEMAS
+from .sinks import build_sink
+from .validation import quarantine_table
+
+PROJECT_DIR = os.path.join(os.path.dirname(__file__), "..")
+SHARDS_DIR = os.path.join(DATA_DIR, "shards")
+DEFAULT_LEASE_SECONDS = 600
+MAX_ATTEMPTS = 5
+
+
+class ShardQueue:
+    # Shards of each spider's devices with their lease state. A shard is
+    # "pending" until leased, "leased" while a worker crawls it (until
+    # lease_expires), and "done" once a worker reported its output
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.connection = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS shards ("
+            "spider TEXT, shard INTEGER, devices TEXT, state TEXT, worker TEXT, "
+            "lease_expires REAL, attempts INTEGER, output_dir TEXT, "
+            "PRIMARY KEY (spider, shard))"
+        )
+
+    def plan(self, spider, devices, num_shards):
+        # Devices go to shard id % num_shards, so a device stays in the same
+        # shard (and crawl state directory) from one run to the next
+        shards = [[] for _ in range(num_shards)]
+        for device_id, kwargs in sorted(devices):
+            shards[device_id % num_shards].append([device_id, kwargs])
+        with self.transaction():
+            self.connection.execute("DELETE FROM shards WHERE spider = ?", (spider,))
+            self.connection.executemany(
+                "INSERT INTO shards VALUES (?, ?, ?, 'pending', NULL, NULL, 0, NULL)",
+                [
+                    (spider, shard, json.dumps(shard_devices))
+                    for shard, shard_devices in enumerate(shards)
+                ],
+            )
+
+    def lease(self, spider, worker, lease_seconds=DEFAULT_LEASE_SECONDS):
+        # (shard, devices) of a pending or expired shard, or None
+        now = time.time()
+        with self.transaction():
+            row = self.connection.execute(
+                "SELECT shard, devices FROM shards WHERE spider = ? "
+                "AND (state = 'pending' OR (state = 'leased' AND lease_expires < ?)) "
+                "AND attempts < ? ORDER BY attempts, shard LIMIT 1",
+                (spider, now, MAX_ATTEMPTS),
+            ).fetchone()
+            if row is None:
+                return None
+            self.connection.execute(
+                "UPDATE shards SET state = 'leased', worker = ?, lease_expires = ?, "
+                "attempts = attempts + 1 WHERE spider = ? AND shard = ?",
+                (worker, now + lease_seconds, spider, row[0]),
+            )
+        return row[0], json.loads(row[1])
+
+    def renew(self, spider, shard, worker, lease_seconds=DEFAULT_LEASE_SECONDS):
+        cursor = self.connection.execute(
+            "UPDATE shards SET lease_expires = ? WHERE spider = ? AND shard = ? "
+            "AND state = 'leased' AND worker = ?",
+            (time.time() + lease_seconds, spider, shard, worker),
+        )
+        return cursor.rowcount == 1
+
+    def complete(self, spider, shard, worker, output_dir):
+        # Only the current lease holder can complete a shard, so a worker
+        # whose lease expired cannot overwrite the output of its successor
+        cursor = self.connection.execute(
+            "UPDATE shards SET state = 'done', output_dir = ?, lease_expires = NULL "
+            "WHERE spider = ? AND shard = ? AND state = 'leased' AND worker = ?",
+            (output_dir, spider, shard, worker),
+        )
+        return cursor.rowcount == 1
+
+    def release(self, spider, shard, worker):
+        self.connection.execute(
+            "UPDATE shards SET state = 'pending', worker = NULL, lease_expires = NULL "
+            "WHERE spider = ? AND shard = ? AND state = 'leased' AND worker = ?",
+            (spider, shard, worker),
+        )
+
+    def status(self, spider):
+        rows = self.connection.execute(
+            "SELECT state, COUNT(*) FROM shards WHERE spider = ? GROUP BY state",
+            (spider,),
+        ).fetchall()
+        return dict(rows)
+
+    def output_dirs(self, spider):
+        rows = self.connection.execute(
+            "SELECT shard, state, output_dir FROM shards WHERE spider = ? "
+            "ORDER BY shard",
+            (spider,),
+        ).fetchall()
+        unfinished = [shard for shard, state, _ in rows if state != "done"]
+        if not rows or unfinished:
+            raise RuntimeError(
+                f"Shards of {spider} not done: {unfinished or 'no shards planned'}"
+            )
+        return [output_dir for _, _, output_dir in rows]
+
+    def transaction(self):
+        return _Transaction(self.connection)
+
+    def close(self):
+        self.connection.close()
+
+
+class _Transaction:
+    # BEGIN IMMEDIATE takes the write lock up front, so two workers cannot
+    # lease the same shard
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        self.connection.execute("BEGIN IMMEDIATE")
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.connection.execute("ROLLBACK" if exc_type else "COMMIT")
+
+
+def spider_family(spider_name):
+    from scrapy.spiderloader import get_spider_loader
+    from scrapy.utils.project import get_project_settings
+
+    return get_spider_loader(get_project_settings()).load(spider_name).family
+
+
+def run_crawl(spider_name, arguments, settings):
+    # Runs one crawl in a child process; True if it finished cleanly
+    command = [
+        sys.executable,
+        "-m",
+        "scrapy_passmark.sharding",
+        f"--run-spider={spider_name}",
+        f"--arguments-json={json.dumps(arguments)}",
+        f"--settings-json={json.dumps(settings)}",
+    ]
+    return subprocess.run(command, cwd=PROJECT_DIR).returncode == 0
+
+
+def run_spider(spider_name, arguments, settings):
+    from scrapy.crawler import CrawlerProcess
+    from scrapy.utils.project import get_project_settings
+
+    project_settings = get_project_settings()
+    for name, value in settings.items():
+        project_settings.set(name, value, priority="cmdline")
+    process = CrawlerProcess(project_settings)
+    crawler = process.create_crawler(spider_name)
+    process.crawl(crawler, **arguments)
+    process.start()
+    return crawler.stats.get_value("finish_reason") == "finished"
+
+
+def plan(spider_name, num_shards, queue, settings=None):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        devices_path = os.path.join(tmp_dir, "devices.json")
+        finished = run_crawl(
+            spider_name,
+            {"devices_out": devices_path},
+            {"PASSMARK_OUTPUT_FORMAT": "memory", **(settings or {})},
+        )
+        if not finished:
+            raise RuntimeError(f"Listing the devices of {spider_name} failed")
+        with open(devices_path, encoding="utf-8") as f:
+            devices = json.load(f)
+    queue.plan(spider_name, devices, num_shards)
+    return len(devices)
+
+
+def work(
+    spider_name,
+    queue,
+    root=SHARDS_DIR,
+    worker=None,
+    lease_seconds=DEFAULT_LEASE_SECONDS,
+    settings=None,
+    wait=True,
+):
+    # Leases and crawls shards until all are done (or, without `wait`, until
+    # none is available). Each attempt writes JSON lines to its own directory;
+    # the crawl state of a shard is kept across attempts and runs
+    worker = worker or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+    num_crawled = 0
+    while True:
+        lease = queue.lease(spider_name, worker, lease_seconds)
+        if lease is None:
+            status = queue.status(spider_name)
+            if not wait or not status.get("leased"):
+                return num_crawled
+            # Other workers' shards may still expire and need taking over
+            time.sleep(min(lease_seconds / 4, 30))
+            continue
+
+        shard, devices = lease
+        shard_dir = os.path.join(root, spider_name, f"shard-{shard:04d}")
+        output_dir = os.path.join(shard_dir, f"output-{worker}-{int(time.time())}")
+        os.makedirs(shard_dir, exist_ok=True)
+        devices_path = os.path.join(output_dir, "devices.json")
+        os.makedirs(output_dir)
+        with open(devices_path, "w", encoding="utf-8") as f:
+            json.dump(devices, f)
+
+        stop_renewing = threading.Event()
+        renewer = threading.Thread(
+            target=_renew_lease,
+            args=(queue.path, spider_name, shard, worker, lease_seconds),
+            kwargs={"stop": stop_renewing},
+            daemon=True,
+        )
+        renewer.start()
+        try:
+            finished = run_crawl(
+                spider_name,
+                {"devices_in": devices_path},
+                {
+                    **(settings or {}),
+                    "PASSMARK_OUTPUT_DIR": output_dir,
+                    "PASSMARK_OUTPUT_FORMAT": "jsonl",
+                    "PASSMARK_OUTPUT_COMPRESSION": None,
+                    "PASSMARK_CRAWL_STATE_DIR": os.path.join(shard_dir, "state"),
+                },
+            )
+        finally:
+            stop_renewing.set()
+            renewer.join()
+        if finished and queue.complete(spider_name, shard, worker, output_dir):
+            num_crawled += 1
+        else:
+            queue.release(spider_name, shard, worker)
+
+
+def _renew_lease(path, spider_name, shard, worker, lease_seconds, stop):
+    # SQLite connections belong to their thread, so this one opens its own
+    queue = ShardQueue(path)
+    try:
+        while not stop.wait(lease_seconds / 3):
+            queue.renew(spider_name, shard, worker, lease_seconds)
+    finally:
+        queue.close()
+
+
+def merge(
+    spider_name,
+    queue,
+    output_dir=RAW_DATA_DIR,
+    output_format="csv",
+    compression=None,
+    state_dir=CRAWL_STATE_DIR,
+):
+    # Concatenates the shards' tables and writes them through the regular
+    # sinks, which sort by each table's sort_by exactly as in a single-process
+    # crawl. The shards' crawl states are folded into the main one
+    family = spider_family(spider_name)
+    shard_dirs = queue.output_dirs(spider_name)
+    sink = build_sink(
+        output_format, os.path.join(output_dir, family), family, compression
+    )
+    num_records = {}
+    for table in SCHEMAS[family]:
+        records = _read_shards(shard_dirs, family, table.name)
+        sink.write(table, records)
+        num_records[table.name] = len(records)
+        rejects = quarantine_table(table)
+        rejected = _read_shards(shard_dirs, family, rejects.name)
+        if rejected:
+            sink.write(rejects, rejected)
+            num_records[rejects.name] = len(rejected)
+    sink.close()
+
+    alerts = _read_shards(shard_dirs, family, "price_alerts")
+    if alerts:
+        alerts.sort(key=lambda alert: (alert["device_id"], alert["timestamp"]))
+        with open(
+            os.path.join(output_dir, family, "price_alerts.jsonl"),
+            "a",
+            encoding="utf-8",
+        ) as f:
+            for alert in alerts:
+                f.write(json.dumps(alert) + "\n")
+        num_records["price_alerts"] = len(alerts)
+
+    state = CrawlState.load(os.path.join(state_dir, f"{family}.json"))
+    for shard_dir in {os.path.dirname(path) for path in shard_dirs}:
+        shard_state = CrawlState.load(
+            os.path.join(shard_dir, "state", f"{family}.json")
+        )
+        for device_id, entry in shard_state.devices.items():
+            known = state.devices.get(device_id)
+            if known is None or known["fetched"] <= entry["fetched"]:
+                state.devices[device_id] = entry
+            if known is not None and known.get("price_point") is not None:
+                state.record_price_point(device_id, known["price_point"])
+    state.save()
+    return num_records
+
+
+def _read_shards(shard_dirs, family, table_name):
+    records = []
+    for shard_dir in shard_dirs:
+        path = os.path.join(shard_dir, family, f"{table_name}.jsonl")
+        if not os.path.exists(path):
+            continue
+        with open(path, encoding="utf-8") as f:
+            records.extend(json.loads(line) for line in f)
+    return records
+
+
+def _parse_settings(pairs):
+    settings = {}
+    for pair in pairs:
+        name, _, value = pair.partition("=")
+        settings[name] = value
+    return settings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sharded PassMark crawls")
+    parser.add_argument("--run-spider", help=argparse.SUPPRESS)
+    parser.add_argument("--arguments-json", help=argparse.SUPPRESS)
+    parser.add_argument("--settings-json", help=argparse.SUPPRESS)
+    subparsers = parser.add_subparsers(dest="command")
+
+    def add_parser(name, help):
+        subparser = subparsers.add_parser(name, help=help)
+        subparser.add_argument("spider")
+        subparser.add_argument(
+            "--queue",
+            default=os.path.join(SHARDS_DIR, "queue.sqlite"),
+            help="SQLite work queue shared by the coordinator and workers",
+        )
+        subparser.add_argument(
+            "-s",
+            dest="settings",
+            action="append",
+            default=[],
+            metavar="NAME=VALUE",
+            help="extra Scrapy setting for the crawls",
+        )
+        return subparser
+
+    plan_parser = add_parser("plan", "split the listed devices into shards")
+    plan_parser.add_argument("--shards", type=int, required=True)
+
+    work_parser = add_parser("work", "crawl shards until all are done")
+    work_parser.add_argument("--root", default=SHARDS_DIR, help="shard output root")
+    work_parser.add_argument("--worker", help="worker id (default host-pid-random)")
+    work_parser.add_argument("--lease", type=float, default=DEFAULT_LEASE_SECONDS)
+    work_parser.add_argument(
+        "--no-wait", action="store_true", help="exit when no shard is available"
+    )
+
+    merge_parser = add_parser("merge", "merge the shard outputs")
+    merge_parser.add_argument("--output-dir", default=RAW_DATA_DIR)
+    merge_parser.add_argument("--format", default="csv")
+    merge_parser.add_argument("--compression")
+    merge_parser.add_argument("--state-dir", default=CRAWL_STATE_DIR)
+
+    args = parser.parse_args()
+    if args.run_spider:
+        finished = run_spider(
+            args.run_spider,
+            json.loads(args.arguments_json),
+            json.loads(args.settings_json),
+        )
+        sys.exit(0 if finished else 1)
+    if args.command is None:
+        parser.error("a command is required")
+
+    queue = ShardQueue(args.queue)
+    settings = _parse_settings(args.settings)
+    if args.command == "plan":
+        num_devices = plan(args.spider, args.shards, queue, settings)
+        print(f"Planned {num_devices} devices of {args.spider} in {args.shards} shards")
+    elif args.command == "work":
+        num_crawled = work(
+            args.spider,
+            queue,
+            args.root,
+            args.worker,
+            args.lease,
+            settings,
+            not args.no_wait,
+        )
+        print(f"Crawled {num_crawled} shards; {queue.status(args.spider)}")
+    elif args.command == "merge":
+        num_records = merge(
+            args.spider,
+            queue,
+            args.output_dir,
+            args.format,
+            args.compression,
+            args.state_dir,
+        )
+        for table, count in num_records.items():
+            print(f"{table}: {count} records")
+    queue.close()
+
+
+if __name__ == "__main__":
+    main()
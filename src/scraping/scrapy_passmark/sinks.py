@@ -0,0 +1,244 @@
+# standard library imports
+import bz2
+import gzip
+import json
+import lzma
+import os
+import sqlite3
+from operator import itemgetter
+
+# third party imports
+from scrapy.utils.misc import load_object
+
+# local imports
+
+# Whole-file compression for the text formats, by PASSMARK_OUTPUT_COMPRESSION
+TEXT_COMPRESSION = {
+    "gzip": (".gz", gzip.open),
+    "bz2": (".bz2", bz2.open),
+    "xz": (".xz", lzma.open),
+}
+
+
+def sorted_records(table, records):
+    if not table.sort_by:
+        return list(records)
+    return sorted(records, key=itemgetter(*table.sort_by))
+
+
+class Sink:
+    # Receives each table's records in one or more sorted batches through
+    # write(); the first write of a table replaces any previous output
+    extension = None
+
+    def __init__(self, output_dir, family, compression=None):
+        self.output_dir = output_dir
+        self.family = family
+        self.compression = compression
+        self.started = set()
+
+    def write(self, table, records):
+        first = table.name not in self.started
+        self.started.add(table.name)
+        self.write_batch(table, sorted_records(table, records), first)
+
+    def write_batch(self, table, records, first):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def path(self, table):
+        os.makedirs(self.output_dir, exist_ok=True)
+        return os.path.join(self.output_dir, table.name + self.extension)
+
+
+class TextSink(Sink):
+    def __init__(self, output_dir, family, compression=None):
+        super().__init__(output_dir, family, compression)
+        if compression is not None and compression not in TEXT_COMPRESSION:
+            raise ValueError(
+                f"Unsupported compression {compression!r}, expected one of "
+                f"{sorted(TEXT_COMPRESSION)}"
+            )
+
+    def path(self, table):
+        path = super().path(table)
+        if self.compression:
+            path += TEXT_COMPRESSION[self.compression][0]
+        return path
+
+    def open(self, table, first):
+        mode = "wt" if first else "at"
+        if self.compression:
+            return TEXT_COMPRESSION[self.compression][1](
+                self.path(table), mode, encoding="utf-8", newline=""
+            )
+        return open(self.path(table), mode, encoding="utf-8", newline="")
+
+
+class CSVSink(TextSink):
+    extension = ".csv"
+
+    def write_batch(self, table, records, first):
+        import pandas as pd
+
+        df = pd.DataFrame(records, columns=table.columns)
+        with self.open(table, first) as f:
+            df.to_csv(f, index=False, header=first)
+
+
+class JSONLinesSink(TextSink):
+    extension = ".jsonl"
+
+    def write_batch(self, table, records, first):
+        with self.open(table, first) as f:
+            for record in records:
+                row = {column: record.get(column) for column in table.columns}
+                f.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+
+class ParquetSink(Sink):
+    # Each batch becomes one row group of a single file per table
+    extension = ".parquet"
+
+    def __init__(self, output_dir, family, compression=None):
+        super().__init__(output_dir, family, compression)
+        self.writers = {}
+
+    def write_batch(self, table, records, first):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        types = {"int": pa.int64(), "float": pa.float64(), "str": pa.string()}
+        schema = pa.schema(
+            [(column, types[table.types[column]]) for column in table.columns]
+        )
+        if first:
+            kwargs = {"compression": self.compression} if self.compression else {}
+            self.writers[table.name] = pq.ParquetWriter(
+                self.path(table), schema, **kwargs
+            )
+        batch = pa.Table.from_pydict(
+            {
+                column: [record.get(column) for record in records]
+                for column in table.columns
+            },
+            schema=schema,
+        )
+        self.writers[table.name].write_table(batch)
+
+    def close(self):
+        for writer in self.writers.values():
+            writer.close()
+        self.writers = {}
+
+
+class SQLiteSink(Sink):
+    # All tables of a family go to one <family>.sqlite database
+    extension = ".sqlite"
+
+    def __init__(self, output_dir, family, compression=None):
+        super().__init__(output_dir, family, compression)
+        if compression is not None:
+            raise ValueError("The SQLite sink does not support compression")
+        self.connection = None
+
+    def write_batch(self, table, records, first):
+        if self.connection is None:
+            os.makedirs(self.output_dir, exist_ok=True)
+            self.connection = sqlite3.connect(
+                os.path.join(self.output_dir, self.family + self.extension)
+            )
+        types = {"int": "INTEGER", "float": "REAL", "str": "TEXT"}
+        with self.connection:
+            if first:
+                column_defs = ", ".join(
+                    f"{column} {types[table.types[column]]}" for column in table.columns
+                )
+                self.connection.execute(f"DROP TABLE IF EXISTS {table.name}")
+                self.connection.execute(f"CREATE TABLE {table.name} ({column_defs})")
+            placeholders = ", ".join("?" for _ in table.columns)
+            self.connection.executemany(
+                f"INSERT INTO {table.name} VALUES ({placeholders})",
+                (
+                    [record.get(column) for column in table.columns]
+                    for record in records
+                ),
+            )
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+class MemorySink(Sink):
+    # Keeps everything in memory, for tests and dry runs
+    def __init__(self, output_dir, family, compression=None):
+        super().__init__(output_dir, family, compression)
+        self.tables = {}
+
+    def write_batch(self, table, records, first):
+        if first:
+            self.tables[table.name] = []
+        self.tables[table.name].extend(records)
+
+
+SINKS = {
+    "csv": CSVSink,
+    "jsonl": JSONLinesSink,
+    "parquet": ParquetSink,
+    "sqlite": SQLiteSink,
+    "memory": MemorySink,
+}
+
+
+def build_sink(output_format, output_dir, family, compression=None):
+    # Either a registered format name or the import path of a Sink subclass
+    sink_class = SINKS.get(output_format) or load_object(output_format)
+    return sink_class(output_dir, family, compression)
+
+
+def read_output(output_dir, family, table):
+    # A table as written by any of the file sinks (Parquet, SQLite, CSV or
+    # JSON lines, compressed or not), with every column as text and "" for
+    # missing values; None if the directory holds no output of the table
+    import pandas as pd
+
+    base = os.path.join(output_dir, table.name)
+    df = None
+    if os.path.exists(base + ParquetSink.extension):
+        df = pd.read_parquet(base + ParquetSink.extension)
+    sqlite_path = os.path.join(output_dir, family + SQLiteSink.extension)
+    if df is None and os.path.exists(sqlite_path):
+        connection = sqlite3.connect(sqlite_path)
+        try:
+            if connection.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                (table.name,),
+            ).fetchone():
+                df = pd.read_sql_query(f"SELECT * FROM {table.name}", connection)
+        finally:
+            connection.close()
+    suffixes = [""] + [suffix for suffix, _ in TEXT_COMPRESSION.values()]
+    for suffix in suffixes if df is None else []:
+        if os.path.exists(base + CSVSink.extension + suffix):
+            df = pd.read_csv(
+                base + CSVSink.extension + suffix, dtype=str, keep_default_na=False
+            )
+            break
+        if os.path.exists(base + JSONLinesSink.extension + suffix):
+            df = pd.read_json(
+                base + JSONLinesSink.extension + suffix, lines=True, dtype=False
+            )
+            break
+    if df is None:
+        return None
+
+    df = df.reindex(columns=table.columns)
+    for column in table.columns:
+        # Integers with gaps come back as floats from some formats
+        if table.types[column] == "int":
+            df[column] = pd.to_numeric(df[column], errors="coerce").astype("Int64")
+    return df.astype(object).where(df.notna(), "").astype(str)
@@ -0,0 +1,44 @@
+# standard library imports
+
+# third party imports
+from scrapy.spiderloader import SpiderLoader
+from scrapy.utils.misc import load_object
+
+# local imports
+
+
+class LazySpiderLoader:
+    # Spider loader backed by the PASSMARK_SPIDERS registry (spider name ->
+    # class path), so `scrapy list` and single-spider runs import nothing but
+    # the spider they need. Names missing from the registry fall back to
+    # Scrapy's SpiderLoader, which imports everything in SPIDER_MODULES
+    def __init__(self, settings):
+        self.settings = settings
+        self.registry = dict(settings.getdict("PASSMARK_SPIDERS"))
+        self.fallback = None
+
+    @classmethod
+    def from_settings(cls, settings):
+        return cls(settings)
+
+    def load(self, spider_name):
+        path = self.registry.get(spider_name)
+        if path is None:
+            if self.fallback is None:
+                self.fallback = SpiderLoader.from_settings(self.settings)
+            return self.fallback.load(spider_name)
+        spider_class = load_object(path)
+        if spider_class.name != spider_name:
+            raise KeyError(
+                f"PASSMARK_SPIDERS maps {spider_name!r} to {path}, which is "
+                f"named {spider_class.name!r}"
+            )
+        return spider_class
+
+    def list(self):
+        return sorted(self.registry)
+
+    def find_by_request(self, request):
+        return [
+            name for name in self.list() if self.load(name).handles_request(request)
+        ]
@@ -0,0 +1,89 @@
+# standard library imports
+import json
+import os
+
+# third party imports
+from scrapy import Request, signals
+from scrapy.spiders import Spider
+
+# local imports
+from ..constants import CRAWL_STATE_DIR
+from ..crawl_state import CrawlState
+
+
+class PassMarkSpider(Spider):
+    # Shared request generation of the family spiders. start() queues the list
+    # pages first, then every device known from earlier runs, so detail pages
+    # flow without waiting for the lists; devices found on the lists are
+    # requested again but dropped by the dupefilter. All detail requests carry
+    # the priority of their device's crawl state
+    family = None
+    device_item_class = None
+    id_argument = None
+    detail_url = None
+    detail_callback = None
+    # Spider arguments of sharded crawls (see scrapy_passmark.sharding):
+    # devices_out only collects the devices of the list pages into a JSON file
+    # of [id, callback kwargs] pairs, devices_in only crawls those of one
+    devices_out = None
+    devices_in = None
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        state_dir = crawler.settings.get("PASSMARK_CRAWL_STATE_DIR") or CRAWL_STATE_DIR
+        spider.crawl_state = CrawlState.load(
+            os.path.join(state_dir, f"{spider.family}.json")
+        )
+        crawler.signals.connect(spider.item_scraped, signal=signals.item_scraped)
+        crawler.signals.connect(spider.save_crawl_state, signal=signals.spider_closed)
+        spider.listed_devices = {}
+        if spider.devices_out:
+            crawler.signals.connect(
+                spider.save_listed_devices, signal=signals.spider_closed
+            )
+        return spider
+
+    async def start(self):
+        if self.devices_in:
+            with open(self.devices_in, encoding="utf-8") as f:
+                devices = json.load(f)
+            for device_id, kwargs in devices:
+                yield self.detail_request(device_id, **kwargs)
+            return
+
+        for url in self.start_urls:
+            yield Request(url, dont_filter=True, priority=CrawlState.LIST_PRIORITY)
+        if self.devices_out:
+            return
+        for device_id, kwargs in self.crawl_state.known_devices():
+            yield self.detail_request(device_id, **kwargs)
+
+    def detail_request(self, device_id, **kwargs):
+        if self.devices_out:
+            self.listed_devices[device_id] = kwargs
+            return None
+        return Request(
+            url=self.detail_url.format(id=device_id),
+            callback=getattr(self, self.detail_callback),
+            cb_kwargs={self.id_argument: device_id, **kwargs},
+            priority=self.crawl_state.priority(device_id),
+        )
+
+    def item_scraped(self, item, response, spider):
+        if isinstance(item, self.device_item_class):
+            kwargs = dict(response.request.cb_kwargs)
+            device_id = kwargs.pop(self.id_argument)
+            self.crawl_state.record(
+                device_id, item["num_samples"], item["last_price_change"], kwargs
+            )
+
+    def save_crawl_state(self, spider):
+        self.crawl_state.save()
+
+    def save_listed_devices(self, spider):
+        devices = [
+            [device_id, kwargs] for device_id, kwargs in self.listed_devices.items()
+        ]
+        with open(self.devices_out, "w", encoding="utf-8") as f:
+            json.dump(sorted(devices), f)
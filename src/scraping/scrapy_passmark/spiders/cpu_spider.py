@@ -3,15 +3,21 @@ import re
 from urllib.parse import parse_qs
 
 # third party imports
-from scrapy.spiders import Spider
 from w3lib.html import remove_tags
 
 # local imports
 from ..items.cpu_items import CPUItem, CPUMarkDistributionItem, CPUPricingHistoryItem
+from ..page_parsers import build_detail_page
+from .base import PassMarkSpider
 
 
-class CPUSpider(Spider):
+class CPUSpider(PassMarkSpider):
     name = "cpu_spider"
+    family = "cpu"
+    device_item_class = CPUItem
+    id_argument = "cpu_id"
+    detail_url = "https://www.cpubenchmark.net/cpu.php?id={id}"
+    detail_callback = "parse_cpu"
     allowed_domains = ["cpubenchmark.net"]
     start_urls = ["https://www.cpubenchmark.net/cpu_list.php"]
     custom_settings = {
@@ -33,6 +39,7 @@ class CPUSpider(Spider):
         "LOG_LEVEL": "INFO",
         "ITEM_PIPELINES": {
             "scrapy_passmark.pipelines.cpu_pipelines.CPUItemPipeline": 100,
+            "scrapy_passmark.price_alerts.PriceAlertPipeline": 200,
         },
         "CLOSESPIDER_ERRORCOUNT": 1,
         "DOWNLOAD_TIMEOUT": 600,
@@ -44,28 +51,26 @@ class CPUSpider(Spider):
         cpu_ids = [int(parse_qs(url)["id"][0]) for url in links]
 
         for cpu_id in cpu_ids:
-            yield response.follow(
-                url=f"https://www.cpubenchmark.net/cpu.php?id={cpu_id}",
-                callback=self.parse_cpu,
-                cb_kwargs={"cpu_id": cpu_id},
-            )
+            yield self.detail_request(cpu_id)
 
     def parse_cpu(self, response, cpu_id):
+        page = build_detail_page(
+            response,
+            "div.left-desc-cpu, div.desc-foot",
+            self.settings.get("PASSMARK_PARSER_BACKEND", "parsel"),
+        )
+
         # Main CPU info
         cpu_item = CPUItem()
         cpu_item["id"] = cpu_id
 
-        desc_body = response.css("div.desc > div.desc-body")
-        cpu_item["name"] = (
-            desc_body.css("div.desc-header > span.cpuname::text").get().strip()
-        )
+        if page.name is not None:
+            cpu_item["name"] = page.name.strip()
 
-        main_desc = desc_body.css("div.left-desc-cpu, div.desc-foot")
-        main_desc_p_tags = main_desc.css("p")
-        for p_tag in main_desc_p_tags:
+        for p_tag in page.description_paragraphs:
             text = [
                 remove_tags(x.replace("<br>", "[BREAK]")).strip()
-                for x in p_tag.get().split("<strong>")
+                for x in p_tag.split("<strong>")
             ]
             text = [x.strip() for x in text if x]
 
@@ -106,13 +111,12 @@ class CPUSpider(Spider):
                         cpu_item[field] = "; ".join(value_semi_cleaned).strip()
                         break
 
-        main_ratings = response.css("div.desc > div.right-desc")
         ratings_texts = [
             x.strip().replace("*", "")
-            for x in main_ratings.css("::text").getall()
+            for x in page.ratings_texts
             if x.strip() and x.strip() not in [":", "*"]
         ]
-        for i, text in enumerate(ratings_texts):
+        for i, text in enumerate(ratings_texts[:-1]):
             if text == "Multithread Rating":
                 cpu_item["multi_thread_rating"] = ratings_texts[i + 1]
             elif text == "Single Thread Rating":
@@ -122,11 +126,11 @@ class CPUSpider(Spider):
             elif text == "Margin for error":
                 cpu_item["margin_for_error"] = ratings_texts[i + 1]
 
-        test_suite_table = response.css("table[id='test-suite-results']")
-        rows = test_suite_table.css("tr")
-        for row in rows:
-            th = row.css("th::text").get().strip()
-            td = row.css("td::text").get().strip()
+        for th, td in page.test_suite_rows:
+            if th is None or td is None:
+                continue
+            th = th.strip()
+            td = td.strip()
 
             th_mapping = {
                 "Integer Math": "integer_math",
@@ -142,23 +146,13 @@ class CPUSpider(Spider):
             if th in th_mapping:
                 cpu_item[th_mapping[th]] = td
 
-        gaming_score_table = response.css("table[id='gamescoreChart']")
-        if gaming_score_table:
-            cpu_item["relative_gaming_score"] = (
-                gaming_score_table.css(
-                    "td.value-cifre[style='background: #E2EDF4;']::text"
-                )
-                .get()
-                .strip()
-            )
+        if page.gaming_score is not None:
+            cpu_item["relative_gaming_score"] = page.gaming_score.strip()
 
         yield cpu_item
 
         # CPU mark distribution and pricing history
-        script_tags = response.css("script")
-        for script in script_tags:
-            script_full = script.get()
-
+        for script_full in page.scripts:
             if "var chartLabel" in script_full and "dataArray.push" in script_full:
                 matches = re.findall(
                     r"dataArray\.push\(\{x:\s*(\d+),\s*y:\s*([\d.]+)\}\)", script_full
@@ -3,15 +3,21 @@ import re
 from urllib.parse import parse_qs
 
 # third party imports
-from scrapy.spiders import Spider
 from w3lib.html import remove_tags
 
 # local imports
 from ..items.gpu_items import G3DMarkDistributionItem, GPUItem, GPUPricingHistoryItem
+from ..page_parsers import build_detail_page
+from .base import PassMarkSpider
 
 
-class GPUSpider(Spider):
+class GPUSpider(PassMarkSpider):
     name = "gpu_spider"
+    family = "gpu"
+    device_item_class = GPUItem
+    id_argument = "gpu_id"
+    detail_url = "https://www.videocardbenchmark.net/gpu.php?id={id}"
+    detail_callback = "parse_gpu"
     allowed_domains = ["videocardbenchmark.net"]
     start_urls = ["https://www.videocardbenchmark.net/gpu_list.php"]
     custom_settings = {
@@ -33,6 +39,7 @@ class GPUSpider(Spider):
         "LOG_LEVEL": "INFO",
         "ITEM_PIPELINES": {
             "scrapy_passmark.pipelines.gpu_pipelines.GPUItemPipeline": 100,
+            "scrapy_passmark.price_alerts.PriceAlertPipeline": 200,
         },
         "CLOSESPIDER_ERRORCOUNT": 1,
         "DOWNLOAD_TIMEOUT": 600,
@@ -44,28 +51,26 @@ class GPUSpider(Spider):
         gpu_ids = [int(parse_qs(url)["id"][0]) for url in links if "#price" not in url]
 
         for gpu_id in gpu_ids:
-            yield response.follow(
-                url=f"https://www.videocardbenchmark.net/gpu.php?id={gpu_id}",
-                callback=self.parse_gpu,
-                cb_kwargs={"gpu_id": gpu_id},
-            )
+            yield self.detail_request(gpu_id)
 
     def parse_gpu(self, response, gpu_id):
+        page = build_detail_page(
+            response,
+            "em.left-desc-cpu, div.desc-foot",
+            self.settings.get("PASSMARK_PARSER_BACKEND", "parsel"),
+        )
+
         # Main GPU info
         gpu_item = GPUItem()
         gpu_item["id"] = gpu_id
 
-        desc_body = response.css("div.desc > div.desc-body")
-        gpu_item["name"] = (
-            desc_body.css("div.desc-header > span.cpuname::text").get().strip()
-        )
+        if page.name is not None:
+            gpu_item["name"] = page.name.strip()
 
-        main_desc = desc_body.css("em.left-desc-cpu, div.desc-foot")
-        main_desc_p_tags = main_desc.css("p")
-        for p_tag in main_desc_p_tags:
+        for p_tag in page.description_paragraphs:
             text = [
                 remove_tags(x.replace("<br>", "[BREAK]")).strip()
-                for x in p_tag.get().split("<strong>")
+                for x in p_tag.split("<strong>")
             ]
             text = [x.strip() for x in text if x]
 
@@ -96,13 +101,12 @@ class GPUSpider(Spider):
                         gpu_item[field] = "; ".join(value_semi_cleaned).strip()
                         break
 
-        main_ratings = response.css("div.desc > div.right-desc")
         ratings_texts = [
             x.strip().replace("*", "")
-            for x in main_ratings.css("::text").getall()
+            for x in page.ratings_texts
             if x.strip() and x.strip() not in [":", "*"]
         ]
-        for i, text in enumerate(ratings_texts):
+        for i, text in enumerate(ratings_texts[:-1]):
             if text == "Average G3D Mark":
                 gpu_item["g3d_mark"] = ratings_texts[i + 1]
             elif text == "Average G2D Mark:":
@@ -110,11 +114,11 @@ class GPUSpider(Spider):
             elif text == "Samples:":
                 gpu_item["num_samples"] = ratings_texts[i + 1]
 
-        test_suite_table = response.css("table[id='test-suite-results']")
-        rows = test_suite_table.css("tr")
-        for row in rows:
-            th = row.css("th::text").get().strip()
-            td = row.css("td::text").get().strip()
+        for th, td in page.test_suite_rows:
+            if th is None or td is None:
+                continue
+            th = th.strip()
+            td = td.strip()
 
             th_mapping = {
                 "DirectX 9": "directx_9",
@@ -130,10 +134,7 @@ class GPUSpider(Spider):
         yield gpu_item
 
         # G3D mark distribution and pricing history
-        script_tags = response.css("script")
-        for script in script_tags:
-            script_full = script.get()
-
+        for script_full in page.scripts:
             if "var chartLabel" in script_full and "dataArray.push" in script_full:
                 matches = re.findall(
                     r"dataArray\.push\(\{x:\s*(\d+),\s*y:\s*([\d.]+)\}\)", script_full
@@ -3,15 +3,21 @@ import re
 from urllib.parse import parse_qs
 
 # third party imports
-from scrapy.spiders import Spider
 from w3lib.html import remove_tags
 
 # local imports
 from ..items.hdd_ssd_items import HDDSSDItem, HDDSSDPricingHistoryItem
+from ..page_parsers import build_detail_page
+from .base import PassMarkSpider
 
 
-class HDDSSDSpider(Spider):
+class HDDSSDSpider(PassMarkSpider):
     name = "hdd_ssd_spider"
+    family = "hdd_ssd"
+    device_item_class = HDDSSDItem
+    id_argument = "hdd_ssd_id"
+    detail_url = "https://www.harddrivebenchmark.net/hdd.php?id={id}"
+    detail_callback = "parse_hdd_ssd"
     allowed_domains = ["harddrivebenchmark.net"]
     start_urls = ["https://www.harddrivebenchmark.net/hdd_list.php"]
     custom_settings = {
@@ -33,6 +39,7 @@ class HDDSSDSpider(Spider):
         "LOG_LEVEL": "INFO",
         "ITEM_PIPELINES": {
             "scrapy_passmark.pipelines.hdd_ssd_pipelines.HDDSSDItemPipeline": 100,
+            "scrapy_passmark.price_alerts.PriceAlertPipeline": 200,
         },
         "CLOSESPIDER_ERRORCOUNT": 1,
         "DOWNLOAD_TIMEOUT": 600,
@@ -46,28 +53,26 @@ class HDDSSDSpider(Spider):
         ]
 
         for hdd_ssd_id in hdd_ssd_ids:
-            yield response.follow(
-                url=f"https://www.harddrivebenchmark.net/hdd.php?id={hdd_ssd_id}",
-                callback=self.parse_hdd_ssd,
-                cb_kwargs={"hdd_ssd_id": hdd_ssd_id},
-            )
+            yield self.detail_request(hdd_ssd_id)
 
     def parse_hdd_ssd(self, response, hdd_ssd_id):
+        page = build_detail_page(
+            response,
+            "em.left-desc-cpu, div.desc-foot",
+            self.settings.get("PASSMARK_PARSER_BACKEND", "parsel"),
+        )
+
         # Main HDD/SSD info
         hdd_ssd_item = HDDSSDItem()
         hdd_ssd_item["id"] = hdd_ssd_id
 
-        desc_body = response.css("div.desc > div.desc-body")
-        hdd_ssd_item["name"] = (
-            desc_body.css("div.desc-header > span.cpuname::text").get().strip()
-        )
+        if page.name is not None:
+            hdd_ssd_item["name"] = page.name.strip()
 
-        main_desc = desc_body.css("em.left-desc-cpu, div.desc-foot")
-        main_desc_p_tags = main_desc.css("p")
-        for p_tag in main_desc_p_tags:
+        for p_tag in page.description_paragraphs:
             text = [
                 remove_tags(x.replace("<br>", "[BREAK]")).strip()
-                for x in p_tag.get().split("<strong>")
+                for x in p_tag.split("<strong>")
             ]
             text = [x.strip() for x in text if x]
 
@@ -92,23 +97,22 @@ class HDDSSDSpider(Spider):
                         hdd_ssd_item[field] = "; ".join(value_semi_cleaned).strip()
                         break
 
-        main_ratings = response.css("div.desc > div.right-desc")
         ratings_texts = [
             x.strip().replace("*", "")
-            for x in main_ratings.css("::text").getall()
+            for x in page.ratings_texts
             if x.strip() and x.strip() not in [":", "*"]
         ]
-        for i, text in enumerate(ratings_texts):
+        for i, text in enumerate(ratings_texts[:-1]):
             if text == "Average Drive Rating":
                 hdd_ssd_item["drive_rating"] = ratings_texts[i + 1]
             elif text == "Samples:":
                 hdd_ssd_item["num_samples"] = ratings_texts[i + 1]
 
-        test_suite_table = response.css("table[id='test-suite-results']")
-        rows = test_suite_table.css("tr")
-        for row in rows:
-            th = row.css("th::text").get().strip()
-            td = row.css("td::text").get().strip()
+        for th, td in page.test_suite_rows:
+            if th is None or td is None:
+                continue
+            th = th.strip()
+            td = td.strip()
 
             th_mapping = {
                 "Sequential Read": "sequential_read",
@@ -123,10 +127,7 @@ class HDDSSDSpider(Spider):
         yield hdd_ssd_item
 
         # Pricing history
-        script_tags = response.css("script")
-        for script in script_tags:
-            script_full = script.get()
-
+        for script_full in page.scripts:
             if "var chartLabel" in script_full and "dataArray.push" in script_full:
                 matches = re.findall(
                     r"dataArray\.push\(\{x:\s*(\d+),\s*y:\s*([\d.]+)\}\)", script_full
@@ -0,0 +1,139 @@
+# standard library imports
+
+# third party imports
+from scrapy import signals
+from scrapy.core.downloader.handlers.base import BaseDownloadHandler
+from scrapy.utils.misc import build_from_crawler, load_object
+
+# local imports
+
+HTTP11_HANDLER = "scrapy_passmark.transport.CountingHTTP11DownloadHandler"
+H2_HANDLER = "scrapy_passmark.transport.CountingH2DownloadHandler"
+
+# PASSMARK_TRANSPORT_PROFILE -> download handler per URL scheme. HTTP/2 needs
+# TLS, so plain http stays on HTTP/1.1 in the http2 profile
+TRANSPORT_PROFILES = {
+    "http11": {"http": HTTP11_HANDLER, "https": HTTP11_HANDLER},
+    "http2": {"http": HTTP11_HANDLER, "https": H2_HANDLER},
+}
+
+# Sits between the downloader stats (850) and HttpCompressionMiddleware (590),
+# so responses pass it still encoded, and right below the decompression
+TRANSPORT_STATS_MIDDLEWARES = {
+    "scrapy_passmark.transport.WireBytesMiddleware": 595,
+    "scrapy_passmark.transport.DecodedBytesMiddleware": 585,
+}
+
+
+class TransportProfile:
+    # Add-on applying PASSMARK_TRANSPORT_PROFILE on top of the spider settings:
+    # keep-alive connection pools that count the connections they open,
+    # compressed transfer and byte counts before and after decoding
+    def update_settings(self, settings):
+        profile = settings.get("PASSMARK_TRANSPORT_PROFILE")
+        if not profile:
+            return
+        try:
+            handlers = TRANSPORT_PROFILES[profile]
+        except KeyError:
+            raise ValueError(
+                f"Unknown transport profile {profile!r}, expected one of "
+                f"{sorted(TRANSPORT_PROFILES)}"
+            )
+        for scheme, handler in handlers.items():
+            settings["DOWNLOAD_HANDLERS"][scheme] = handler
+        for middleware, priority in TRANSPORT_STATS_MIDDLEWARES.items():
+            settings["DOWNLOADER_MIDDLEWARES"][middleware] = priority
+        settings.set("COMPRESSION_ENABLED", True, priority="addon")
+
+
+class ConnectionCountingHandler(BaseDownloadHandler):
+    # Wraps one of Scrapy's download handlers and counts every new connection
+    # of its pool. Both pools keep connections open between requests to a
+    # host, so connections_opened well below the request count means reuse
+    handler_class = None
+    # Name of the pool method that opens a new connection
+    new_connection_method = None
+
+    def __init__(self, crawler):
+        super().__init__(crawler)
+        self.handler = build_from_crawler(load_object(self.handler_class), crawler)
+
+        pool = self.handler._pool
+        new_connection = getattr(pool, self.new_connection_method)
+
+        def counting_new_connection(*args, **kwargs):
+            crawler.stats.inc_value("passmark/transport/connections_opened")
+            return new_connection(*args, **kwargs)
+
+        setattr(pool, self.new_connection_method, counting_new_connection)
+
+    async def download_request(self, request):
+        return await self.handler.download_request(request)
+
+    async def close(self):
+        await self.handler.close()
+
+
+class CountingHTTP11DownloadHandler(ConnectionCountingHandler):
+    handler_class = "scrapy.core.downloader.handlers.http11.HTTP11DownloadHandler"
+    new_connection_method = "_newConnection"
+
+
+class CountingH2DownloadHandler(ConnectionCountingHandler):
+    # Needs the h2 package (pip install "Twisted[http2]")
+    lazy = True
+    handler_class = "scrapy.core.downloader.handlers.http2.H2DownloadHandler"
+    new_connection_method = "_new_connection"
+
+
+class WireBytesMiddleware:
+    # Body bytes as transferred, by protocol and content encoding
+    def __init__(self, stats):
+        self.stats = stats
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        middleware = cls(crawler.stats)
+        crawler.signals.connect(middleware.spider_closed, signal=signals.spider_closed)
+        return middleware
+
+    def process_response(self, request, response, spider):
+        encoding = response.headers.get(b"Content-Encoding", b"identity")
+        self.stats.inc_value("passmark/transport/wire_bytes", len(response.body))
+        self.stats.inc_value("passmark/transport/response_count")
+        self.stats.inc_value(
+            f"passmark/transport/content_encoding/{encoding.decode().lower()}"
+        )
+        self.stats.inc_value(f"passmark/transport/protocol/{response.protocol}")
+        return response
+
+    def spider_closed(self, spider):
+        wire_bytes = self.stats.get_value("passmark/transport/wire_bytes", 0)
+        decoded_bytes = self.stats.get_value("passmark/transport/decoded_bytes", 0)
+        responses = self.stats.get_value("passmark/transport/response_count", 0)
+        connections = self.stats.get_value("passmark/transport/connections_opened")
+        if wire_bytes:
+            self.stats.set_value(
+                "passmark/transport/compression_ratio",
+                round(decoded_bytes / wire_bytes, 2),
+            )
+        if connections:
+            self.stats.set_value(
+                "passmark/transport/responses_per_connection",
+                round(responses / connections, 2),
+            )
+
+
+class DecodedBytesMiddleware:
+    # Body bytes after HttpCompressionMiddleware has decoded them
+    def __init__(self, stats):
+        self.stats = stats
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler.stats)
+
+    def process_response(self, request, response, spider):
+        self.stats.inc_value("passmark/transport/decoded_bytes", len(response.body))
+        return response
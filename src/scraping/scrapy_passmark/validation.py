@@ -0,0 +1,221 @@
+# standard library imports
+
+# third party imports
+
+# local imports
+from .schemas import TableSchema
+
+# Value shapes of the scraped text fields, matched against the whole value
+NUMBER = r"\d[\d,]*(?:\.\d+)?"
+DATE = r"\d{4}-\d{2}-\d{2}"
+PRICE_CHANGE = rf"NA|\${NUMBER} USD \({DATE}\)"
+PER_DOLLAR = rf"NA|{NUMBER}"
+
+
+def _rate(unit):
+    # Test suite results, "NA" when the test was not run
+    return rf"NA|{NUMBER} {unit}"
+
+
+# Earliest plausible chart timestamp (2000-01-01, in milliseconds)
+MIN_TIMESTAMP = 946684800000
+
+# Per table: fields that must be present and non-empty, inclusive (low, high)
+# bounds of numeric fields (None for unbounded) and full-match patterns of
+# text fields, checked only where a value is present
+RULES = {
+    "cpus": {
+        "required": ["id", "name", "multi_thread_rating", "num_samples"],
+        "ranges": {
+            "id": (1, None),
+            "multi_thread_rating": (0, None),
+            "single_thread_rating": (0, None),
+            "num_samples": (1, None),
+            "relative_gaming_score": (0, None),
+        },
+        "patterns": {
+            "clock_speed": rf"{NUMBER} GHz",
+            "turbo_speed": rf"{NUMBER} GHz",
+            "cores": r"\d+(?: \(in \d+ physical modules\))?",
+            "threads": r"\d+",
+            "typical_tdp": rf"-?{NUMBER} W",
+            "tdp_down": rf"-?{NUMBER} W",
+            "tdp_up": rf"-?{NUMBER} W",
+            "cpu_mark_per_dollar_price": PER_DOLLAR,
+            "last_price_change": PRICE_CHANGE,
+            "margin_for_error": r"Low|Medium|High",
+            "integer_math": _rate("MOps/Sec"),
+            "floating_point_math": _rate("MOps/Sec"),
+            "find_prime_numbers": _rate("Million Primes/Sec"),
+            "random_string_sorting": _rate("Thousand Strings/Sec"),
+            "data_encryption": _rate("MBytes/Sec"),
+            "data_compression": _rate("KBytes/Sec"),
+            "physics": _rate("Frames/Sec"),
+            "extended_instructions": _rate("Million Matrices/Sec"),
+        },
+    },
+    "gpus": {
+        "required": ["id", "name", "g3d_mark", "num_samples"],
+        "ranges": {
+            "id": (1, None),
+            "g3d_mark": (0, None),
+            "g2d_mark": (0, None),
+            "num_samples": (1, None),
+            "overall_rank": (1, None),
+        },
+        "patterns": {
+            "max_memory_size": rf"{NUMBER} MB",
+            "max_tdp": rf"{NUMBER} W",
+            "first_benchmarked": rf"{DATE}|NA",
+            "g3d_mark_per_dollar_price": PER_DOLLAR,
+            "last_price_change": PRICE_CHANGE,
+            "directx_9": _rate("Frames/Sec"),
+            "directx_10": _rate("Frames/Sec"),
+            "directx_11": _rate("Frames/Sec"),
+            "directx_12": _rate("Frames/Sec"),
+            "gpu_compute": _rate("Ops/Sec"),
+        },
+    },
+    "ram_modules": {
+        "required": ["id", "generation", "name", "mark", "num_samples"],
+        "ranges": {
+            "id": (1, None),
+            "mark": (0, None),
+            "num_samples": (1, None),
+        },
+        "patterns": {
+            "generation": r"DDR\d+",
+            "first_benchmarked": rf"{DATE}|In PerformanceTest V\d+",
+            "last_price_change": PRICE_CHANGE,
+            "database_operations": _rate("KOps/Sec"),
+            "memory_read_cached": _rate("MBytes/Sec"),
+            "memory_read_uncached": _rate("MBytes/Sec"),
+            "memory_write": _rate("MBytes/Sec"),
+            "latency": rf"{NUMBER} ns \(lower is better\)",
+            "memory_threaded": _rate("MBytes/Sec"),
+        },
+    },
+    "drives": {
+        "required": ["id", "name", "drive_rating", "num_samples"],
+        "ranges": {
+            "id": (1, None),
+            "drive_rating": (0, None),
+            "num_samples": (1, None),
+            "overall_rank": (1, None),
+        },
+        "patterns": {
+            "size": rf"{NUMBER} [KMGT]B",
+            "first_benchmarked": rf"{DATE}|NA",
+            "drive_rating_per_dollar_price": PER_DOLLAR,
+            "last_price_change": PRICE_CHANGE,
+            "sequential_read": _rate("MBytes/Sec"),
+            "sequential_write": _rate("MBytes/Sec"),
+            "random_seek_read_write": _rate("MBytes/Sec"),
+            "iops_4kqd1": _rate("MBytes/Sec"),
+        },
+    },
+}
+
+for _family, _id_column, _mark_column in [
+    ("cpu", "cpu_id", "cpu_mark"),
+    ("g3d", "gpu_id", "g3d_mark"),
+]:
+    RULES[f"{_family}_mark_distributions"] = {
+        "required": [_id_column, _mark_column, "num_records"],
+        "ranges": {
+            _id_column: (1, None),
+            _mark_column: (0, None),
+            "num_records": (0, None),
+        },
+        "patterns": {},
+    }
+
+for _table, _id_column in [
+    ("cpu_pricing_histories", "cpu_id"),
+    ("gpu_pricing_histories", "gpu_id"),
+    ("ram_pricing_histories", "ram_id"),
+    ("drive_pricing_histories", "hdd_ssd_id"),
+]:
+    RULES[_table] = {
+        "required": [_id_column, "timestamp", "price"],
+        "ranges": {
+            _id_column: (1, None),
+            "timestamp": (MIN_TIMESTAMP, None),
+            "price": (0, None),
+        },
+        "patterns": {},
+    }
+
+
+def quarantine_table(table):
+    # Rejected records keep every column as text, plus the failed checks
+    return TableSchema(
+        f"{table.name}_rejects", table.item_class, table.columns + ["reason"], []
+    )
+
+
+def _as_text(value):
+    return None if value is None else str(value)
+
+
+def validate(table, records):
+    """Split a batch of records into (valid, rejected) by the table's rules.
+
+    The checks run column-wise over the whole batch; rejected records are
+    converted to text and carry a "reason" listing every failed check.
+    """
+    rules = RULES.get(table.name)
+    if rules is None or not records:
+        return records, []
+
+    import numpy as np
+    import pandas as pd
+
+    df = pd.DataFrame(records, columns=table.columns)
+    reasons = pd.Series("", index=df.index, dtype=object)
+
+    def reject(mask, reason):
+        mask = mask.fillna(False).to_numpy(dtype=bool)
+        reasons[mask] = reasons[mask] + reason + "; "
+
+    def text(column):
+        return df[column].astype("string").str.strip()
+
+    def present(column):
+        if pd.api.types.is_numeric_dtype(df[column]):
+            return df[column].notna()
+        return df[column].notna() & (text(column) != "")
+
+    for column in rules["required"]:
+        reject(~present(column), f"{column} missing")
+
+    for column, (low, high) in rules["ranges"].items():
+        # Typed columns are compared as they are, text ones may use 1,234 style
+        values = df[column]
+        if not pd.api.types.is_numeric_dtype(values):
+            values = pd.to_numeric(text(column).str.replace(",", ""), errors="coerce")
+            reject(present(column) & values.isna(), f"{column} not a number")
+        if low is not None:
+            reject(values < low, f"{column} below {low}")
+        if high is not None:
+            reject(values > high, f"{column} above {high}")
+
+    for column, pattern in rules["patterns"].items():
+        reject(
+            present(column) & ~text(column).str.fullmatch(pattern),
+            f"{column} does not match {pattern}",
+        )
+
+    rejected = (reasons != "").to_numpy()
+    if not rejected.any():
+        return records, []
+
+    valid = [records[i] for i in np.flatnonzero(~rejected)]
+    rejects = [
+        dict(
+            {column: _as_text(records[i].get(column)) for column in table.columns},
+            reason=reasons.iat[i][:-2],
+        )
+        for i in np.flatnonzero(rejected)
+    ]
+    return valid, rejects